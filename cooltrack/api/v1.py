@@ -1,8 +1,12 @@
 import frappe
 from frappe import _
-from frappe.utils import get_datetime, add_to_date
 
-from cooltrack.utils import get_settings, parse_value
+from cooltrack.utils import get_settings
+from cooltrack.ingest import ingest_reading, ingest_batch
+from cooltrack.device_telemetry import TELEMETRY_FIELDS, apply_live_telemetry
+from cooltrack.ingest_queue import validate_reading, queue_readings, get_ingest_queue_stats
+
+MAX_BATCH_SIZE = 1000
 
 @frappe.whitelist()
 def get_api_url():
@@ -12,6 +16,29 @@ def get_api_url():
         return {'error': 'API URL not configured'}
     return {'api_url': settings.api_url}
 
+GATEWAY_SETTINGS_FIELDS = (
+    'api_url',
+    'gateway_time_offset',
+    'require_gateway_approval',
+    'require_sensor_approval',
+    'default_approval_status'
+)
+
+@frappe.whitelist()
+def get_gateway_settings(modified=None):
+    """Settings the gateway service caches; answers 304 when its copy (by modified timestamp) is current"""
+    settings = get_settings()
+    current = str(settings.modified)
+
+    if modified and modified == current:
+        frappe.local.response['http_status_code'] = 304
+        return None
+
+    return {
+        'modified': current,
+        'settings': {fieldname: settings.get(fieldname) for fieldname in GATEWAY_SETTINGS_FIELDS}
+    }
+
 @frappe.whitelist()
 def receive_sensor_data(**kwargs):
     settings = get_settings()
@@ -23,130 +50,92 @@ def receive_sensor_data(**kwargs):
             frappe.local.response['http_status_code'] = 400
             return frappe._dict({'error': 'No form data received'})
 
-        ip_address = form_data.get('_client_id')
-        timestamp = get_datetime(form_data.get('Time'))
-
-        gateway_time_offset = settings.gateway_time_offset
-        if gateway_time_offset and gateway_time_offset != 0:
-            timestamp = add_to_date(timestamp, hours=gateway_time_offset)
-
-        gateway_id = form_data.get('GW_ID')
-        sensor_id = form_data.get('ID')
-        sensor_type_name = form_data.get('TYPE')
-
-        gateway_approval_status = settings.default_approval_status if settings.require_gateway_approval else 'Approved'
-        sensor_approval_status = settings.default_approval_status if settings.require_sensor_approval else 'Approved'
-
-        gateway = frappe.db.get_value('Sensor Gateway', {'gateway_id': gateway_id})
-        if gateway:
-            gateway_doc = frappe.get_doc('Sensor Gateway', gateway)
-
-            if not gateway_doc.ip_address or gateway_doc.ip_address != ip_address:
-                gateway_doc.ip_address = ip_address
-
-            if not gateway_doc.last_heartbeat or gateway_doc.last_heartbeat < timestamp:
-                gateway_doc.last_heartbeat = timestamp
-
-            gateway_doc.save(ignore_permissions=True)
-
-        else:
-            gateway_doc = frappe.new_doc('Sensor Gateway')
-            gateway_doc.gateway_id = gateway_id
-            gateway_doc.approval_status = gateway_approval_status
-            gateway_doc.ip_address = ip_address
-            gateway_doc.last_heartbeat = timestamp
-            gateway_doc.insert(ignore_permissions=True)
-
-        frappe.db.commit()
-
-        gateway_doc.run_method('before_save')
-        frappe.db.commit()
-        
-        if gateway_doc.approval_status != 'Approved':
-            frappe.local.response['http_status_code'] = 403
-            return frappe._dict({'error': 'Gateway not approved'})
-
-        # Ensure Sensor Type exists
-        if sensor_type_name and not frappe.db.exists('Sensor Type', sensor_type_name):
-            sensor_type = frappe.new_doc('Sensor Type')
-            sensor_type.name = sensor_type_name
-            sensor_type.type_name = sensor_type_name
-            sensor_type.insert(ignore_permissions=True)
-            frappe.db.commit()
-
-        sensor = frappe.db.get_value('Sensor', {'sensor_id': sensor_id})
-        if sensor:
-            sensor_doc = frappe.get_doc('Sensor', sensor)
-            sensor_doc.last_temperature = parse_value(form_data.get('T'))
-            
-            if not sensor_doc.gateway_id or sensor_doc.gateway_id != gateway_id:
-                sensor_doc.gateway_id = gateway_id
-
-            sensor_doc.gateway_location = frappe.db.get_value('Sensor Gateway', {'gateway_id': gateway_id}, 'location')
-
-            if not sensor_doc.last_heartbeat or sensor_doc.last_heartbeat < timestamp:
-                sensor_doc.last_heartbeat = timestamp
-
-            sensor_doc.save(ignore_permissions=True)
-
-        else:
-            sensor_doc = frappe.new_doc('Sensor')
-            sensor_doc.sensor_id = sensor_id
-            sensor_doc.sensor_type = sensor_type_name
-            sensor_doc.gateway_id = gateway_id
-            sensor_doc.gateway_location = frappe.db.get_value('Sensor Gateway', {'gateway_id': gateway_id}, 'location')
-            sensor_doc.approval_status = sensor_approval_status
-            sensor_doc.last_temperature = parse_value(form_data.get('T'))
-            sensor_doc.last_heartbeat = timestamp
-            sensor_doc.insert(ignore_permissions=True)
-
-        frappe.db.commit()
-
-        sensor_doc.run_method('before_save')
-        frappe.db.commit()
-
-        if sensor_doc.approval_status != 'Approved':
-            frappe.local.response['http_status_code'] = 403
-            return frappe._dict({'error': 'Sensor not approved'})
-
-        # Process Sensor Reading
-        reading = frappe.new_doc('Sensor Read')
-
-        calibration_offset = sensor_doc.calibration_offset
-        temperature_before_calibration = parse_value(form_data.get('T'))
-        temperature = 0
-        if sensor_doc.calibration_offset and sensor_doc.calibration_offset != 0:
-            temperature = round((temperature_before_calibration + calibration_offset), 2)
-        else:
-            temperature = round((temperature_before_calibration), 2)
-
-        reading.update({
-            'sensor_id': sensor_id,
-            'sensor_type': sensor_type_name,
-            'temperature': temperature,
-            'humidity': parse_value(form_data.get('H')),
-            'voltage': parse_value(form_data.get('V')),
-            'signal_strength': parse_value(form_data.get('RSSI')),
-            'sensor_rssi': parse_value(form_data.get('T_RSSI')),
-            'sequence_number': form_data.get('SN'),
-            'gateway_id': gateway_id,
-            'coordinates': f"{form_data.get('E')},{form_data.get('N')}" if form_data.get('E') and form_data.get('N') else None,
-            'timestamp': timestamp,
-            'offset': calibration_offset,
-            'temperature_before_calibration': temperature_before_calibration,
-            'received_at': form_data.get('_received_at'),
-            'time_corrected': form_data.get('_time_corrected') == 'True'
-        })
-        reading.insert(ignore_permissions=True)
-        frappe.db.commit()
-
-        return {'message': 'Data received successfully'}
+        if settings.queue_ingest:
+            reading = {key: value for key, value in form_data.items() if key != 'cmd'}
+            error = validate_reading(reading)
+            if error:
+                frappe.local.response['http_status_code'] = 400
+                return frappe._dict({'error': error})
+
+            queue_readings([reading])
+            frappe.local.response['http_status_code'] = 202
+            return frappe._dict({'message': 'Data queued for processing'})
+
+        status_code, result = ingest_reading(form_data, settings)
+        frappe.db.commit() # Rejected readings still record the gateway/sensor heartbeat
+
+        if status_code != 200:
+            frappe.local.response['http_status_code'] = status_code
+
+        return result
 
     except Exception as e:
+        frappe.db.rollback()
         frappe.log_error(frappe.get_traceback(), 'receive_sensor_data()')
         frappe.local.response['http_status_code'] = 500
         return {'error': str(e)}
 
+@frappe.whitelist(methods=['POST'])
+def receive_sensor_data_batch(readings=None, **kwargs):
+    """Ingest a JSON array of gateway readings in one request with a result code per reading"""
+    settings = get_settings()
+    readings = frappe.parse_json(readings) if readings else None
+
+    if not readings or not isinstance(readings, list):
+        frappe.local.response['http_status_code'] = 400
+        return frappe._dict({'error': 'No readings received'})
+
+    if len(readings) > MAX_BATCH_SIZE:
+        frappe.local.response['http_status_code'] = 413
+        return frappe._dict({'error': f'Batch exceeds {MAX_BATCH_SIZE} readings'})
+
+    if settings.queue_ingest:
+        return queue_batch(readings)
+
+    return ingest_batch(readings, settings)
+
+def queue_batch(readings):
+    """Queue the valid readings of a batch; they are reported as 202 and the invalid ones as 400"""
+    results = []
+    queued = []
+
+    for index, reading in enumerate(readings):
+        error = validate_reading(reading) if isinstance(reading, dict) else 'Reading is not an object'
+        if error:
+            results.append({'index': index, 'status': 400, 'error': error})
+            continue
+
+        queued.append(reading)
+        results.append({'index': index, 'status': 202, 'message': 'Data queued for processing'})
+
+    if queued:
+        queue_readings(queued)
+
+    frappe.local.response['http_status_code'] = 202
+    return {'received': len(readings), 'accepted': len(queued), 'results': results}
+
+@frappe.whitelist()
+def get_ingest_queue_status():
+    """Depth and lag of the background ingest queue, for sizing the ingest workers"""
+    frappe.only_for('System Manager')
+    return get_ingest_queue_stats()
+
+@frappe.whitelist()
+def get_live_device_telemetry(doctype, names):
+    """Live last_heartbeat, number_of_transmissions and heartbeat fields of gateways or sensors, including
+    what is still buffered in Redis and not yet flushed to the database"""
+    if doctype not in TELEMETRY_FIELDS:
+        frappe.throw(_(f'Live telemetry is not kept for {doctype}'))
+
+    frappe.has_permission(doctype, 'read', throw=True)
+    names = frappe.parse_json(names) if isinstance(names, str) else names
+
+    rows = frappe.get_all(
+        doctype,
+        fields=['name', 'last_heartbeat', 'number_of_transmissions', *TELEMETRY_FIELDS[doctype]],
+        filters={'name': ['in', names or []]}
+    )
+    return apply_live_telemetry(doctype, rows)
 
 @frappe.whitelist(methods=['POST'])
 def mark_notification_read(notification_name: str):
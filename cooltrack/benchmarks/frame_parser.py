@@ -0,0 +1,162 @@
+"""Frames/sec of the single-pass FrameParser against the previous decode + validate + parse chain.
+
+Run with: python -m cooltrack.benchmarks.frame_parser [capture_file]
+
+A capture file holds raw gateway bytes with frames separated by CRLF, as written by the
+gateway log or the load harness. Without one, a representative synthetic mix is used.
+"""
+
+import sys
+import time
+from typing import Optional, Dict, Any, List
+
+from cooltrack.services.sensor_gateway_service.frame_parser import FrameParser
+
+SYNTHETIC_FRAMES: List[bytes] = [
+    b'GW_ID:GW0001,TYPE:TMP,ID:S10001,T:4.52,H:41.3,V:3.61,RSSI:-71,T_RSSI:-64,SN:18233,Time:2026-10-16 10:00:00',
+    b'BADMCGW_ID:GW0001,TYPE:TMP,ID:S10002,T:-18.20,V:3.58,RSSI:-69,T_RSSI:-80,SN:18234,Time:2026-10-16 10:00:01',
+    b'GW_ID:GW0002,TYPE:TMP,ID:S10003,T:5.1\xa1\xe6,RSSI:-77,SN:992,Time:2026-10-16 10:00:02,E:61.2,N:13.1',
+    b'GW_ID:GW0002,TYPE:HUM,ID:S10004,H:55.0,SN:993,Time:2026-10-16 10:00:03',
+    b'GET /favicon.ico HTTP/1.1',
+    b'Host: 10.0.0.5:8899',
+]
+
+class LegacyParser:
+    """The decode_sensor_data / is_valid_sensor_data / parse_sensor_data chain, without logging"""
+
+    gateway_name = 'BADMC'
+
+    def decode_sensor_data(self, data_bytes: bytes) -> str:
+        start_idx = 0
+        for marker in (b'GW_ID', b'%X', b'GW:'):
+            idx = data_bytes.find(marker)
+            if idx != -1:
+                start_idx = idx
+                break
+
+        processed = data_bytes[start_idx:].replace(b'\xa1\xe6', '℃'.encode('utf-8'))
+
+        try:
+            text = processed.decode('utf-8')
+
+        except UnicodeDecodeError:
+            text = processed.decode('latin-1')
+
+        return text.replace('â\x84\x83', '℃').replace('\xa0', ' ')
+
+    def clean_corrupted_sensor_data(self, data_str: str) -> str:
+        if self.gateway_name in data_str and 'GW_ID:' in data_str:
+            return data_str[data_str.find('GW_ID:'):]
+
+        return data_str
+
+    def is_valid_sensor_data(self, data_str: str) -> bool:
+        data_str = self.clean_corrupted_sensor_data(data_str.strip())
+
+        if len(data_str) < 10:
+            return False
+
+        http_methods = ['GET', 'POST', 'PUT', 'DELETE', 'HEAD', 'OPTIONS', 'PATCH']
+        if any(data_str.startswith(method + ' ') for method in http_methods):
+            return False
+
+        http_headers = [
+            'Host:', 'User-Agent:', 'Accept:', 'Accept-Language:', 'Accept-Encoding:',
+            'Connection:', 'Content-Type:', 'Content-Length:', 'Authorization:',
+            'Cookie:', 'Cache-Control:', 'Pragma:', 'Referer:'
+        ]
+        if any(data_str.startswith(header) for header in http_headers):
+            return False
+
+        if data_str.startswith('<') or 'html' in data_str.lower():
+            return False
+
+        if 'GW_ID:' not in data_str or 'TYPE:' not in data_str or 'ID:' not in data_str:
+            return False
+
+        if ',' not in data_str or ':' not in data_str:
+            return False
+
+        for part in data_str.split(','):
+            if part.strip().startswith('TYPE:') and part.split(':', 1)[1].strip() in ['TMP']:
+                return True
+
+        return False
+
+    def parse_sensor_data(self, sensor_data_str: str) -> Dict[str, Any]:
+        sensor_data_str = self.clean_corrupted_sensor_data(sensor_data_str)
+
+        parsed: Dict[str, Any] = {}
+        for part in sensor_data_str.split(','):
+            if ':' in part:
+                key, value = part.split(':', 1)
+                key = key.strip()
+                value = value.strip()
+
+                if key and value:
+                    try:
+                        if '.' in value and value.replace('.', '').replace('-', '').isdigit():
+                            parsed[key] = float(value)
+
+                        elif value.replace('-', '').isdigit():
+                            parsed[key] = int(value)
+
+                        else:
+                            parsed[key] = value
+
+                    except (ValueError, AttributeError):
+                        parsed[key] = value
+
+        return parsed
+
+    def parse(self, message: bytes) -> Optional[Dict[str, Any]]:
+        decoded_str = self.decode_sensor_data(message).strip()
+        if not decoded_str or not self.is_valid_sensor_data(decoded_str):
+            return None
+
+        return self.parse_sensor_data(decoded_str)
+
+def load_frames(path: Optional[str]) -> List[bytes]:
+    if not path:
+        return SYNTHETIC_FRAMES
+
+    with open(path, 'rb') as f:
+        frames = [frame for frame in f.read().split(b'\r\n') if frame.strip()]
+
+    if not frames:
+        raise SystemExit(f'No frames found in {path}')
+
+    return frames
+
+def frames_per_second(parse, frames: List[bytes], rounds: int) -> float:
+    started_at = time.perf_counter()
+    for _ in range(rounds):
+        for frame in frames:
+            parse(frame)
+
+    return rounds * len(frames) / (time.perf_counter() - started_at)
+
+def main() -> None:
+    frames = load_frames(sys.argv[1] if len(sys.argv) > 1 else None)
+    rounds = max(1, 200000 // len(frames))
+
+    legacy = LegacyParser()
+    parser = FrameParser(valid_types=('TMP',))
+
+    def single_pass(message: bytes) -> Optional[Dict[str, Any]]:
+        return parser.parse(parser.trim(message))[0]
+
+    mismatches = [frame for frame in frames if legacy.parse(frame) != single_pass(frame)]
+
+    before = frames_per_second(legacy.parse, frames, rounds)
+    after = frames_per_second(single_pass, frames, rounds)
+
+    print(f'Frames: {len(frames)} distinct, {rounds * len(frames)} parsed per run')
+    print(f'Before (decode + validate + parse): {before:,.0f} frames/sec')
+    print(f'After  (single-pass FrameParser):   {after:,.0f} frames/sec ({after / before:.1f}x)')
+    print(f'Frames parsed differently: {len(mismatches)}')
+    for frame in mismatches[:10]:
+        print(f'  {frame[:100]!r}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,542 @@
+"""Record-and-replay load harness for the sensor gateway TCP protocol.
+
+Record raw gateway streams through a pass-through proxy placed in front of the sensor server:
+    python -m cooltrack.benchmarks.gateway_load record --listen 0.0.0.0:9899 --upstream 127.0.0.1:8899 --out captures
+
+Run the local Frappe stand-in on its own; it prints the environment the sensor server needs to use it:
+    python -m cooltrack.benchmarks.gateway_load stub --port 8001
+
+Replay captures from N simulated gateways against a running sensor server. The stand-in is embedded
+so that every forwarded reading is matched to the frame that produced it:
+    python -m cooltrack.benchmarks.gateway_load replay captures/*.bin --target 127.0.0.1:8899 --gateways 50 --speed 10
+
+A capture is the raw gateway-to-server byte stream (readable by cooltrack.benchmarks.frame_parser)
+plus a .timing sidecar holding one [seconds_since_connect, chunk_length] JSON line per received chunk.
+"""
+
+import os
+import json
+import time
+import socket
+import random
+import re
+import bisect
+import argparse
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Dict, Any, List, Tuple, Deque
+
+from cooltrack.services.sensor_gateway_service.frame_parser import FrameParser
+
+DEFAULT_FRAME_INTERVAL = 1.0 # Pacing for captures without a .timing sidecar
+HANDSHAKE = b'BADMC'
+ID_MARKERS = re.compile(rb'GW_ID:|(?<=,)ID:')
+STUB_SETTINGS_MODIFIED = '2026-01-01 00:00:00.000000'
+
+ReadingKey = Tuple[str, str, str, str]
+
+def parse_address(value: str) -> Tuple[str, int]:
+    host, _, port = value.rpartition(':')
+    return host or '127.0.0.1', int(port)
+
+def reading_key(reading: Dict[str, Any]) -> ReadingKey:
+    gateway_time = reading.get('_original_gateway_time') or reading.get('Time')
+    return str(reading.get('GW_ID')), str(reading.get('ID')), str(reading.get('SN')), str(gateway_time)
+
+def percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+class CaptureProxy:
+    """Pass-through TCP proxy that writes every gateway-to-server chunk to a capture file"""
+
+    def __init__(self, listen: Tuple[str, int], upstream: Tuple[str, int], out_dir: str) -> None:
+        self.listen: Tuple[str, int] = listen
+        self.upstream: Tuple[str, int] = upstream
+        self.out_dir: str = out_dir
+
+    def serve(self) -> None:
+        os.makedirs(self.out_dir, exist_ok=True)
+
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        server.bind(self.listen)
+        server.listen(64)
+        print(f'Recording {self.listen[0]}:{self.listen[1]} -> {self.upstream[0]}:{self.upstream[1]} into {self.out_dir}')
+
+        try:
+            while True:
+                client, address = server.accept()
+                threading.Thread(target=self.handle, args=(client, address), daemon=True).start()
+
+        except KeyboardInterrupt:
+            pass
+
+        finally:
+            server.close()
+
+    def handle(self, client: socket.socket, address: Tuple[str, int]) -> None:
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{address[0]}-{address[1]}"
+        path = os.path.join(self.out_dir, name)
+
+        try:
+            upstream = socket.create_connection(self.upstream, timeout=10)
+            upstream.settimeout(None)
+
+        except OSError as e:
+            print(f'Upstream unavailable for {address}: {e}')
+            client.close()
+            return
+
+        # Server-to-gateway traffic (time sync) is relayed but not recorded
+        threading.Thread(target=self.pump, args=(upstream, client), daemon=True).start()
+
+        started_at = time.monotonic()
+        chunks = 0
+
+        with open(f'{path}.bin', 'wb') as capture, open(f'{path}.timing', 'w') as timing:
+            try:
+                while True:
+                    data = client.recv(4096)
+                    if not data:
+                        break
+
+                    capture.write(data)
+                    timing.write(json.dumps([round(time.monotonic() - started_at, 6), len(data)]) + '\n')
+                    upstream.sendall(data)
+                    chunks += 1
+
+            except OSError:
+                pass
+
+            finally:
+                client.close()
+                upstream.close()
+
+        print(f'Captured {chunks} chunks from {address[0]}:{address[1]} to {path}.bin')
+
+    def pump(self, source: socket.socket, destination: socket.socket) -> None:
+        try:
+            while True:
+                data = source.recv(4096)
+                if not data:
+                    break
+
+                destination.sendall(data)
+
+        except OSError:
+            pass
+
+def load_capture(path: str) -> List[Tuple[float, bytes]]:
+    """Return the capture as (seconds_since_connect, chunk) pairs"""
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    timing_path = f'{os.path.splitext(path)[0]}.timing'
+    if os.path.exists(timing_path):
+        chunks: List[Tuple[float, bytes]] = []
+        position = 0
+
+        with open(timing_path, 'r') as f:
+            for line in f:
+                offset, length = json.loads(line)
+                chunks.append((float(offset), data[position:position + length]))
+                position += length
+
+        if position < len(data):
+            chunks.append((chunks[-1][0] if chunks else 0.0, data[position:]))
+
+        return chunks
+
+    frames = [frame for frame in data.split(b'\r\n') if frame]
+    return [(index * DEFAULT_FRAME_INTERVAL, frame + b'\r\n') for index, frame in enumerate(frames)]
+
+def rewrite_gateway(chunks: List[Tuple[float, bytes]], tag: bytes) -> List[Tuple[float, bytes]]:
+    """Give a simulated gateway its own GW_ID and sensor IDs while keeping the original chunk boundaries.
+
+    Without this, every simulated gateway would send the same readings and the server's
+    deduplication would drop all but one copy.
+    """
+    stream = b''.join(chunk for _, chunk in chunks)
+    marker_ends: List[int] = [match.end() for match in ID_MARKERS.finditer(stream)]
+    rewritten = ID_MARKERS.sub(lambda match: match.group(0) + tag, stream)
+
+    result: List[Tuple[float, bytes]] = []
+    old_start = 0
+    new_start = 0
+    for offset, chunk in chunks:
+        old_end = old_start + len(chunk)
+        new_end = old_end + bisect.bisect_right(marker_ends, old_end) * len(tag)
+        result.append((offset, rewritten[new_start:new_end]))
+        old_start, new_start = old_end, new_end
+
+    return result
+
+class LatencyTracker:
+    """Matches readings arriving at the stand-in with the time their frame was sent"""
+
+    def __init__(self) -> None:
+        self.lock: threading.Lock = threading.Lock()
+        self.pending: Dict[ReadingKey, Deque[float]] = {}
+        self.latencies: List[float] = []
+        self.expected: int = 0
+        self.unexpected: int = 0
+        self.first_sent: Optional[float] = None
+        self.last_arrival: Optional[float] = None
+
+    def sent(self, key: ReadingKey, sent_at: float) -> None:
+        with self.lock:
+            self.pending.setdefault(key, deque()).append(sent_at)
+            self.expected += 1
+            if self.first_sent is None:
+                self.first_sent = sent_at
+
+    def arrived(self, reading: Dict[str, Any]) -> None:
+        arrived_at = time.monotonic()
+        key = reading_key(reading)
+
+        with self.lock:
+            sent_times = self.pending.get(key)
+            if not sent_times:
+                self.unexpected += 1
+                return
+
+            self.latencies.append(arrived_at - sent_times.popleft())
+            if not sent_times:
+                del self.pending[key]
+
+            self.last_arrival = arrived_at
+
+    def outstanding(self) -> int:
+        with self.lock:
+            return self.expected - len(self.latencies)
+
+    def report(self) -> Dict[str, Any]:
+        with self.lock:
+            latencies = sorted(self.latencies)
+            elapsed = (self.last_arrival - self.first_sent) if self.first_sent and self.last_arrival else 0.0
+
+            return {
+                'expected': self.expected,
+                'received': len(latencies),
+                'lost': self.expected - len(latencies),
+                'loss_pct': round(100 * (self.expected - len(latencies)) / self.expected, 3) if self.expected else 0.0,
+                'unexpected': self.unexpected,
+                'elapsed_s': round(elapsed, 3),
+                'frames_per_sec': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+                'latency_ms': {
+                    'p50': round(percentile(latencies, 0.50) * 1000, 1),
+                    'p90': round(percentile(latencies, 0.90) * 1000, 1),
+                    'p99': round(percentile(latencies, 0.99) * 1000, 1),
+                    'max': round(latencies[-1] * 1000, 1) if latencies else 0.0
+                }
+            }
+
+class FrappeStub:
+    """Local stand-in for the Frappe endpoints the sensor server calls"""
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        tracker: Optional[LatencyTracker] = None,
+        latency_ms: float = 0.0,
+        error_rate: float = 0.0
+    ) -> None:
+        self.tracker: Optional[LatencyTracker] = tracker
+        self.latency_ms: float = latency_ms
+        self.error_rate: float = error_rate
+        self.requests: int = 0
+        self.readings: int = 0
+        self.errors: int = 0
+
+        self.httpd = ThreadingHTTPServer((host, port), self.build_handler())
+        self.httpd.daemon_threads = True
+        self.base_domain: str = f'http://{host}:{self.httpd.server_address[1]}'
+
+    def build_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def send_json(self, status: int, payload: Dict[str, Any]) -> None:
+                body = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                api_url = f'{stub.base_domain}/api/method/cooltrack.api.v1.receive_sensor_data'
+
+                if self.path.endswith('cooltrack.api.v1.get_api_url'):
+                    self.send_json(200, {'message': {'api_url': api_url}})
+
+                elif 'cooltrack.api.v1.get_gateway_settings' in self.path:
+                    if 'modified=' in self.path:
+                        self.send_response(304) # Settings never change here
+                        self.end_headers()
+
+                    else:
+                        settings = {'api_url': api_url, 'gateway_time_offset': 0}
+                        self.send_json(200, {'message': {'modified': STUB_SETTINGS_MODIFIED, 'settings': settings}})
+
+                else:
+                    self.send_json(404, {'exc_type': 'DoesNotExistError'})
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                payload = json.loads(self.rfile.read(length) or b'{}')
+                stub.requests += 1
+
+                if stub.latency_ms:
+                    time.sleep(stub.latency_ms / 1000)
+
+                if stub.error_rate and random.random() < stub.error_rate:
+                    stub.errors += 1
+                    self.send_json(500, {'exc_type': 'SimulatedError'})
+                    return
+
+                if self.path.endswith('receive_sensor_data_batch'):
+                    readings = payload.get('readings') or []
+                    for reading in readings:
+                        stub.record(reading)
+
+                    results = [{'index': index, 'status': 200} for index in range(len(readings))]
+                    self.send_json(200, {'message': {'received': len(readings), 'accepted': len(readings), 'results': results}})
+
+                elif self.path.endswith('receive_sensor_data'):
+                    stub.record(payload)
+                    self.send_json(200, {'message': {'message': 'Data received successfully'}})
+
+                else:
+                    self.send_json(404, {'exc_type': 'DoesNotExistError'})
+
+        return Handler
+
+    def record(self, reading: Dict[str, Any]) -> None:
+        self.readings += 1
+        if self.tracker:
+            self.tracker.arrived(reading)
+
+    def start(self) -> None:
+        threading.Thread(target=self.httpd.serve_forever, daemon=True, name='FrappeStub').start()
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def server_environment(self) -> Dict[str, str]:
+        """Environment that points a sensor server's FrappeClient at this stand-in"""
+        from cryptography.fernet import Fernet
+
+        key = Fernet.generate_key()
+        cipher = Fernet(key)
+
+        return {
+            'FRAPPE_BASE_DOMAIN': self.base_domain,
+            'CONFIG_ENCRYPTION_KEY': key.decode(),
+            'ENCRYPTED_FRAPPE_API_KEY': cipher.encrypt(b'loadtest').decode(),
+            'ENCRYPTED_FRAPPE_API_SECRET': cipher.encrypt(b'loadtest').decode()
+        }
+
+class SimulatedGateway(threading.Thread):
+    def __init__(
+        self,
+        index: int,
+        target: Tuple[str, int],
+        chunks: List[Tuple[float, bytes]],
+        speed: float,
+        loops: int,
+        tracker: LatencyTracker,
+        parser: FrameParser
+    ) -> None:
+        super().__init__(daemon=True, name=f'Gateway-{index}')
+        self.target: Tuple[str, int] = target
+        self.index: int = index
+        self.chunks: List[Tuple[float, bytes]] = chunks
+        self.speed: float = speed
+        self.loops: int = loops
+        self.tracker: LatencyTracker = tracker
+        self.parser: FrameParser = parser
+        self.frames_sent: int = 0
+        self.error: Optional[str] = None
+
+    def keys_completed_by(self, tail: bytes, chunk: bytes) -> Tuple[bytes, List[ReadingKey]]:
+        """Frames finished by this chunk, keyed the way the stand-in will see them"""
+        buffer = tail + chunk
+        *frames, tail = buffer.split(b'\r\n')
+
+        keys: List[ReadingKey] = []
+        for frame in frames:
+            self.frames_sent += 1
+            fields, _ = self.parser.parse(self.parser.trim(frame))
+            if fields:
+                keys.append(reading_key(fields))
+
+        return tail, keys
+
+    def await_time_sync(self, sock: socket.socket) -> None:
+        try:
+            sock.settimeout(2)
+            sock.recv(4096)
+
+        except socket.timeout:
+            pass
+
+        finally:
+            sock.settimeout(10)
+
+    def replay_session(self, chunks: List[Tuple[float, bytes]]) -> None:
+        with socket.create_connection(self.target, timeout=10) as sock:
+            started_at = time.monotonic()
+            tail = b''
+
+            for offset, chunk in chunks:
+                if self.speed > 0:
+                    delay = started_at + offset / self.speed - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+
+                tail, keys = self.keys_completed_by(tail, chunk)
+                sent_at = time.monotonic()
+                for key in keys:
+                    self.tracker.sent(key, sent_at)
+
+                sock.sendall(chunk)
+
+                # A real gateway waits for the time sync reply before it starts sending frames
+                if HANDSHAKE in chunk:
+                    self.await_time_sync(sock)
+
+            # Half-close and drain the time sync replies: closing with unread data sends a reset,
+            # which would discard readings the server has not read yet
+            sock.shutdown(socket.SHUT_WR)
+            while sock.recv(4096):
+                pass
+
+    def run(self) -> None:
+        try:
+            # Every loop is a fresh session, as when a real gateway reconnects and handshakes again.
+            # Each loop also gets fresh IDs, otherwise repeats would be dropped as duplicates
+            for loop in range(self.loops):
+                self.replay_session(rewrite_gateway(self.chunks, f'SIM{self.index:04d}L{loop}-'.encode()))
+
+        except OSError as e:
+            self.error = str(e)
+
+def print_environment(environment: Dict[str, str]) -> None:
+    print('Start the sensor server with:')
+    for key, value in environment.items():
+        print(f'  export {key}={value}')
+
+def record(args: argparse.Namespace) -> None:
+    CaptureProxy(parse_address(args.listen), parse_address(args.upstream), args.out).serve()
+
+def stub(args: argparse.Namespace) -> None:
+    frappe_stub = FrappeStub(args.host, args.port, latency_ms=args.latency_ms, error_rate=args.error_rate)
+    print_environment(frappe_stub.server_environment())
+    print(f'Frappe stand-in listening on {frappe_stub.base_domain}')
+
+    try:
+        frappe_stub.httpd.serve_forever()
+
+    except KeyboardInterrupt:
+        pass
+
+    finally:
+        print(f'Requests: {frappe_stub.requests}, readings: {frappe_stub.readings}, errors: {frappe_stub.errors}')
+
+def replay(args: argparse.Namespace) -> None:
+    captures = [load_capture(path) for path in args.captures]
+    tracker = LatencyTracker()
+
+    frappe_stub = FrappeStub(args.stub_host, args.stub_port, tracker, args.latency_ms, args.error_rate)
+    frappe_stub.start()
+    if args.print_env:
+        print_environment(frappe_stub.server_environment())
+        input('Press Enter once the sensor server is running... ')
+
+    parser = FrameParser(valid_types=('TMP',))
+    gateways = [
+        SimulatedGateway(index, parse_address(args.target), captures[index % len(captures)], args.speed, args.loops, tracker, parser)
+        for index in range(args.gateways)
+    ]
+
+    for gateway in gateways:
+        gateway.start()
+        if args.ramp:
+            time.sleep(args.ramp / len(gateways))
+
+    for gateway in gateways:
+        gateway.join()
+
+    deadline = time.monotonic() + args.drain_timeout
+    while tracker.outstanding() and time.monotonic() < deadline:
+        time.sleep(0.2)
+
+    frappe_stub.stop()
+
+    report = tracker.report()
+    report['gateways'] = len(gateways)
+    report['frames_sent'] = sum(gateway.frames_sent for gateway in gateways)
+    report['gateway_errors'] = [gateway.error for gateway in gateways if gateway.error]
+    report['stub_requests'] = frappe_stub.requests
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    latency = report['latency_ms']
+    print(f"Gateways: {report['gateways']}, frames sent: {report['frames_sent']}, readings expected: {report['expected']}")
+    print(f"Received: {report['received']} in {report['elapsed_s']}s ({report['frames_per_sec']:,.1f} frames/sec) over {report['stub_requests']} requests")
+    print(f"Lost: {report['lost']} ({report['loss_pct']}%), unexpected: {report['unexpected']}")
+    print(f"Latency ms: p50 {latency['p50']}, p90 {latency['p90']}, p99 {latency['p99']}, max {latency['max']}")
+    for error in report['gateway_errors'][:10]:
+        print(f'  Gateway error: {error}')
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Record-and-replay load harness for the sensor gateway protocol')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    record_parser = commands.add_parser('record', help='Capture gateway streams through a pass-through proxy')
+    record_parser.add_argument('--listen', default='0.0.0.0:9899')
+    record_parser.add_argument('--upstream', default='127.0.0.1:8899')
+    record_parser.add_argument('--out', default='captures')
+    record_parser.set_defaults(handler=record)
+
+    for name, help_text in (('stub', 'Run the Frappe stand-in on its own'), ('replay', 'Replay captures from simulated gateways')):
+        command_parser = commands.add_parser(name, help=help_text)
+        command_parser.add_argument('--latency-ms', type=float, default=0.0, help='Delay added to every POST')
+        command_parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of POSTs answered with 500')
+
+        if name == 'stub':
+            command_parser.add_argument('--host', default='127.0.0.1')
+            command_parser.add_argument('--port', type=int, default=8001)
+            command_parser.set_defaults(handler=stub)
+
+        else:
+            command_parser.add_argument('captures', nargs='+')
+            command_parser.add_argument('--target', default='127.0.0.1:8899')
+            command_parser.add_argument('--gateways', type=int, default=10)
+            command_parser.add_argument('--speed', type=float, default=1.0, help='Speed multiplier; 0 sends as fast as possible')
+            command_parser.add_argument('--loops', type=int, default=1)
+            command_parser.add_argument('--ramp', type=float, default=0.0, help='Seconds over which gateways connect')
+            command_parser.add_argument('--drain-timeout', type=float, default=30.0)
+            command_parser.add_argument('--stub-host', default='127.0.0.1')
+            command_parser.add_argument('--stub-port', type=int, default=8001)
+            command_parser.add_argument('--print-env', action='store_true', help='Print server environment and wait')
+            command_parser.add_argument('--json', action='store_true')
+            command_parser.set_defaults(handler=replay)
+
+    args = parser.parse_args()
+    args.handler(args)
+
+if __name__ == '__main__':
+    main()
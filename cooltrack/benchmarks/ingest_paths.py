@@ -0,0 +1,169 @@
+"""Sustained-rate comparison of the HTTP and in-process (direct) ingest paths.
+
+Run from the bench directory with the bench's Python, against a test site:
+    python -m cooltrack.benchmarks.ingest_paths --site test.localhost --rate 1000 --duration 60
+
+Readings are generated at --rate per second and handed to --workers forwarder threads in batches of
+--batch-size, the way the sensor server's forward queue does. Each path is run in turn (select with
+--paths) and reports achieved readings/sec, per-batch latency percentiles, rejected readings and the
+backlog left when generation stopped; a path that cannot keep up with the rate shows a growing backlog.
+
+The HTTP path posts to receive_sensor_data_batch on FRAPPE_BASE_DOMAIN with the usual encrypted
+credentials. Every accepted reading is stored as a Sensor Read for gateway --gateway-id (default
+BENCH-GW), which must be approved on the site beforehand; do not point this at production.
+"""
+
+import json
+import time
+import queue
+import logging
+import argparse
+import threading
+from datetime import datetime
+from typing import Optional, Callable, Dict, Any, List
+
+from cooltrack.benchmarks.gateway_load import percentile
+
+BatchSender = Callable[[List[Dict[str, Any]]], Optional[List[Dict[str, Any]]]]
+
+def make_reading(gateway_id: str, sensor_count: int, sequence: int) -> Dict[str, Any]:
+    now = datetime.now().replace(microsecond=0).strftime('%Y-%m-%d %H:%M:%S')
+    return {
+        'GW_ID': gateway_id,
+        'TYPE': 'TMP',
+        'ID': f'{gateway_id}-S{sequence % sensor_count:04d}',
+        'T': round(4 + (sequence % 7) * 0.1, 2),
+        'H': 41.3,
+        'V': 3.61,
+        'RSSI': -71,
+        'T_RSSI': -64,
+        'SN': sequence,
+        'Time': now,
+        '_received_at': now,
+        '_time_corrected': False,
+        '_client_id': '127.0.0.1:0'
+    }
+
+def run_path(name: str, send_batch: BatchSender, args: argparse.Namespace) -> Dict[str, Any]:
+    pending: queue.Queue = queue.Queue()
+    stop_event = threading.Event()
+    lock = threading.Lock()
+    latencies: List[float] = []
+    counts = {'stored': 0, 'rejected': 0, 'failed': 0}
+
+    def worker() -> None:
+        while not (stop_event.is_set() and pending.empty()):
+            batch: List[Dict[str, Any]] = []
+            try:
+                batch.append(pending.get(timeout=0.2))
+                while len(batch) < args.batch_size:
+                    batch.append(pending.get_nowait())
+
+            except queue.Empty:
+                if not batch:
+                    continue
+
+            started_at = time.perf_counter()
+            results = send_batch(batch)
+            elapsed = time.perf_counter() - started_at
+
+            with lock:
+                latencies.append(elapsed)
+                if results is None:
+                    counts['failed'] += len(batch)
+                    continue
+
+                for result in results:
+                    counts['stored' if result.get('status') in (200, 202) else 'rejected'] += 1
+
+    workers = [threading.Thread(target=worker, daemon=True, name=f'{name}-{index}') for index in range(args.workers)]
+    for thread in workers:
+        thread.start()
+
+    started_at = time.monotonic()
+    sequence = 0
+    total = int(args.rate * args.duration)
+
+    # Paced in 10ms ticks so the offered load stays at --rate regardless of how the path copes
+    while sequence < total:
+        due = min(total, int((time.monotonic() - started_at) * args.rate))
+        while sequence < due:
+            pending.put(make_reading(args.gateway_id, args.sensors, sequence))
+            sequence += 1
+
+        time.sleep(0.01)
+
+    backlog = pending.qsize()
+    stop_event.set()
+    for thread in workers:
+        thread.join()
+
+    elapsed = time.monotonic() - started_at
+    latencies.sort()
+    completed = counts['stored'] + counts['rejected'] + counts['failed']
+
+    return {
+        'path': name,
+        'offered_rate': args.rate,
+        'readings': total,
+        'elapsed_s': round(elapsed, 2),
+        'readings_per_sec': round(completed / elapsed, 1) if elapsed else 0.0,
+        'backlog_at_end': backlog,
+        'batches': len(latencies),
+        'batch_latency_ms': {
+            'p50': round(percentile(latencies, 0.50) * 1000, 2),
+            'p90': round(percentile(latencies, 0.90) * 1000, 2),
+            'p99': round(percentile(latencies, 0.99) * 1000, 2),
+            'max': round(latencies[-1] * 1000, 2) if latencies else 0.0
+        },
+        **counts
+    }
+
+def http_sender(logger: logging.Logger) -> BatchSender:
+    from cooltrack.services.frappe_client import FrappeClient
+
+    client = FrappeClient(logger=logger)
+    if not client.get_api_url_from_server():
+        raise SystemExit(f'Could not reach {client.base_domain} for the HTTP path')
+
+    return client.forward_sensor_data_batch
+
+def direct_sender(logger: logging.Logger, args: argparse.Namespace) -> BatchSender:
+    from cooltrack.services.sensor_gateway_service.direct_ingest import DirectIngestClient
+
+    return DirectIngestClient(logger=logger, site=args.site, sites_path=args.sites_path).forward_sensor_data_batch
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Compare the HTTP and in-process ingest paths at a fixed reading rate')
+    parser.add_argument('--site', required=True)
+    parser.add_argument('--sites-path', default='sites')
+    parser.add_argument('--paths', default='http,direct', help='Comma-separated subset of http,direct')
+    parser.add_argument('--rate', type=float, default=1000.0, help='Readings offered per second')
+    parser.add_argument('--duration', type=float, default=30.0)
+    parser.add_argument('--batch-size', type=int, default=200)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--sensors', type=int, default=500)
+    parser.add_argument('--gateway-id', default='BENCH-GW')
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    logger = logging.getLogger('ingest_paths')
+
+    reports = []
+    for name in [path.strip() for path in args.paths.split(',') if path.strip()]:
+        send_batch = http_sender(logger) if name == 'http' else direct_sender(logger, args)
+        reports.append(run_path(name, send_batch, args))
+
+    if args.json:
+        print(json.dumps(reports, indent=2))
+        return
+
+    for report in reports:
+        latency = report['batch_latency_ms']
+        print(f"{report['path']:>6}: {report['readings_per_sec']:,.1f} readings/sec of {report['offered_rate']:,.0f} offered, backlog {report['backlog_at_end']}")
+        print(f"        stored {report['stored']}, rejected {report['rejected']}, failed {report['failed']} in {report['batches']} batches")
+        print(f"        batch ms: p50 {latency['p50']}, p90 {latency['p90']}, p99 {latency['p99']}, max {latency['max']}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,238 @@
+"""Commits and queries per reading for the ingest path, before and after the single-transaction change.
+
+Run inside a site (creates readings for a dedicated gateway; use a test site):
+    bench --site test.localhost execute cooltrack.benchmarks.ingest_transactions.run --kwargs "{'readings': 500}"
+
+Three paths are measured on the same generated readings:
+    legacy  the previous ingest_reading, which committed after every step (up to six times per reading)
+    single  ingest_reading plus one commit, as receive_sensor_data does now
+    batch   ingest_batch over batch_size readings, one commit per batch
+
+Each path gets its own gateway, whose sensors are created and approved in an unmeasured warm-up pass,
+so the counts reflect the steady state of known, approved devices. Transaction control statements
+(commit, begin, savepoint, rollback) are reported as commits and excluded from the query count.
+"""
+
+import time
+from typing import Callable, Dict, Any, List
+
+import frappe
+from frappe.utils import get_datetime, add_to_date
+
+from cooltrack.utils import get_settings, parse_value
+from cooltrack.ingest import ingest_reading, ingest_batch
+from cooltrack.benchmarks.ingest_paths import make_reading
+
+TRANSACTION_CONTROL = ('commit', 'start transaction', 'begin', 'savepoint', 'release savepoint', 'rollback')
+
+def legacy_ingest_reading(form_data, settings):
+    """ingest_reading as it was before, committing after every step"""
+    ip_address = form_data.get('_client_id')
+    timestamp = get_datetime(form_data.get('Time'))
+
+    gateway_time_offset = settings.gateway_time_offset
+    if gateway_time_offset and gateway_time_offset != 0:
+        timestamp = add_to_date(timestamp, hours=gateway_time_offset)
+
+    gateway_id = form_data.get('GW_ID')
+    sensor_id = form_data.get('ID')
+    sensor_type_name = form_data.get('TYPE')
+
+    gateway_approval_status = settings.default_approval_status if settings.require_gateway_approval else 'Approved'
+    sensor_approval_status = settings.default_approval_status if settings.require_sensor_approval else 'Approved'
+
+    gateway = frappe.db.get_value('Sensor Gateway', {'gateway_id': gateway_id})
+    if gateway:
+        gateway_doc = frappe.get_doc('Sensor Gateway', gateway)
+
+        if not gateway_doc.ip_address or gateway_doc.ip_address != ip_address:
+            gateway_doc.ip_address = ip_address
+
+        if not gateway_doc.last_heartbeat or gateway_doc.last_heartbeat < timestamp:
+            gateway_doc.last_heartbeat = timestamp
+
+        gateway_doc.save(ignore_permissions=True)
+
+    else:
+        gateway_doc = frappe.new_doc('Sensor Gateway')
+        gateway_doc.gateway_id = gateway_id
+        gateway_doc.approval_status = gateway_approval_status
+        gateway_doc.ip_address = ip_address
+        gateway_doc.last_heartbeat = timestamp
+        gateway_doc.insert(ignore_permissions=True)
+
+    frappe.db.commit()
+
+    gateway_doc.run_method('before_save')
+    frappe.db.commit()
+
+    if gateway_doc.approval_status != 'Approved':
+        return 403, frappe._dict({'error': 'Gateway not approved'})
+
+    # Ensure Sensor Type exists
+    if sensor_type_name and not frappe.db.exists('Sensor Type', sensor_type_name):
+        sensor_type = frappe.new_doc('Sensor Type')
+        sensor_type.name = sensor_type_name
+        sensor_type.type_name = sensor_type_name
+        sensor_type.insert(ignore_permissions=True)
+        frappe.db.commit()
+
+    sensor = frappe.db.get_value('Sensor', {'sensor_id': sensor_id})
+    if sensor:
+        sensor_doc = frappe.get_doc('Sensor', sensor)
+
+        if not sensor_doc.gateway_id or sensor_doc.gateway_id != gateway_id:
+            sensor_doc.gateway_id = gateway_id
+
+        sensor_doc.gateway_location = frappe.db.get_value('Sensor Gateway', {'gateway_id': gateway_id}, 'location')
+
+        # Spooled readings are replayed late; they must not overwrite a newer temperature
+        if not sensor_doc.last_heartbeat or sensor_doc.last_heartbeat <= timestamp:
+            sensor_doc.last_heartbeat = timestamp
+            sensor_doc.last_temperature = parse_value(form_data.get('T'))
+
+        sensor_doc.save(ignore_permissions=True)
+
+    else:
+        sensor_doc = frappe.new_doc('Sensor')
+        sensor_doc.sensor_id = sensor_id
+        sensor_doc.sensor_type = sensor_type_name
+        sensor_doc.gateway_id = gateway_id
+        sensor_doc.gateway_location = frappe.db.get_value('Sensor Gateway', {'gateway_id': gateway_id}, 'location')
+        sensor_doc.approval_status = sensor_approval_status
+        sensor_doc.last_temperature = parse_value(form_data.get('T'))
+        sensor_doc.last_heartbeat = timestamp
+        sensor_doc.insert(ignore_permissions=True)
+
+    frappe.db.commit()
+
+    sensor_doc.run_method('before_save')
+    frappe.db.commit()
+
+    if sensor_doc.approval_status != 'Approved':
+        return 403, frappe._dict({'error': 'Sensor not approved'})
+
+    # Process Sensor Reading
+    reading = frappe.new_doc('Sensor Read')
+
+    calibration_offset = sensor_doc.calibration_offset
+    temperature_before_calibration = parse_value(form_data.get('T'))
+    temperature = 0
+    if sensor_doc.calibration_offset and sensor_doc.calibration_offset != 0:
+        temperature = round((temperature_before_calibration + calibration_offset), 2)
+    else:
+        temperature = round((temperature_before_calibration), 2)
+
+    reading.update({
+        'sensor_id': sensor_id,
+        'sensor_type': sensor_type_name,
+        'temperature': temperature,
+        'humidity': parse_value(form_data.get('H')),
+        'voltage': parse_value(form_data.get('V')),
+        'signal_strength': parse_value(form_data.get('RSSI')),
+        'sensor_rssi': parse_value(form_data.get('T_RSSI')),
+        'sequence_number': form_data.get('SN'),
+        'gateway_id': gateway_id,
+        'coordinates': f"{form_data.get('E')},{form_data.get('N')}" if form_data.get('E') and form_data.get('N') else None,
+        'timestamp': timestamp,
+        'offset': calibration_offset,
+        'temperature_before_calibration': temperature_before_calibration,
+        'received_at': form_data.get('_received_at'),
+        'time_corrected': str(form_data.get('_time_corrected')) == 'True'
+    })
+    reading.insert(ignore_permissions=True)
+    frappe.db.commit()
+
+    return 200, {'message': 'Data received successfully'}
+
+class QueryCounter:
+    """Wraps frappe.db.sql and frappe.db.commit for the duration of a measurement"""
+
+    def __init__(self) -> None:
+        self.queries: int = 0
+        self.commits: int = 0
+
+    def __enter__(self) -> 'QueryCounter':
+        self.sql = frappe.db.sql
+        self.commit = frappe.db.commit
+        counter = self
+
+        def counting_sql(query, *args, **kwargs):
+            if not str(query).lstrip().lower().startswith(TRANSACTION_CONTROL):
+                counter.queries += 1
+
+            return counter.sql(query, *args, **kwargs)
+
+        def counting_commit(*args, **kwargs):
+            counter.commits += 1
+            return counter.commit(*args, **kwargs)
+
+        frappe.db.sql = counting_sql
+        frappe.db.commit = counting_commit
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        frappe.db.sql = self.sql
+        frappe.db.commit = self.commit
+
+def approve_devices(gateway_id: str) -> None:
+    frappe.db.set_value('Sensor Gateway', {'gateway_id': gateway_id}, 'approval_status', 'Approved')
+    for sensor in frappe.get_all('Sensor', filters={'gateway_id': gateway_id}, pluck='name'):
+        frappe.db.set_value('Sensor', sensor, 'approval_status', 'Approved')
+
+    frappe.db.commit()
+
+def measure(name: str, store: Callable[[List[Dict[str, Any]]], None], readings: int, sensors: int, prefix: str) -> Dict[str, Any]:
+    gateway_id = f'{prefix}-{name.upper()}'
+    sequence = 0
+
+    # Warm-up: create the gateway and its sensors, then approve them
+    warm_up = [make_reading(gateway_id, sensors, sequence + index) for index in range(sensors)]
+    store(warm_up)
+    approve_devices(gateway_id)
+    sequence += sensors
+
+    batch = [make_reading(gateway_id, sensors, sequence + index) for index in range(readings)]
+
+    with QueryCounter() as counter:
+        started_at = time.perf_counter()
+        store(batch)
+        elapsed = time.perf_counter() - started_at
+
+    return {
+        'path': name,
+        'readings': readings,
+        'commits_per_reading': round(counter.commits / readings, 3),
+        'queries_per_reading': round(counter.queries / readings, 2),
+        'ms_per_reading': round(elapsed / readings * 1000, 3)
+    }
+
+def run(readings: int = 500, sensors: int = 50, batch_size: int = 200, prefix: str = 'BENCH-TX') -> List[Dict[str, Any]]:
+    settings = get_settings()
+
+    def legacy(items: List[Dict[str, Any]]) -> None:
+        for item in items:
+            legacy_ingest_reading(frappe._dict(item), settings)
+
+    def single(items: List[Dict[str, Any]]) -> None:
+        for item in items:
+            ingest_reading(frappe._dict(item), settings)
+            frappe.db.commit()
+
+    def batched(items: List[Dict[str, Any]]) -> None:
+        for start in range(0, len(items), batch_size):
+            ingest_batch(items[start:start + batch_size], settings)
+
+    reports = [
+        measure('legacy', legacy, readings, sensors, prefix),
+        measure('single', single, readings, sensors, prefix),
+        measure('batch', batched, readings, sensors, prefix)
+    ]
+
+    for report in reports:
+        print(
+            f"{report['path']:>6}: {report['commits_per_reading']} commits, {report['queries_per_reading']} queries, "
+            f"{report['ms_per_reading']} ms per reading over {report['readings']} readings"
+        )
+
+    return reports
@@ -0,0 +1,81 @@
+"""Rows/sec of Sensor Read inserts: one Document insert per row against the multi-row bulk writer.
+
+Run inside a site (writes and then deletes rows for made-up sensors; use a test site):
+    bench --site test.localhost execute cooltrack.benchmarks.sensor_read_insert.run --kwargs "{'rows': 3000}"
+
+For each batch size (1, 100 and 1000 rows by default) the same number of rows is stored twice, with a
+commit per batch as ingest_batch does:
+    document  frappe.new_doc('Sensor Read') + insert() per row, as ingest_reading used to
+    bulk      cooltrack.ingest.insert_sensor_reads, one INSERT IGNORE per batch
+Only the Sensor Read writes are measured, not device lookups or updates.
+"""
+
+import time
+from typing import Callable, Dict, Any, List, Sequence
+
+import frappe
+from frappe.utils import add_to_date, now_datetime
+
+from cooltrack.ingest import insert_sensor_reads
+
+def make_rows(sensor_id: str, count: int) -> List[Dict[str, Any]]:
+    started_at = now_datetime().replace(microsecond=0)
+    return [
+        {
+            'sensor_id': sensor_id,
+            'sensor_type': 'TMP',
+            'temperature': round(4 + (index % 7) * 0.1, 2),
+            'humidity': 41.3,
+            'voltage': 3.61,
+            'signal_strength': -71,
+            'sensor_rssi': -64,
+            'sequence_number': index,
+            'gateway_id': 'BENCH-GW',
+            'coordinates': None,
+            'timestamp': add_to_date(started_at, seconds=index),
+            'offset': 0.0,
+            'temperature_before_calibration': round(4 + (index % 7) * 0.1, 2),
+            'received_at': started_at,
+            'time_corrected': 0
+        }
+        for index in range(count)
+    ]
+
+def insert_documents(rows: List[Dict[str, Any]]) -> None:
+    for row in rows:
+        reading = frappe.new_doc('Sensor Read')
+        reading.update(row)
+        reading.insert(ignore_permissions=True)
+
+def measure(path: str, store: Callable[[List[Dict[str, Any]]], None], rows: List[Dict[str, Any]], batch_size: int) -> Dict[str, Any]:
+    started_at = time.perf_counter()
+    for start in range(0, len(rows), batch_size):
+        store(rows[start:start + batch_size])
+        frappe.db.commit()
+
+    elapsed = time.perf_counter() - started_at
+
+    return {
+        'path': path,
+        'batch_size': batch_size,
+        'rows': len(rows),
+        'rows_per_sec': round(len(rows) / elapsed, 1) if elapsed else 0.0
+    }
+
+def run(rows: int = 3000, batch_sizes: Sequence[int] = (1, 100, 1000), prefix: str = 'BENCH-SR') -> List[Dict[str, Any]]:
+    paths = {'document': insert_documents, 'bulk': insert_sensor_reads}
+    reports = []
+
+    try:
+        for batch_size in batch_sizes:
+            for path, store in paths.items():
+                reports.append(measure(path, store, make_rows(f'{prefix}-{path}-{batch_size}', rows), batch_size))
+
+    finally:
+        frappe.db.delete('Sensor Read', {'sensor_id': ['like', f'{prefix}-%']})
+        frappe.db.commit()
+
+    for report in reports:
+        print(f"{report['path']:>8} x{report['batch_size']:<5}: {report['rows_per_sec']:,.1f} rows/sec over {report['rows']} rows")
+
+    return reports
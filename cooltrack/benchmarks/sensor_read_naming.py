@@ -0,0 +1,98 @@
+"""Insert throughput and table size of Sensor Read with random hash names against time-ordered names.
+
+Run inside a site, on a test database with room for two copies of the dataset (about 2-3 GB each at 10M rows):
+    bench --site test.localhost execute cooltrack.benchmarks.sensor_read_naming.run --kwargs "{'rows': 10000000}"
+
+Each naming scheme fills its own scratch copy of `tabSensor Read` (CREATE TABLE ... LIKE, so the same
+indexes) with the same generated rows, in multi-row INSERTs of batch_size rows with a commit each:
+    hash      frappe.generate_hash(length=10), what the doctype used to produce
+    ordered   make_reading_name(), the time-ordered names SensorRead.autoname now produces
+Throughput is reported per window of report_every rows, so the slowdown as the primary key outgrows the
+buffer pool shows up, followed by data and index size from information_schema after ANALYZE TABLE.
+The scratch tables are dropped at the end unless keep_tables is set.
+"""
+
+import time
+from typing import Callable, Dict, Any, List
+
+import frappe
+from frappe.utils import add_to_date, now_datetime
+
+from cooltrack.cool_track.doctype.sensor_read.sensor_read import make_reading_name
+
+COLUMNS = ['name', 'creation', 'modified', 'sensor_id', 'temperature', 'sequence_number', 'timestamp', 'received_at']
+
+def get_table(scheme: str) -> str:
+    return f'__bench_sensor_read_{scheme}'
+
+def fill(table: str, make_name: Callable[[], str], rows: int, batch_size: int, report_every: int) -> List[float]:
+    started_at = now_datetime().replace(microsecond=0)
+    placeholders = f"({', '.join(['%s'] * len(COLUMNS))})"
+    windows = []
+    window_started_at = time.perf_counter()
+
+    for start in range(0, rows, batch_size):
+        values = []
+        for index in range(start, min(rows, start + batch_size)):
+            timestamp = add_to_date(started_at, seconds=index)
+            values += [make_name(), timestamp, timestamp, f'BENCH-S{index % 500:04d}', 4.2, index, timestamp, timestamp]
+
+        frappe.db.sql(
+            f"INSERT INTO `{table}` ({', '.join(COLUMNS)}) VALUES {', '.join([placeholders] * (len(values) // len(COLUMNS)))}",
+            values
+        )
+        frappe.db.commit()
+
+        inserted = min(rows, start + batch_size)
+        if inserted % report_every < batch_size or inserted == rows:
+            elapsed = time.perf_counter() - window_started_at
+            windows.append(round(min(report_every, inserted - len(windows) * report_every) / elapsed, 1))
+            window_started_at = time.perf_counter()
+
+    return windows
+
+def get_size(table: str) -> Dict[str, float]:
+    frappe.db.sql(f'ANALYZE TABLE `{table}`')
+    data_length, index_length = frappe.db.sql("""
+        SELECT data_length, index_length
+        FROM information_schema.tables
+        WHERE table_schema = DATABASE() AND table_name = %s
+    """, table)[0]
+
+    return {'data_mb': round(data_length / 1024 / 1024, 1), 'index_mb': round(index_length / 1024 / 1024, 1)}
+
+def run(rows: int = 10_000_000, batch_size: int = 5000, report_every: int = 1_000_000, keep_tables: bool = False) -> List[Dict[str, Any]]:
+    schemes = {'hash': lambda: frappe.generate_hash(length=10), 'ordered': make_reading_name}
+    reports = []
+
+    try:
+        for scheme, make_name in schemes.items():
+            table = get_table(scheme)
+            frappe.db.sql_ddl(f'DROP TABLE IF EXISTS `{table}`')
+            frappe.db.sql_ddl(f'CREATE TABLE `{table}` LIKE `tabSensor Read`')
+
+            started_at = time.perf_counter()
+            windows = fill(table, make_name, rows, batch_size, report_every)
+            elapsed = time.perf_counter() - started_at
+
+            reports.append({
+                'scheme': scheme,
+                'rows': rows,
+                'rows_per_sec': round(rows / elapsed, 1) if elapsed else 0.0,
+                'rows_per_sec_by_window': windows,
+                **get_size(table)
+            })
+
+    finally:
+        if not keep_tables:
+            for scheme in schemes:
+                frappe.db.sql_ddl(f'DROP TABLE IF EXISTS `{get_table(scheme)}`')
+
+    for report in reports:
+        print(
+            f"{report['scheme']:>7}: {report['rows_per_sec']:,.1f} rows/sec over {report['rows']:,} rows, "
+            f"data {report['data_mb']} MB, indexes {report['index_mb']} MB"
+        )
+        print(f"         per {report_every:,} rows: {', '.join(f'{rate:,.0f}' for rate in report['rows_per_sec_by_window'])}")
+
+    return reports
@@ -13,6 +13,8 @@ from cooltrack.utils import (
     creat_alert_status_log,
     check_temperature_threshold_violation
 )
+from cooltrack.device_cache import clear_device_meta
+from cooltrack.device_telemetry import clear_telemetry, keep_stored_telemetry
 
 class Sensor(Document):
     def after_insert(self):
@@ -63,12 +65,31 @@ class Sensor(Document):
                 if original_alert_status != 1: # Create log if status changed
                     creat_alert_status_log(self.name, 1)
         
-        check_temperature_threshold_violation(self)
+        if self.has_value_changed('max_acceptable_temperature') and self.excursion_started_at:
+            # Measured against the old limit; the next reading opens a new one if still above
+            self.db_set({
+                'excursion_started_at': None,
+                'excursion_peak_temperature': 0,
+                'excursion_last_temperature': 0
+            }, update_modified=False)
+
+        if not self.flags.from_ingest:
+            check_temperature_threshold_violation(self)
+
+        clear_device_meta(self.doctype, self.name)
+
+    def on_trash(self):
+        clear_device_meta(self.doctype, self.name)
+        clear_telemetry(self.doctype, self.name)
     
     def before_save(self):
         self.update_status()
 
-        if self.approval_status == 'Approved' and self.status == 'Active':
+        # Heartbeat and transmission count belong to ingest (see cooltrack.device_telemetry)
+        if not self.flags.from_ingest:
+            keep_stored_telemetry(self)
+
+        elif self.approval_status == 'Approved' and self.status == 'Active':
             if not self.number_of_transmissions:
                 self.number_of_transmissions = 0
             
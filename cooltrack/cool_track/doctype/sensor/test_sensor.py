@@ -1,9 +1,71 @@
 # Copyright (c) 2025, dev@cogentmedia.co and Contributors
 # See license.txt
 
-# import frappe
+from unittest.mock import patch
+
+import frappe
 from frappe.tests.utils import FrappeTestCase
+from frappe.utils import get_datetime
+
+from cooltrack.utils import update_excursion_state
+
+
+def make_sensor(**values):
+	return frappe._dict({
+		'name': 'TEST-SENSOR-EXCURSION',
+		'max_acceptable_temperature': 8.0,
+		'excursion_started_at': None,
+		'excursion_last_reading_at': None,
+		'excursion_peak_temperature': 0,
+		'excursion_last_temperature': 0,
+		**values
+	})
 
 
+def at(time):
+	return get_datetime(f'2026-10-16 {time}')
+
+
+@patch('cooltrack.utils.clear_device_meta')
+@patch('cooltrack.utils.frappe.db.set_value')
 class TestSensor(FrappeTestCase):
-	pass
+	def test_excursion_opens_grows_and_closes(self, set_value, _clear_device_meta):
+		sensor = make_sensor()
+
+		self.assertTrue(update_excursion_state(sensor, 9.0, at('12:00:00')))
+		self.assertEqual(sensor.excursion_started_at, at('12:00:00'))
+		self.assertEqual(sensor.excursion_peak_temperature, 9.0)
+
+		self.assertTrue(update_excursion_state(sensor, 10.5, at('12:05:00')))
+		self.assertTrue(update_excursion_state(sensor, 9.5, at('12:10:00')))
+		self.assertEqual(sensor.excursion_started_at, at('12:00:00'))
+		self.assertEqual(sensor.excursion_peak_temperature, 10.5)
+		self.assertEqual(sensor.excursion_last_temperature, 9.5)
+
+		self.assertTrue(update_excursion_state(sensor, 6.0, at('12:15:00')))
+		self.assertIsNone(sensor.excursion_started_at)
+		self.assertEqual(sensor.excursion_last_reading_at, at('12:15:00'))
+		self.assertEqual(sensor.excursion_peak_temperature, 0)
+
+		self.assertEqual(set_value.call_count, 4)
+
+	def test_in_range_reading_writes_nothing(self, set_value, _clear_device_meta):
+		self.assertFalse(update_excursion_state(make_sensor(), 5.0, at('12:00:00')))
+		set_value.assert_not_called()
+
+	def test_late_reading_is_ignored(self, set_value, _clear_device_meta):
+		sensor = make_sensor(
+			excursion_started_at=at('12:00:00'),
+			excursion_last_reading_at=at('12:10:00'),
+			excursion_peak_temperature=9.0,
+			excursion_last_temperature=9.0
+		)
+
+		# A spooled in-range reading from before the latest one must not close the excursion
+		self.assertFalse(update_excursion_state(sensor, 5.0, at('12:05:00')))
+		self.assertEqual(sensor.excursion_started_at, at('12:00:00'))
+		set_value.assert_not_called()
+
+	def test_sensor_without_limit_has_no_excursions(self, set_value, _clear_device_meta):
+		self.assertFalse(update_excursion_state(make_sensor(max_acceptable_temperature=None), 50.0, at('12:00:00')))
+		set_value.assert_not_called()
@@ -5,6 +5,8 @@ import frappe
 from frappe.model.document import Document
 
 from cooltrack.utils import get_settings, send_approval_notification, create_approval_log
+from cooltrack.device_cache import clear_device_meta
+from cooltrack.device_telemetry import clear_telemetry, keep_stored_telemetry
 
 class SensorGateway(Document):
     def after_insert(self):
@@ -17,11 +19,22 @@ class SensorGateway(Document):
         if self.approval_status != original_approval_status and settings.log_approval_activities:
             automated = not settings.require_gateway_approval
             create_approval_log(self.doctype, self.name, self.approval_status, automated=automated)
+
+    def on_update(self):
+        clear_device_meta(self.doctype, self.name)
+
+    def on_trash(self):
+        clear_device_meta(self.doctype, self.name)
+        clear_telemetry(self.doctype, self.name)
             
     def before_save(self):
         self.update_status()
 
-        if self.approval_status == 'Approved' and self.status == 'Active':
+        # Heartbeat and transmission count belong to ingest (see cooltrack.device_telemetry)
+        if not self.flags.from_ingest:
+            keep_stored_telemetry(self)
+
+        elif self.approval_status == 'Approved' and self.status == 'Active':
             if not self.number_of_transmissions:
                 self.number_of_transmissions = 0
 
@@ -1,9 +1,42 @@
 # Copyright (c) 2025, dev@cogentmedia.co and Contributors
 # See license.txt
 
-# import frappe
+import frappe
 from frappe.tests.utils import FrappeTestCase
 
 
 class TestSensorGateway(FrappeTestCase):
-	pass
+	def setUp(self):
+		if frappe.db.exists('Sensor Gateway', 'TEST-GW-TELEMETRY'):
+			frappe.delete_doc('Sensor Gateway', 'TEST-GW-TELEMETRY', ignore_permissions=True, force=True)
+
+		self.gateway = frappe.get_doc({
+			'doctype': 'Sensor Gateway',
+			'gateway_id': 'TEST-GW-TELEMETRY',
+			'approval_status': 'Approved'
+		}).insert(ignore_permissions=True)
+
+	def test_desk_save_keeps_stored_telemetry(self):
+		# Flushed by ingest after the form was loaded
+		frappe.db.set_value('Sensor Gateway', self.gateway.name, {
+			'last_heartbeat': '2026-10-16 12:00:00',
+			'number_of_transmissions': 5,
+			'ip_address': '10.0.0.2'
+		}, update_modified=False)
+
+		self.gateway.location = 'Cold Room'
+		self.gateway.save(ignore_permissions=True)
+
+		stored = frappe.db.get_value('Sensor Gateway', self.gateway.name, ['location', 'last_heartbeat', 'number_of_transmissions', 'ip_address'], as_dict=True)
+		self.assertEqual(stored.location, 'Cold Room')
+		self.assertEqual(str(stored.last_heartbeat), '2026-10-16 12:00:00')
+		self.assertEqual(stored.number_of_transmissions, 5)
+		self.assertEqual(stored.ip_address, '10.0.0.2')
+
+	def test_ingest_save_counts_transmission(self):
+		count = self.gateway.number_of_transmissions or 0
+
+		self.gateway.flags.from_ingest = True
+		self.gateway.save(ignore_permissions=True)
+
+		self.assertEqual(frappe.db.get_value('Sensor Gateway', self.gateway.name, 'number_of_transmissions'), count + 1)
@@ -1,9 +1,33 @@
 # Copyright (c) 2025, dev@cogentmedia.co and contributors
 # For license information, please see license.txt
 
-# import frappe
+import os
+import time
+
+import frappe
 from frappe.model.document import Document
 
+# Idempotency key of a reading: a gateway retry or spool replay carries the same three values
+NATURAL_KEY = ['sensor_id', 'sequence_number', 'timestamp']
+NATURAL_KEY_CONSTRAINT = 'unique_sensor_reading'
+
+CROCKFORD_BASE32 = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+
 
 class SensorRead(Document):
-	pass
+	def autoname(self):
+		self.name = make_reading_name()
+
+
+def make_reading_name(at=None):
+	"""26-character ULID: 48 bits of milliseconds then 80 random bits, so new rows append to the end of the
+	primary key instead of landing on a random page of it. at (a datetime) backdates the time part."""
+	millis = int((at.timestamp() if at else time.time()) * 1000)
+	value = (millis << 80) | int.from_bytes(os.urandom(10), 'big')
+	return ''.join(CROCKFORD_BASE32[(value >> shift) & 31] for shift in range(125, -1, -5))
+
+
+def on_doctype_update():
+	# Existing duplicates are removed first by patches.v1_0.dedup_sensor_reads
+	frappe.db.add_unique('Sensor Read', NATURAL_KEY, constraint_name=NATURAL_KEY_CONSTRAINT)
+	frappe.db.add_index('Sensor Read', ['sensor_id', 'timestamp'])
@@ -1,9 +1,80 @@
 # Copyright (c) 2025, dev@cogentmedia.co and Contributors
 # See license.txt
 
-# import frappe
+import frappe
 from frappe.tests.utils import FrappeTestCase
+from frappe.utils import get_datetime
+
+from cooltrack.ingest import READING_FIELDS, insert_sensor_reads, is_duplicate_reading
+from cooltrack.cool_track.doctype.sensor_read.sensor_read import CROCKFORD_BASE32, make_reading_name
+
+SENSOR_ID = 'TEST-SENSOR-READ'
+
+
+def make_row(sequence_number, temperature=4.2):
+	row = dict.fromkeys(READING_FIELDS)
+	row.update({
+		'sensor_id': SENSOR_ID,
+		'temperature': temperature,
+		'sequence_number': sequence_number,
+		'timestamp': get_datetime('2026-10-16 12:00:00'),
+		'time_corrected': 0
+	})
+	return row
 
 
 class TestSensorRead(FrappeTestCase):
-	pass
+	def setUp(self):
+		frappe.db.delete('Sensor Read', {'sensor_id': SENSOR_ID})
+
+	def get_stored(self):
+		return frappe.get_all(
+			'Sensor Read',
+			filters={'sensor_id': SENSOR_ID},
+			fields=['sequence_number', 'temperature'],
+			order_by='sequence_number'
+		)
+
+	def test_insert_skips_copies_of_stored_readings(self):
+		insert_sensor_reads([make_row(1), make_row(2)])
+		# A retry of 1 with another value, and a new reading, in one statement
+		insert_sensor_reads([make_row(1, temperature=9.9), make_row(3)])
+
+		stored = self.get_stored()
+		self.assertEqual([row.sequence_number for row in stored], [1, 2, 3])
+		self.assertEqual(stored[0].temperature, 4.2)
+
+	def test_stored_reading_is_reported_as_duplicate(self):
+		insert_sensor_reads([make_row(1)])
+
+		self.assertTrue(is_duplicate_reading(SENSOR_ID, '1', get_datetime('2026-10-16 12:00:00')))
+		self.assertFalse(is_duplicate_reading(SENSOR_ID, '2', get_datetime('2026-10-16 12:00:00')))
+		self.assertFalse(is_duplicate_reading(SENSOR_ID, None, get_datetime('2026-10-16 12:00:00')))
+
+	def test_empty_batch_writes_nothing(self):
+		insert_sensor_reads([])
+		self.assertEqual(self.get_stored(), [])
+
+	def test_reading_names_follow_time(self):
+		times = ['2026-10-16 12:00:00', '2026-10-16 12:00:00.001', '2026-10-16 12:00:01', '2027-01-01 00:00:00']
+		names = [make_reading_name(get_datetime(at)) for at in times]
+
+		self.assertEqual(names, sorted(names))
+		for name in names:
+			self.assertEqual(len(name), 26)
+			self.assertTrue(set(name) <= set(CROCKFORD_BASE32))
+
+	def test_reading_names_are_unique_within_a_millisecond(self):
+		at = get_datetime('2026-10-16 12:00:00')
+		names = {make_reading_name(at) for _ in range(1000)}
+
+		self.assertEqual(len(names), 1000)
+		# Same time prefix, random suffix
+		self.assertEqual(len({name[:10] for name in names}), 1)
+
+	def test_inserted_reading_gets_time_ordered_name(self):
+		before = make_reading_name()
+		doc = frappe.get_doc({'doctype': 'Sensor Read', **make_row(1)}).insert(ignore_permissions=True, ignore_links=True)
+
+		self.assertEqual(len(doc.name), 26)
+		self.assertGreaterEqual(doc.name[:10], before[:10])
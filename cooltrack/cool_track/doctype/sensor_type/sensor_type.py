@@ -4,6 +4,9 @@
 # import frappe
 from frappe.model.document import Document
 
+from cooltrack.device_cache import clear_device_meta
+
 
 class SensorType(Document):
-	pass
+	def on_trash(self):
+		clear_device_meta(self.doctype, self.name)
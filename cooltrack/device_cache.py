@@ -0,0 +1,69 @@
+# Copyright (c) 2025, dev@cogentmedia.co and contributors
+# For license information, please see license.txt
+
+import frappe
+
+CACHE_TTL = 3600 # Safety net only; entries are cleared whenever the document changes
+
+GATEWAY_FIELDS = ['name', 'approval_status', 'status', 'location']
+SENSOR_FIELDS = [
+    'name',
+    'sensor_id',
+    'approval_status',
+    'status',
+    'gateway_id',
+    'gateway_location',
+    'calibration_offset',
+    'min_acceptable_temperature',
+    'max_acceptable_temperature',
+    'threshold_exceeded_duration',
+    'alerts_enabled',
+    'alerts_disabled_start',
+    'alerts_disabled_end',
+    'sensor_name',
+    'excursion_started_at',
+    'excursion_last_reading_at',
+    'excursion_peak_temperature',
+    'excursion_last_temperature'
+]
+
+def get_cache_key(doctype, name):
+    return f"cooltrack:device_meta:{doctype.replace(' ', '_').lower()}:{name}"
+
+def get_device_meta(doctype, name, fields):
+    """Ingest fields of a device from Redis, loading them on a miss; None when it does not exist"""
+    key = get_cache_key(doctype, name)
+    meta = frappe.cache().get_value(key)
+
+    if meta is None:
+        meta = frappe.db.get_value(doctype, name, fields, as_dict=True) or {} # Cache misses too; insert clears them
+        frappe.cache().set_value(key, dict(meta), expires_in_sec=CACHE_TTL)
+
+    return frappe._dict(meta) if meta else None
+
+def get_gateway_meta(gateway_id):
+    return get_device_meta('Sensor Gateway', gateway_id, GATEWAY_FIELDS)
+
+def get_sensor_meta(sensor_id):
+    return get_device_meta('Sensor', sensor_id, SENSOR_FIELDS)
+
+def sensor_type_exists(sensor_type):
+    key = get_cache_key('Sensor Type', sensor_type)
+    if frappe.cache().get_value(key):
+        return True
+
+    exists = bool(frappe.db.exists('Sensor Type', sensor_type))
+    if exists:
+        frappe.cache().set_value(key, True, expires_in_sec=CACHE_TTL)
+
+    return exists
+
+def clear_device_meta(doctype, name):
+    """Drop the cached entry now and again once the transaction commits.
+
+    The second delete covers a concurrent ingest that re-read the committed (old) row between the
+    first delete and this transaction's commit.
+    """
+    key = get_cache_key(doctype, name)
+    frappe.cache().delete_value(key)
+    frappe.db.after_commit.add(lambda: frappe.cache().delete_value(key))
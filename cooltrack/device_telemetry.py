@@ -0,0 +1,206 @@
+# Copyright (c) 2025, dev@cogentmedia.co and contributors
+# For license information, please see license.txt
+
+import json
+
+import frappe
+from frappe.utils import get_datetime
+
+# Fields written with the heartbeat; like it, they only move forward (a late reading never overwrites them)
+TELEMETRY_FIELDS = {
+    'Sensor Gateway': ['ip_address'],
+    'Sensor': ['last_temperature']
+}
+FLUSH_BATCH_SIZE = 500
+
+# RedisWrapper pickles values and prefixes keys in its own hash helpers, so the buffer is only touched
+# through these scripts, on keys from get_telemetry_key. Heartbeats are stored as 'YYYY-MM-DD HH:MM:SS[.ffffff]'
+# strings, so plain string comparison orders them.
+
+# KEYS: pending, heartbeat, fields; ARGV: name, heartbeat, fields as JSON
+RECORD_SCRIPT = """
+redis.call('HINCRBY', KEYS[1], ARGV[1], 1)
+local current = redis.call('HGET', KEYS[2], ARGV[1])
+if current and current > ARGV[2] then
+    return 0
+end
+redis.call('HSET', KEYS[2], ARGV[1], ARGV[2])
+redis.call('HSET', KEYS[3], ARGV[1], ARGV[3])
+return 1
+"""
+
+# KEYS: heartbeat, fields, pending, flushing; ARGV: names. Returns [heartbeat, fields, pending, flushing] per name.
+READ_SCRIPT = """
+local result = {}
+for index, name in ipairs(ARGV) do
+    result[index] = {
+        redis.call('HGET', KEYS[1], name),
+        redis.call('HGET', KEYS[2], name),
+        redis.call('HGET', KEYS[3], name),
+        redis.call('HGET', KEYS[4], name)
+    }
+end
+return result
+"""
+
+# KEYS: pending, flushing. Moves the pending counts aside (unless a crashed run left some) and returns them.
+TAKE_SCRIPT = """
+if redis.call('EXISTS', KEYS[2]) == 0 then
+    if redis.call('EXISTS', KEYS[1]) == 0 then
+        return {}
+    end
+    redis.call('RENAME', KEYS[1], KEYS[2])
+end
+return redis.call('HGETALL', KEYS[2])
+"""
+
+# KEYS: pending, flushing; ARGV: '1' to hand the counts back for the next run
+RELEASE_SCRIPT = """
+if ARGV[1] == '1' then
+    local counts = redis.call('HGETALL', KEYS[2])
+    for index = 1, #counts, 2 do
+        redis.call('HINCRBY', KEYS[1], counts[index], counts[index + 1])
+    end
+end
+return redis.call('DEL', KEYS[2])
+"""
+
+# KEYS: heartbeat, fields; ARGV: name
+CLEAR_SCRIPT = """
+redis.call('HDEL', KEYS[1], ARGV[1])
+return redis.call('HDEL', KEYS[2], ARGV[1])
+"""
+
+def keep_stored_telemetry(doc):
+    """Desk saves carry whatever telemetry the form was loaded with; keep the stored values instead"""
+    if doc.is_new():
+        return
+
+    fields = ['last_heartbeat', 'number_of_transmissions', *TELEMETRY_FIELDS[doc.doctype]]
+    stored = frappe.db.get_value(doc.doctype, doc.name, fields, as_dict=True)
+    if stored:
+        doc.update(stored)
+
+def get_telemetry_key(doctype, kind):
+    return frappe.cache().make_key(f"cooltrack:telemetry:{doctype.replace(' ', '_').lower()}:{kind}")
+
+def run_script(script, doctype, kinds, args):
+    return frappe.cache().register_script(script)(
+        keys=[get_telemetry_key(doctype, kind) for kind in kinds],
+        args=args
+    )
+
+def record_transmission(doctype, name, timestamp, **fields):
+    """Count a transmission and advance the live heartbeat in Redis; flush_telemetry writes them to the database"""
+    run_script(
+        RECORD_SCRIPT,
+        doctype,
+        ['pending', 'heartbeat', 'fields'],
+        [name, get_datetime(timestamp).isoformat(sep=' '), json.dumps(fields)]
+    )
+
+def clear_telemetry(doctype, name):
+    run_script(CLEAR_SCRIPT, doctype, ['heartbeat', 'fields'], [name])
+
+def get_live_telemetry(doctype, names):
+    """Buffered heartbeat, fields and not-yet-flushed transmission count per device, for overlaying database rows"""
+    if not names:
+        return {}
+
+    buffered = run_script(READ_SCRIPT, doctype, ['heartbeat', 'fields', 'pending', 'flushing'], list(names))
+
+    live = {}
+    for name, (heartbeat, fields, pending, flushing) in zip(names, buffered):
+        if not heartbeat and not pending and not flushing:
+            continue
+
+        live[name] = frappe._dict(
+            json.loads(fields) if fields else {},
+            last_heartbeat=get_datetime(heartbeat.decode()) if heartbeat else None,
+            pending_transmissions=int(pending or 0) + int(flushing or 0)
+        )
+
+    return live
+
+def apply_live_telemetry(doctype, rows):
+    """Overlay the live values on rows read from the database (dicts with at least name)"""
+    live = get_live_telemetry(doctype, [row['name'] for row in rows])
+
+    for row in rows:
+        telemetry = live.get(row['name'])
+        if not telemetry:
+            continue
+
+        if 'number_of_transmissions' in row:
+            row['number_of_transmissions'] = (row['number_of_transmissions'] or 0) + telemetry.pending_transmissions
+
+        # The full save path writes the database directly, so the cache is not always the newer of the two
+        if telemetry.last_heartbeat and (not row.get('last_heartbeat') or get_datetime(row['last_heartbeat']) <= telemetry.last_heartbeat):
+            row['last_heartbeat'] = telemetry.last_heartbeat
+            for field in TELEMETRY_FIELDS[doctype]:
+                if field in row and field in telemetry:
+                    row[field] = telemetry[field]
+
+    return rows
+
+def flush_telemetry():
+    """Scheduled: write the buffered heartbeats and transmission counts, one multi-row UPDATE per doctype"""
+    for doctype in TELEMETRY_FIELDS:
+        flush_doctype(doctype)
+
+def flush_doctype(doctype):
+    # Readings arriving during the flush count into a fresh pending hash
+    taken = run_script(TAKE_SCRIPT, doctype, ['pending', 'flushing'], [])
+    if not taken:
+        return
+
+    counts = {taken[index].decode(): int(taken[index + 1]) for index in range(0, len(taken), 2)}
+    live = get_live_telemetry(doctype, list(counts))
+
+    rows = []
+    for name, count in counts.items():
+        telemetry = live.get(name)
+        if not telemetry or not telemetry.last_heartbeat:
+            continue
+
+        rows.append([name, telemetry.last_heartbeat, count] + [telemetry.get(field) for field in TELEMETRY_FIELDS[doctype]])
+
+    failed = False
+    try:
+        for start in range(0, len(rows), FLUSH_BATCH_SIZE):
+            write_telemetry(doctype, rows[start:start + FLUSH_BATCH_SIZE])
+
+        frappe.db.commit()
+
+    except Exception:
+        failed = True
+        frappe.db.rollback()
+        frappe.log_error(frappe.get_traceback(), f'flush_telemetry({doctype})')
+
+    run_script(RELEASE_SCRIPT, doctype, ['pending', 'flushing'], ['1' if failed else '0'])
+
+def write_telemetry(doctype, rows):
+    fields = TELEMETRY_FIELDS[doctype]
+    columns = ', '.join(f'%s AS `{field}`' for field in fields)
+    buffered = ' UNION ALL '.join(
+        f'SELECT %s AS name, CAST(%s AS DATETIME(6)) AS last_heartbeat, %s AS transmissions, {columns}'
+        for _ in rows
+    )
+
+    # Multi-table UPDATE does not fix the order of assignments, so the field conditions use <= and hold
+    # whether last_heartbeat has been advanced yet or not
+    assignments = [
+        f'device.`{field}` = CASE WHEN device.last_heartbeat IS NULL OR device.last_heartbeat <= buffered.last_heartbeat '
+        f'THEN buffered.`{field}` ELSE device.`{field}` END'
+        for field in fields
+    ]
+
+    frappe.db.sql(f"""
+        UPDATE `tab{doctype}` AS device
+        JOIN ({buffered}) AS buffered ON buffered.name = device.name
+        SET
+            {', '.join(assignments)},
+            device.last_heartbeat = CASE WHEN device.last_heartbeat IS NULL OR device.last_heartbeat < buffered.last_heartbeat
+                THEN buffered.last_heartbeat ELSE device.last_heartbeat END,
+            device.number_of_transmissions = COALESCE(device.number_of_transmissions, 0) + buffered.transmissions
+    """, [value for row in rows for value in row])
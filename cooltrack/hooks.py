@@ -169,9 +169,13 @@ after_uninstall = "cooltrack.uninstall.after_uninstall"
 # ---------------
 
 scheduler_events = {
-# 	"all": [
-# 		"cooltrack.tasks.all"
-# 	],
+	"cron": {
+		# Every minute; "all" only runs every scheduler_interval (240s by default). Frappe has no sub-minute cron.
+		"* * * * *": [
+			"cooltrack.device_telemetry.flush_telemetry",
+			"cooltrack.ingest_queue.enqueue_drain_jobs"
+		]
+	},
 # 	"daily": [
 # 		"cooltrack.tasks.daily"
 # 	],
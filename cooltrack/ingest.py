@@ -0,0 +1,323 @@
+# Copyright (c) 2025, dev@cogentmedia.co and contributors
+# For license information, please see license.txt
+
+from functools import partial
+
+import frappe
+from frappe.utils import cint, flt, get_datetime, add_to_date, now_datetime
+
+from cooltrack.utils import parse_value, update_excursion_state, check_temperature_threshold_violation
+from cooltrack.device_cache import get_gateway_meta, get_sensor_meta, sensor_type_exists, clear_device_meta
+from cooltrack.device_telemetry import record_transmission
+from cooltrack.cool_track.doctype.sensor_read.sensor_read import make_reading_name
+
+DUPLICATE_RESPONSE = {'message': 'Duplicate reading ignored'}
+READING_FIELDS = [
+    'sensor_id',
+    'sensor_type',
+    'temperature',
+    'humidity',
+    'voltage',
+    'signal_strength',
+    'sensor_rssi',
+    'sequence_number',
+    'gateway_id',
+    'coordinates',
+    'timestamp',
+    'offset',
+    'temperature_before_calibration',
+    'received_at',
+    'time_corrected'
+]
+
+def is_duplicate_reading(sensor_id, sequence_number, timestamp):
+    """Whether this reading is already stored; one lookup on the unique (sensor_id, sequence_number, timestamp) index"""
+    if sequence_number in (None, ''):
+        return False # Without an SN a reading cannot be told apart from a new one
+
+    return bool(frappe.db.exists('Sensor Read', {
+        'sensor_id': sensor_id,
+        'sequence_number': cint(sequence_number),
+        'timestamp': timestamp
+    }))
+
+def is_routine_gateway(gateway):
+    """Known, approved and already Active: nothing in the Sensor Gateway lifecycle has work to do"""
+    return bool(gateway) and gateway.approval_status == 'Approved' and gateway.status == 'Active'
+
+def is_routine_sensor(sensor, current_time):
+    """Like is_routine_gateway, plus no alert window change pending for Sensor.on_update to apply"""
+    if not sensor or sensor.approval_status != 'Approved' or sensor.status != 'Active':
+        return False
+
+    alerts_disabled_start = get_datetime(sensor.alerts_disabled_start) if sensor.alerts_disabled_start else None
+    alerts_disabled_end = get_datetime(sensor.alerts_disabled_end) if sensor.alerts_disabled_end else None
+
+    if alerts_disabled_end and current_time > alerts_disabled_end:
+        return False
+
+    if alerts_disabled_start and alerts_disabled_end:
+        in_window = alerts_disabled_start <= current_time <= alerts_disabled_end
+        return sensor.alerts_enabled == (0 if in_window else 1)
+
+    return True
+
+def touch_gateway(gateway, ip_address, timestamp, transmissions):
+    """Telemetry-only update of a routine gateway: added to transmissions, buffered in Redis once the reading commits"""
+    transmissions.append(('Sensor Gateway', gateway.name, timestamp, {'ip_address': ip_address}))
+
+def touch_sensor(sensor, gateway_id, gateway_location, temperature, timestamp, transmissions):
+    """Telemetry-only update of a routine sensor; only a move to another gateway is written straight away"""
+    if sensor.gateway_id != gateway_id or sensor.gateway_location != gateway_location:
+        frappe.db.set_value('Sensor', sensor.name, {
+            'gateway_id': gateway_id,
+            'gateway_location': gateway_location
+        }, update_modified=False)
+        clear_device_meta('Sensor', sensor.name)
+
+    transmissions.append(('Sensor', sensor.name, timestamp, {'last_temperature': temperature}))
+
+def record_transmissions_after_commit(transmissions):
+    for doctype, name, timestamp, fields in transmissions:
+        frappe.db.after_commit.add(partial(record_transmission, doctype, name, timestamp, **fields))
+
+def save_gateway(gateway, gateway_id, ip_address, timestamp, approval_status):
+    """Full lifecycle for new gateways and approval or status transitions"""
+    if gateway:
+        gateway_doc = frappe.get_doc('Sensor Gateway', gateway.name)
+        gateway_doc.flags.from_ingest = True
+
+        if not gateway_doc.ip_address or gateway_doc.ip_address != ip_address:
+            gateway_doc.ip_address = ip_address
+
+        if not gateway_doc.last_heartbeat or gateway_doc.last_heartbeat < timestamp:
+            gateway_doc.last_heartbeat = timestamp
+
+        gateway_doc.save(ignore_permissions=True)
+
+    else:
+        gateway_doc = frappe.new_doc('Sensor Gateway')
+        gateway_doc.flags.from_ingest = True
+        gateway_doc.gateway_id = gateway_id
+        gateway_doc.approval_status = approval_status
+        gateway_doc.ip_address = ip_address
+        gateway_doc.last_heartbeat = timestamp
+        gateway_doc.insert(ignore_permissions=True)
+
+    return gateway_doc
+
+def save_sensor(sensor, sensor_id, sensor_type_name, gateway_id, gateway_location, temperature, timestamp, approval_status):
+    """Full lifecycle for new sensors, approval or status transitions and alert window changes"""
+    if sensor:
+        sensor_doc = frappe.get_doc('Sensor', sensor.name)
+        sensor_doc.flags.from_ingest = True # ingest_reading runs the excursion check after this reading
+
+        if not sensor_doc.gateway_id or sensor_doc.gateway_id != gateway_id:
+            sensor_doc.gateway_id = gateway_id
+
+        sensor_doc.gateway_location = gateway_location
+
+        # Spooled readings are replayed late; they must not overwrite a newer temperature
+        if not sensor_doc.last_heartbeat or sensor_doc.last_heartbeat <= timestamp:
+            sensor_doc.last_heartbeat = timestamp
+            sensor_doc.last_temperature = temperature
+
+        sensor_doc.save(ignore_permissions=True)
+
+    else:
+        sensor_doc = frappe.new_doc('Sensor')
+        sensor_doc.flags.from_ingest = True
+        sensor_doc.sensor_id = sensor_id
+        sensor_doc.sensor_type = sensor_type_name
+        sensor_doc.gateway_id = gateway_id
+        sensor_doc.gateway_location = gateway_location
+        sensor_doc.approval_status = approval_status
+        sensor_doc.last_temperature = temperature
+        sensor_doc.last_heartbeat = timestamp
+        sensor_doc.insert(ignore_permissions=True)
+
+    return sensor_doc
+
+def ingest_reading(form_data, settings, pending=None):
+    """Store one gateway reading and return (http_status_code, response) for the caller to send.
+
+    Routine telemetry from known, approved, Active devices only counts the transmission and advances
+    the heartbeat in Redis (see cooltrack.device_telemetry); anything else goes through the full
+    document save so the controllers can handle approvals, status changes and notifications.
+
+    Readings are idempotent on (sensor_id, SN, Time): a retry or spool replay of a stored reading is
+    answered 200 without touching anything. The Sensor Read row is written straight away, or appended
+    to pending for the caller to pass to insert_sensor_reads with the rest of its batch. Nothing is
+    committed here: the caller commits once, so the device updates and the Sensor Read row land
+    together (one transaction per reading, or per batch for bulk ingest).
+    """
+    # Registered only once the reading went through: one that raises is rolled back (to its savepoint in
+    # a batch), and its transmission must not be counted at the batch commit either
+    transmissions = []
+    response = process_reading(form_data, settings, pending, transmissions)
+    record_transmissions_after_commit(transmissions)
+
+    return response
+
+def process_reading(form_data, settings, pending, transmissions):
+    ip_address = form_data.get('_client_id')
+    timestamp = get_datetime(form_data.get('Time'))
+
+    gateway_time_offset = settings.gateway_time_offset
+    if gateway_time_offset and gateway_time_offset != 0:
+        timestamp = add_to_date(timestamp, hours=gateway_time_offset)
+
+    gateway_id = form_data.get('GW_ID')
+    sensor_id = form_data.get('ID')
+    sensor_type_name = form_data.get('TYPE')
+    sequence_number = form_data.get('SN')
+    temperature_before_calibration = parse_value(form_data.get('T'))
+
+    if is_duplicate_reading(sensor_id, sequence_number, timestamp):
+        return 200, DUPLICATE_RESPONSE
+
+    gateway_approval_status = settings.default_approval_status if settings.require_gateway_approval else 'Approved'
+    sensor_approval_status = settings.default_approval_status if settings.require_sensor_approval else 'Approved'
+
+    gateway = get_gateway_meta(gateway_id)
+    if is_routine_gateway(gateway):
+        touch_gateway(gateway, ip_address, timestamp, transmissions)
+
+    else:
+        gateway = save_gateway(gateway, gateway_id, ip_address, timestamp, gateway_approval_status)
+
+    if gateway.approval_status != 'Approved':
+        return 403, frappe._dict({'error': 'Gateway not approved'})
+
+    # Ensure Sensor Type exists
+    if sensor_type_name and not sensor_type_exists(sensor_type_name):
+        sensor_type = frappe.new_doc('Sensor Type')
+        sensor_type.name = sensor_type_name
+        sensor_type.type_name = sensor_type_name
+        sensor_type.insert(ignore_permissions=True)
+
+    sensor = get_sensor_meta(sensor_id)
+    if is_routine_sensor(sensor, now_datetime()):
+        touch_sensor(sensor, gateway_id, gateway.location, temperature_before_calibration, timestamp, transmissions)
+
+    else:
+        sensor = save_sensor(
+            sensor,
+            sensor_id,
+            sensor_type_name,
+            gateway_id,
+            gateway.location,
+            temperature_before_calibration,
+            timestamp,
+            sensor_approval_status
+        )
+
+    if sensor.approval_status != 'Approved':
+        return 403, frappe._dict({'error': 'Sensor not approved'})
+
+    # Process Sensor Reading
+    calibration_offset = sensor.calibration_offset
+    temperature = 0
+    if calibration_offset and calibration_offset != 0:
+        temperature = round((temperature_before_calibration + calibration_offset), 2)
+    else:
+        temperature = round((temperature_before_calibration), 2)
+
+    received_at = form_data.get('_received_at')
+    row = {
+        'sensor_id': sensor_id,
+        'sensor_type': sensor_type_name,
+        'temperature': temperature,
+        'humidity': flt(parse_value(form_data.get('H'))),
+        'voltage': flt(parse_value(form_data.get('V'))),
+        'signal_strength': cint(parse_value(form_data.get('RSSI'))),
+        'sensor_rssi': cint(parse_value(form_data.get('T_RSSI'))),
+        'sequence_number': cint(sequence_number),
+        'gateway_id': gateway_id,
+        'coordinates': f"{form_data.get('E')},{form_data.get('N')}" if form_data.get('E') and form_data.get('N') else None,
+        'timestamp': timestamp,
+        'offset': flt(calibration_offset),
+        'temperature_before_calibration': temperature_before_calibration,
+        'received_at': get_datetime(received_at) if received_at else None,
+        'time_corrected': cint(str(form_data.get('_time_corrected')) == 'True')
+    }
+
+    # O(1) per reading; the alert check reads the state, not the stored history
+    if update_excursion_state(sensor, temperature, timestamp) and sensor.excursion_started_at:
+        check_temperature_threshold_violation(sensor)
+
+    if pending is None:
+        insert_sensor_reads([row])
+
+    else:
+        pending.append(row)
+
+    return 200, {'message': 'Data received successfully'}
+
+def insert_sensor_reads(rows):
+    """Store Sensor Read rows with one multi-row INSERT IGNORE, skipping the per-row Document lifecycle.
+
+    Sensor Read has no controller logic, so nothing is lost. Copies of stored readings are dropped by
+    the unique (sensor_id, sequence_number, timestamp) index.
+    """
+    if not rows:
+        return
+
+    current_time = now_datetime()
+    user = frappe.session.user
+
+    frappe.db.bulk_insert(
+        'Sensor Read',
+        ['name', 'creation', 'modified', 'owner', 'modified_by', *READING_FIELDS],
+        [[make_reading_name(), current_time, current_time, user, user, *[row[field] for field in READING_FIELDS]] for row in rows],
+        ignore_duplicates=True
+    )
+
+def get_batch_key(reading):
+    """(sensor_id, SN, Time) as sent, or None for a reading without an SN (never a duplicate)"""
+    if reading.get('SN') in (None, ''):
+        return None
+
+    return (reading.get('ID'), cint(reading.get('SN')), str(reading.get('Time')))
+
+def ingest_batch(readings, settings):
+    """Store a list of readings in one transaction, returning the per-reading index/status results.
+
+    Each reading runs under its own savepoint, so a failing reading is undone on its own and reported
+    as a 500 while the rest of the batch is committed together. The Sensor Read rows of the accepted
+    readings go in with one multi-row insert at the end; until then is_duplicate_reading cannot see them,
+    so repeated copies within the batch are answered as duplicates here.
+    """
+    results = []
+    accepted = 0
+    pending = []
+    seen = set()
+
+    for index, reading in enumerate(readings):
+        key = get_batch_key(reading)
+        if key in seen:
+            accepted += 1
+            results.append({'index': index, 'status': 200, **DUPLICATE_RESPONSE})
+            continue
+
+        frappe.db.savepoint('ingest_reading')
+
+        try:
+            status_code, result = ingest_reading(frappe._dict(reading), settings, pending)
+
+        except Exception as e:
+            frappe.db.rollback(save_point='ingest_reading')
+            frappe.log_error(frappe.get_traceback(), 'ingest_batch()')
+            status_code, result = 500, {'error': str(e)}
+
+        if status_code == 200:
+            accepted += 1
+            if key:
+                seen.add(key) # A copy of a failed reading gets its own attempt
+
+        results.append({'index': index, 'status': status_code, **result})
+
+    insert_sensor_reads(pending)
+    frappe.db.commit()
+
+    return {'received': len(readings), 'accepted': accepted, 'results': results}
@@ -0,0 +1,179 @@
+# Copyright (c) 2025, dev@cogentmedia.co and contributors
+# For license information, please see license.txt
+
+import json
+import time
+
+import frappe
+from frappe.utils import get_datetime
+from frappe.utils.background_jobs import get_queue, get_queues_timeout
+
+from cooltrack.utils import get_settings
+from cooltrack.ingest import ingest_batch
+
+# Dedicated RQ queue, so ingest workers scale apart from web workers and other jobs. Declare it in
+# common_site_config.json ("workers": {"cooltrack_ingest": {"timeout": 600}}) and run
+# `bench worker --queue cooltrack_ingest` as many times as needed; until then the long queue is used.
+INGEST_QUEUE = 'cooltrack_ingest'
+MICRO_BATCH_SIZE = 200
+REQUIRED_FIELDS = ('GW_ID', 'ID', 'T', 'Time')
+
+# Readings a drain job has taken stay in its slot's processing list until their batch is committed.
+# The lease, refreshed on every take, tells a live job from one killed mid-batch (timeout, OOM, restart),
+# whose processing list is then put back at the head of the queue.
+LEASE_SECONDS = 300 # Far above the time one micro-batch takes
+
+# RedisWrapper's list helpers prefix keys themselves and push one value at a time, so the queue is
+# only touched through these scripts, on the keys from get_queue_key and get_slot_keys
+
+# KEYS: queued readings; ARGV: readings. Returns the queue length.
+PUSH_SCRIPT = """
+return redis.call('RPUSH', KEYS[1], unpack(ARGV))
+"""
+
+# KEYS: queued readings, processing list, lease; ARGV: count, lease seconds.
+# Moves up to count readings from the head to the processing list in one step and renews the lease.
+TAKE_SCRIPT = """
+local readings = redis.call('LRANGE', KEYS[1], 0, tonumber(ARGV[1]) - 1)
+if #readings > 0 then
+    redis.call('LTRIM', KEYS[1], #readings, -1)
+    redis.call('RPUSH', KEYS[2], unpack(readings))
+end
+redis.call('SET', KEYS[3], 1, 'EX', tonumber(ARGV[2]))
+return readings
+"""
+
+# KEYS: queued readings, processing list, lease. The batch is committed; forget it.
+ACK_SCRIPT = """
+return redis.call('DEL', KEYS[2])
+"""
+
+# KEYS: queued readings, processing list, lease; ARGV: '1' to ignore the lease.
+# Puts the processing list back at the head of the queue in its order, unless its lease is still live.
+# Returns the number of readings put back.
+RECLAIM_SCRIPT = """
+if ARGV[1] ~= '1' and redis.call('EXISTS', KEYS[3]) == 1 then
+    return 0
+end
+local readings = redis.call('LRANGE', KEYS[2], 0, -1)
+for index = #readings, 1, -1 do
+    redis.call('LPUSH', KEYS[1], readings[index])
+end
+redis.call('DEL', KEYS[2], KEYS[3])
+return #readings
+"""
+
+# KEYS: queued readings. Returns the queue length and the oldest reading.
+PEEK_SCRIPT = """
+return {redis.call('LLEN', KEYS[1]), redis.call('LINDEX', KEYS[1], 0)}
+"""
+
+def get_queue_key():
+    return frappe.cache().make_key('cooltrack:ingest_queue')
+
+def get_slot_keys(slot):
+    """Processing list and lease of a drain job slot"""
+    return [
+        frappe.cache().make_key(f'cooltrack:ingest_queue:processing:{slot}'),
+        frappe.cache().make_key(f'cooltrack:ingest_queue:lease:{slot}')
+    ]
+
+def run_script(script, args=(), slot=None):
+    keys = [get_queue_key()] if slot is None else [get_queue_key(), *get_slot_keys(slot)]
+    return frappe.cache().register_script(script)(keys=keys, args=list(args))
+
+def get_ingest_queue():
+    return INGEST_QUEUE if INGEST_QUEUE in get_queues_timeout() else 'long'
+
+def get_drain_jobs():
+    """Drain jobs kept in flight at most; match it to the number of ingest workers"""
+    return max(1, frappe.conf.get('cooltrack_ingest_jobs') or 4)
+
+def validate_reading(reading):
+    """Error message for a reading ingest_reading could never store, else None"""
+    missing = [field for field in REQUIRED_FIELDS if reading.get(field) in (None, '')]
+    if missing:
+        return f'Missing {", ".join(missing)}'
+
+    try:
+        get_datetime(reading.get('Time'))
+
+    except Exception:
+        return f'Invalid Time {reading.get("Time")}'
+
+    return None
+
+def queue_readings(readings):
+    """Append readings to the ingest queue and make sure drain jobs are running for them"""
+    queued_at = time.time()
+    depth = run_script(
+        PUSH_SCRIPT,
+        [json.dumps({'reading': reading, 'queued_at': queued_at}, default=str) for reading in readings]
+    )
+    enqueue_drain_jobs(depth)
+
+def enqueue_drain_jobs(depth=None):
+    """One drain job per MICRO_BATCH_SIZE queued readings, up to get_drain_jobs(); also run by the scheduler
+    to pick up readings queued while the last drain job was finishing, and readings left in the processing
+    list of a drain job that died"""
+    if depth is None:
+        for slot in range(get_drain_jobs()):
+            run_script(RECLAIM_SCRIPT, ['0'], slot=slot)
+
+        depth, _oldest = run_script(PEEK_SCRIPT)
+
+    if not depth:
+        return
+
+    jobs = min(get_drain_jobs(), -(-depth // MICRO_BATCH_SIZE))
+    for slot in range(jobs):
+        # A slot already queued or running is skipped, which caps the jobs in flight
+        frappe.enqueue(
+            'cooltrack.ingest_queue.drain_queued_readings',
+            queue=get_ingest_queue(),
+            job_id=f'cooltrack_ingest_drain_{slot}',
+            deduplicate=True,
+            slot=slot
+        )
+
+def drain_queued_readings(slot=0):
+    """Background job: store queued readings in micro-batches until the queue is empty.
+
+    Readings leave Redis only once their batch is committed. A job killed mid-batch leaves them in its
+    processing list, which the next job of its slot (the only one that can own it) or, once the lease has
+    expired, enqueue_drain_jobs puts back; ingest is idempotent, so a batch committed just before the
+    kill is answered as duplicates the second time.
+    """
+    run_script(RECLAIM_SCRIPT, ['1'], slot=slot)
+
+    while True:
+        entries = run_script(TAKE_SCRIPT, [MICRO_BATCH_SIZE, LEASE_SECONDS], slot=slot)
+        if not entries:
+            break
+
+        readings = [json.loads(entry)['reading'] for entry in entries]
+
+        try:
+            ingest_batch(readings, get_settings())
+
+        except Exception:
+            # Put the batch back at the head for the next drain job rather than losing it
+            run_script(RECLAIM_SCRIPT, ['1'], slot=slot)
+            raise
+
+        run_script(ACK_SCRIPT, slot=slot)
+
+def get_ingest_queue_stats():
+    """Queued readings, age of the oldest one and the RQ jobs working on them"""
+    depth, oldest = run_script(PEEK_SCRIPT)
+    queue = get_queue(get_ingest_queue())
+
+    return {
+        'queue': queue.name,
+        'queued_readings': depth,
+        'lag_seconds': round(time.time() - json.loads(oldest)['queued_at'], 1) if oldest else 0.0,
+        'queued_jobs': queue.count,
+        'started_jobs': queue.started_job_registry.count,
+        'failed_jobs': queue.failed_job_registry.count,
+        'max_drain_jobs': get_drain_jobs()
+    }
@@ -0,0 +1,77 @@
+import frappe
+
+from cooltrack.cool_track.doctype.sensor_read.sensor_read import NATURAL_KEY, NATURAL_KEY_CONSTRAINT
+
+HELPER_INDEX = 'sensor_read_natural_key_lookup'
+CHUNK_SIZE = 1000
+ADD_UNIQUE_ATTEMPTS = 5
+
+def execute():
+    """Delete duplicate Sensor Reads (same sensor_id, sequence_number and timestamp), keeping the first
+    one stored, then build the unique index on those columns.
+
+    Works one sensor at a time and commits every CHUNK_SIZE deletes, so it never holds long locks and
+    an interrupted run simply resumes: sensors already cleaned have no duplicates left to find.
+    """
+    if not frappe.db.table_exists('Sensor Read') or has_index(NATURAL_KEY_CONSTRAINT):
+        return
+
+    # Plain secondary index, built online by InnoDB; makes every lookup below an index range scan
+    frappe.db.add_index('Sensor Read', NATURAL_KEY, HELPER_INDEX)
+
+    add_unique_index()
+    frappe.db.sql_ddl(f'ALTER TABLE `tabSensor Read` DROP INDEX `{HELPER_INDEX}`')
+
+def add_unique_index():
+    """Ingest keeps running while the patch does, so a duplicate can land between the clean-up and the
+    index build, which then fails. Clean up again right before every attempt; with the helper index the
+    second pass only costs one lookup per sensor.
+    """
+    for attempt in range(ADD_UNIQUE_ATTEMPTS):
+        delete_all_duplicates()
+
+        try:
+            frappe.db.add_unique('Sensor Read', NATURAL_KEY, constraint_name=NATURAL_KEY_CONSTRAINT)
+            return
+
+        except Exception as e:
+            if not frappe.db.is_duplicate_entry(e) or attempt == ADD_UNIQUE_ATTEMPTS - 1:
+                raise
+
+            frappe.db.rollback()
+
+def delete_all_duplicates():
+    sensor_ids = frappe.db.sql_list('SELECT DISTINCT sensor_id FROM `tabSensor Read` WHERE sensor_id IS NOT NULL')
+    for sensor_id in sensor_ids:
+        delete_duplicates(sensor_id)
+
+def has_index(index_name):
+    return bool(frappe.db.sql('SHOW INDEX FROM `tabSensor Read` WHERE Key_name = %s', index_name))
+
+def delete_duplicates(sensor_id):
+    has_duplicates = frappe.db.sql("""
+        SELECT 1
+        FROM `tabSensor Read`
+        WHERE sensor_id = %s AND sequence_number IS NOT NULL AND timestamp IS NOT NULL
+        GROUP BY sequence_number, timestamp
+        HAVING COUNT(*) > 1
+        LIMIT 1
+    """, sensor_id)
+    if not has_duplicates:
+        return
+
+    # NULLs never collide in a unique index, so only fully keyed rows need removing
+    names = frappe.db.sql_list("""
+        SELECT DISTINCT newer.name
+        FROM `tabSensor Read` newer
+        JOIN `tabSensor Read` older
+            ON older.sensor_id = newer.sensor_id
+            AND older.sequence_number = newer.sequence_number
+            AND older.timestamp = newer.timestamp
+            AND (older.creation < newer.creation OR (older.creation = newer.creation AND older.name < newer.name))
+        WHERE newer.sensor_id = %s
+    """, sensor_id)
+
+    for start in range(0, len(names), CHUNK_SIZE):
+        frappe.db.delete('Sensor Read', {'name': ['in', names[start:start + CHUNK_SIZE]]})
+        frappe.db.commit()
@@ -0,0 +1,45 @@
+import frappe
+
+def execute():
+    """Open the excursion state for sensors that are above their limit right now, from their stored readings.
+
+    From here on the state is advanced reading by reading; this one-off pass finds where each running
+    excursion began: just after the newest reading at or below the limit, however far back that is.
+    """
+    sensors = frappe.get_all('Sensor', fields=['name', 'max_acceptable_temperature'], filters={'status': 'Active'})
+
+    for sensor in sensors:
+        if sensor.max_acceptable_temperature == None:
+            continue
+
+        # Newest in-range reading: a backward scan of the (sensor_id, timestamp) index that stops at the first hit
+        last_in_range = frappe.db.sql("""
+            SELECT timestamp
+            FROM `tabSensor Read`
+            WHERE sensor_id = %s AND temperature <= %s
+            ORDER BY timestamp DESC
+            LIMIT 1
+        """, (sensor.name, sensor.max_acceptable_temperature))
+        since = last_in_range[0][0] if last_in_range else None
+
+        started_at, last_reading_at, peak = frappe.db.sql(f"""
+            SELECT MIN(timestamp), MAX(timestamp), MAX(temperature)
+            FROM `tabSensor Read`
+            WHERE sensor_id = %(sensor)s {'AND timestamp > %(since)s' if since else ''}
+        """, {'sensor': sensor.name, 'since': since})[0]
+        if not started_at:
+            continue # Newest reading is in range: no excursion running
+
+        last_temperature = frappe.db.get_value('Sensor Read', {'sensor_id': sensor.name, 'timestamp': last_reading_at}, 'temperature')
+
+        frappe.db.set_value('Sensor', sensor.name, {
+            'excursion_started_at': started_at,
+            'excursion_last_reading_at': last_reading_at,
+            'excursion_peak_temperature': peak,
+            'excursion_last_temperature': last_temperature
+        }, update_modified=False)
+
+    frappe.db.commit()
+
+    # Cached sensor entries predate the excursion fields
+    frappe.cache().delete_keys('cooltrack:device_meta:sensor:')
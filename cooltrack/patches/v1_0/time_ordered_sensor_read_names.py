@@ -0,0 +1,122 @@
+import time
+
+import frappe
+from frappe.utils import random_string
+
+from cooltrack.cool_track.doctype.sensor_read.sensor_read import make_reading_name
+
+CHUNK_SIZE = 1000
+RUN_SECONDS = 20 * 60
+CURSOR_KEY = 'cooltrack_sensor_read_naming_cursor'
+JOB_ID = 'cooltrack_rename_legacy_sensor_reads'
+# A job cannot re-enqueue its own (still running) job id, so the chain alternates between two fixed ids
+CONTINUATION_JOB_IDS = {JOB_ID: f'{JOB_ID}_continued', f'{JOB_ID}_continued': JOB_ID}
+LOCK_KEY = 'cooltrack:rename_legacy_sensor_reads'
+LOCK_SECONDS = RUN_SECONDS + 10 * 60
+
+# KEYS: lock; ARGV: chain token, seconds. Takes the lock if free or renews it for its own chain; 1 when held.
+CLAIM_SCRIPT = """
+local holder = redis.call('GET', KEYS[1])
+if holder and holder ~= ARGV[1] then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', tonumber(ARGV[2]))
+return 1
+"""
+
+# KEYS: lock; ARGV: chain token
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+def execute():
+    """New Sensor Reads are named by SensorRead.autoname; hand the existing hash-named rows to a background job.
+
+    Renaming tens of millions of primary keys would hold up the migrate, so the job works in chunks,
+    re-enqueues itself, and can be stopped and resumed at any time. Only one chain of jobs runs: a run
+    of this patch while one is active (or queued) adds nothing. Nothing links to Sensor Read, so only
+    the rows themselves change.
+    """
+    if not frappe.db.table_exists('Sensor Read'):
+        return
+
+    enqueue_rename(JOB_ID, enqueue_after_commit=True)
+
+def enqueue_rename(job_id, token=None, **kwargs):
+    frappe.enqueue(
+        'cooltrack.patches.v1_0.time_ordered_sensor_read_names.rename_legacy_reads',
+        queue='long',
+        job_id=job_id,
+        deduplicate=True,
+        token=token,
+        current_job_id=job_id,
+        **kwargs
+    )
+
+def run_lock_script(script, token):
+    return frappe.cache().register_script(script)(keys=[frappe.cache().make_key(LOCK_KEY)], args=[token, LOCK_SECONDS])
+
+def rename_legacy_reads(token=None, current_job_id=JOB_ID):
+    """Give hash-named rows a time-ordered name from their creation time.
+
+    token identifies the chain; a job that finds another chain holding the lock stops without doing
+    anything, so a patch re-run or a migrate during a renaming chain never starts a second one.
+    """
+    token = token or random_string(16)
+    if not run_lock_script(CLAIM_SCRIPT, token):
+        return
+
+    started_at = time.monotonic()
+    last_name = frappe.db.get_global(CURSOR_KEY) or ''
+
+    while time.monotonic() - started_at < RUN_SECONDS:
+        rows = frappe.db.sql("""
+            SELECT name, creation
+            FROM `tabSensor Read`
+            WHERE name > %s
+            ORDER BY name
+            LIMIT %s
+        """, (last_name, CHUNK_SIZE), as_dict=True)
+
+        if not rows:
+            frappe.db.set_global(CURSOR_KEY, None)
+            frappe.db.commit()
+            run_lock_script(RELEASE_SCRIPT, token)
+
+            if frappe.conf.get('cooltrack_rebuild_sensor_reads'):
+                rebuild_table()
+
+            return
+
+        last_name = rows[-1].name
+        legacy = [row for row in rows if len(row.name) != 26] # Skips rows already named by make_reading_name
+        if legacy:
+            renames = {row.name: make_reading_name(row.creation) for row in legacy}
+            frappe.db.sql(f"""
+                UPDATE `tabSensor Read`
+                SET name = CASE name {' '.join(['WHEN %s THEN %s'] * len(renames))} END
+                WHERE name IN ({', '.join(['%s'] * len(renames))})
+            """, [value for pair in renames.items() for value in pair] + list(renames))
+
+        frappe.db.set_global(CURSOR_KEY, last_name)
+        frappe.db.commit()
+
+        if not run_lock_script(CLAIM_SCRIPT, token):
+            return # The lock expired and another chain took over
+
+    # Continue in a fresh job of the same chain; this one still holds its job id until it returns
+    enqueue_rename(CONTINUATION_JOB_IDS.get(current_job_id, JOB_ID), token=token)
+
+def rebuild_table():
+    """Rewrite the clustered index in key order to reclaim the half-empty pages left by the renames.
+
+    Opt-in (cooltrack_rebuild_sensor_reads in site_config.json): it is online (LOCK=NONE), but it copies
+    the whole table, so it needs free disk about the size of the table, keeps the disks busy for a long
+    time on tens of millions of rows and makes replicas lag. Without it, the space is reused as new rows
+    arrive. To run it later in a quiet window instead:
+        bench --site <site> execute cooltrack.patches.v1_0.time_ordered_sensor_read_names.rebuild_table
+    """
+    frappe.db.sql_ddl('ALTER TABLE `tabSensor Read` FORCE, ALGORITHM=INPLACE, LOCK=NONE')
@@ -0,0 +1,191 @@
+import re
+
+import frappe
+from frappe.database.schema import get_definition
+from frappe.utils import cint
+
+CHUNK_SIZE = 5000
+CURSOR_KEY = 'cooltrack_sensor_read_typing_cursor'
+
+TABLE = 'tabSensor Read'
+NEW_TABLE = '_tabSensor Read_typed'
+OLD_TABLE = '_tabSensor Read_untyped'
+
+# Keep the copy in step with writes to the live table while it is made
+TRIGGERS = {
+    'cooltrack_sensor_read_typing_ins': 'AFTER INSERT',
+    'cooltrack_sensor_read_typing_upd': 'AFTER UPDATE',
+    'cooltrack_sensor_read_typing_del': 'AFTER DELETE'
+}
+
+NUMBER = r"CASE WHEN TRIM({0}) REGEXP '^-?[0-9]+(\\.[0-9]+)?$' THEN CAST(TRIM({0}) AS DECIMAL(21,9)) ELSE 0 END"
+INTEGER = r"CASE WHEN TRIM({0}) REGEXP '^-?[0-9]+$' THEN CAST(TRIM({0}) AS SIGNED) ELSE 0 END"
+DATETIME = (
+    r"CASE WHEN TRIM({0}) REGEXP '^[0-9]{{4}}-[0-9]{{2}}-[0-9]{{2}}[ T][0-9]{{2}}:[0-9]{{2}}:[0-9]{{2}}(\\.[0-9]+)?$' "
+    r"THEN CAST(REPLACE(TRIM({0}), 'T', ' ') AS DATETIME(6)) END"
+)
+CHECK = "CASE WHEN TRIM({0}) IN ('1', 'True', 'true') THEN 1 ELSE 0 END"
+
+# Column, new fieldtype and the expression converting the old varchar value
+CONVERSIONS = [
+    ('temperature', 'Float', NUMBER),
+    ('humidity', 'Float', NUMBER),
+    ('voltage', 'Float', NUMBER),
+    ('signal_strength', 'Int', INTEGER),
+    ('sensor_rssi', 'Int', INTEGER),
+    ('sequence_number', 'Int', INTEGER),
+    ('timestamp', 'Datetime', DATETIME),
+    ('received_at', 'Datetime', DATETIME),
+    ('time_corrected', 'Check', CHECK)
+]
+
+def execute():
+    """Convert the varchar Sensor Read columns to their real types without a long table lock.
+
+    Letting the model sync MODIFY the columns would copy the whole table under a write lock. Instead,
+    a typed copy of the table is created empty, kept in step with live writes by triggers, filled in
+    primary key chunks committed one by one, and swapped in with a single atomic RENAME TABLE. The
+    cursor is kept in the defaults table, so an interrupted run resumes where it stopped. The columns
+    then already match the doctype, and the sync leaves them alone.
+    """
+    if not frappe.db.table_exists('Sensor Read'):
+        return
+
+    if not needs_conversion():
+        # A run interrupted right after the swap leaves the old table behind
+        drop_old_table()
+        return
+
+    check_trigger_privilege()
+    create_typed_table()
+    create_triggers()
+    backfill()
+    swap_tables()
+
+def needs_conversion():
+    # column_type carries the length, e.g. varchar(140)
+    return (frappe.db.get_column_type('Sensor Read', 'temperature') or '').startswith('varchar')
+
+def check_trigger_privilege():
+    """Fail before touching anything when the triggers could not be created.
+
+    With binary logging on, MariaDB only lets a user holding SUPER create triggers, unless
+    log_bin_trust_function_creators is set. Site database users normally have neither.
+    """
+    log_bin, trust_creators = frappe.db.sql('SELECT @@log_bin, @@log_bin_trust_function_creators')[0]
+    if not cint(log_bin) or cint(trust_creators):
+        return
+
+    if any(is_global_super_grant(grant) for grant in frappe.db.sql_list('SHOW GRANTS')):
+        return
+
+    frappe.throw(
+        'Converting the Sensor Read columns online needs triggers, which this database user may not create '
+        'while binary logging is on. Set log_bin_trust_function_creators = 1 on the database server (or grant '
+        'the user SUPER) and run the migration again.',
+        title='Missing Database Privilege'
+    )
+
+def is_global_super_grant(grant):
+    match = re.match(r'GRANT (.+?) ON \*\.\* TO ', grant)
+    if not match:
+        return False
+
+    privileges = {privilege.strip() for privilege in match.group(1).split(',')}
+    return 'ALL PRIVILEGES' in privileges or 'SUPER' in privileges
+
+def get_column_definition(fieldtype):
+    # Same definitions the model sync would create, so it finds nothing to change afterwards
+    definition = get_definition(fieldtype)
+    if fieldtype in ('Float', 'Int', 'Check'):
+        definition += ' not null default 0'
+
+    return definition
+
+def get_columns():
+    return frappe.db.sql_list("""
+        SELECT column_name
+        FROM information_schema.columns
+        WHERE table_schema = DATABASE() AND table_name = %s
+        ORDER BY ordinal_position
+    """, TABLE)
+
+def get_values(prefix):
+    """Select list turning a row of the live table (columns, or NEW. in a trigger) into a typed row"""
+    expressions = {column: expression for column, _fieldtype, expression in CONVERSIONS}
+    return ', '.join(
+        expressions[column].format(f'{prefix}`{column}`') if column in expressions else f'{prefix}`{column}`'
+        for column in get_columns()
+    )
+
+def table_exists(table):
+    return bool(frappe.db.sql(
+        'SELECT 1 FROM information_schema.tables WHERE table_schema = DATABASE() AND table_name = %s',
+        table
+    ))
+
+def create_typed_table():
+    if table_exists(NEW_TABLE):
+        return
+
+    # Indexes are built while the table is empty: the unique natural key carried over by LIKE, now on the
+    # typed columns, and the (sensor_id, timestamp) index on_doctype_update would otherwise add later
+    modifies = ', '.join(
+        f'MODIFY COLUMN `{column}` {get_column_definition(fieldtype)}' for column, fieldtype, _expression in CONVERSIONS
+    )
+    frappe.db.sql_ddl(f'CREATE TABLE `{NEW_TABLE}` LIKE `{TABLE}`')
+    frappe.db.sql_ddl(f'ALTER TABLE `{NEW_TABLE}` {modifies}, ADD INDEX `sensor_id_timestamp_index` (`sensor_id`, `timestamp`)')
+
+def create_triggers():
+    columns = ', '.join(f'`{column}`' for column in get_columns())
+    # Rows are only ever removed by name. An update deletes the old copy of the row before inserting
+    # the new one, so IGNORE can only skip a row whose typed natural key collides with a different row
+    # (values that only differed as text, '7' and '07'); like the backfill, the row stored first is kept.
+    insert = f'INSERT IGNORE INTO `{NEW_TABLE}` ({columns}) SELECT {get_values("NEW.")}'
+    delete = f'DELETE FROM `{NEW_TABLE}` WHERE name = OLD.name'
+    bodies = {
+        'AFTER INSERT': insert,
+        'AFTER UPDATE': f'BEGIN {delete}; {insert}; END',
+        'AFTER DELETE': delete
+    }
+
+    for trigger, event in TRIGGERS.items():
+        frappe.db.sql_ddl(f'CREATE TRIGGER IF NOT EXISTS `{trigger}` {event} ON `{TABLE}` FOR EACH ROW {bodies[event]}')
+
+def backfill():
+    columns = ', '.join(f'`{column}`' for column in get_columns())
+    values = get_values('')
+    last_name = frappe.db.get_global(CURSOR_KEY) or ''
+
+    while True:
+        names = frappe.db.sql_list(
+            f'SELECT name FROM `{TABLE}` WHERE name > %s ORDER BY name LIMIT %s',
+            (last_name, CHUNK_SIZE)
+        )
+        if not names:
+            break
+
+        # IGNORE: rows the triggers already copied are newer, and natural key collisions keep the first
+        frappe.db.sql(f"""
+            INSERT IGNORE INTO `{NEW_TABLE}` ({columns})
+            SELECT {values} FROM `{TABLE}` WHERE name > %s AND name <= %s
+        """, (last_name, names[-1]))
+        last_name = names[-1]
+
+        frappe.db.set_global(CURSOR_KEY, last_name)
+        frappe.db.commit()
+
+def swap_tables():
+    # Atomic: writers wait on the metadata lock for an instant and then hit the typed table, so no row
+    # lands between the copy and the swap. The triggers travel with the old table and go with it.
+    frappe.db.sql_ddl(f'RENAME TABLE `{TABLE}` TO `{OLD_TABLE}`, `{NEW_TABLE}` TO `{TABLE}`')
+    drop_old_table()
+
+def drop_old_table():
+    for trigger in TRIGGERS:
+        frappe.db.sql_ddl(f'DROP TRIGGER IF EXISTS `{trigger}`')
+
+    frappe.db.sql_ddl(f'DROP TABLE IF EXISTS `{OLD_TABLE}`')
+
+    frappe.db.set_global(CURSOR_KEY, None)
+    frappe.db.commit()
@@ -0,0 +1,232 @@
+import time
+import asyncio
+import logging
+from typing import Optional, Dict, Any, Union, List, Tuple
+
+try:
+    import httpx
+
+except ImportError:
+    # In requirements.txt, but optional: only the asyncio engine uses it, for its settings loads. Without it
+    # that engine loads settings with the blocking FrappeClient on an executor thread instead.
+    httpx = None
+
+from .circuit_breaker import CircuitBreaker
+from .frappe_client import BaseFrappeClient, FrappeUnavailableError
+
+class AsyncFrappeClient(BaseFrappeClient):
+    """Coroutine counterpart of FrappeClient on a pooled httpx.AsyncClient; use from one event loop.
+
+    The asyncio engine only loads settings with it. Readings are still forwarded by the ForwardQueue
+    worker threads through the blocking FrappeClient, which shares this client's circuit breaker.
+    """
+
+    def __init__(
+        self,
+        logger: logging.Logger,
+        base_domain: Optional[str] = None,
+        circuit: Optional[CircuitBreaker] = None
+    ) -> None:
+        if httpx is None:
+            raise RuntimeError('AsyncFrappeClient requires httpx (pip install httpx)')
+
+        super().__init__(logger, base_domain, circuit)
+
+        self.client: 'httpx.AsyncClient' = httpx.AsyncClient(
+            headers=self.headers,
+            timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
+            limits=httpx.Limits(
+                max_connections=self.pool_size,
+                max_keepalive_connections=self.pool_size,
+                keepalive_expiry=self.keepalive_expiry
+            )
+        )
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        timeout: Optional[float] = None,
+        retries: Optional[int] = None,
+        **kwargs: Any
+    ) -> 'httpx.Response':
+        """Send one request with retries; raises FrappeUnavailableError while the circuit is open"""
+        retries = self.max_retries if retries is None else retries
+        if timeout:
+            kwargs['timeout'] = httpx.Timeout(timeout, connect=self.connect_timeout)
+
+        for attempt in range(retries + 1):
+            self.check_circuit(url)
+
+            try:
+                response: httpx.Response = await self.client.request(method, url, **kwargs)
+
+            except httpx.TransportError as e:
+                self.circuit.record_failure()
+                if attempt >= retries:
+                    raise
+
+                self.logger.warning(f'{method} {url} failed (attempt {attempt + 1}): {e}')
+
+            except BaseException:
+                # Not an outage (redirect loop, invalid URL, undecodable body, cancellation): no verdict,
+                # but a half-open probe must not stay in flight or the circuit never closes again
+                self.circuit.release_probe()
+                raise
+
+            else:
+                if response.status_code >= 500 and response.status_code not in self.RETRY_STATUSES:
+                    # The site answered with an error for this request (a traceback for one payload): it is
+                    # up, so the breaker gets no verdict and other callers keep going
+                    self.circuit.release_probe()
+                    return response
+
+                if response.status_code not in self.RETRY_STATUSES:
+                    self.circuit.record_success()
+                    return response
+
+                self.circuit.record_failure()
+                if attempt >= retries:
+                    return response
+
+                self.logger.warning(f'{method} {url} returned {response.status_code} (attempt {attempt + 1})')
+
+            await asyncio.sleep(self.backoff_delay(attempt))
+
+        raise httpx.TransportError(f'No attempts made for {url}') # Only reached with negative retries
+
+    async def get_api_url_from_server(self, force_refresh: bool = False) -> Optional[str]:
+        current_time: float = time.time()
+
+        if not force_refresh and self.has_fresh_api_url(current_time):
+            return self.cached_api_url
+
+        try:
+            settings_url: str = self.get_settings_url()
+            response: httpx.Response = await self.request('GET', settings_url)
+
+            if response.status_code == 200:
+                return self.cache_api_url(response.json(), current_time)
+
+            else:
+                self.logger.error(f'Failed to get API URL: {response.status_code} - {response.text}')
+
+        except (httpx.HTTPError, FrappeUnavailableError, ValueError) as e:
+            self.logger.error(f'Failed to get API URL: {e}')
+
+        return None
+
+    async def get_gateway_settings(self, modified: Optional[str] = None) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        """Conditional fetch of Cool Track Settings: (False, None) when unchanged since modified, else (True, payload)"""
+        url: str = f'{self.base_domain}/api/method/cooltrack.api.v1.get_gateway_settings'
+        response: httpx.Response = await self.request('GET', url, params={'modified': modified} if modified else None)
+
+        if response.status_code == 304:
+            return False, None
+
+        if response.status_code != 200:
+            raise httpx.HTTPStatusError(
+                f'Failed to get gateway settings: {response.status_code} - {response.text}',
+                request=response.request,
+                response=response
+            )
+
+        return True, response.json().get('message') or {}
+
+    async def forward_sensor_data(self, sensor_data: Dict[str, Any], retries: Optional[int] = None) -> bool:
+        if not self.api_key or not self.api_secret:
+            self.logger.error('API credentials not set. Cannot forward sensor data.')
+            return False
+
+        try:
+            response = await self.request('POST', self.cached_api_url, json=sensor_data, retries=retries)
+
+            if response.status_code in (200, 202): # 202 when the site queues ingest
+                self.logger.info(f'Sensor data successfully sent to {self.cached_api_url}')
+                return True
+
+            else:
+                self.logger.error(
+                    f'Failed to send sensor data to {self.cached_api_url}: '
+                    f'{response.status_code} - {response.text}'
+                )
+                return False
+
+        except (httpx.HTTPError, FrappeUnavailableError) as e:
+            self.logger.error(f'Error forwarding sensor data to {self.cached_api_url}: {e}')
+            return False
+
+    async def forward_sensor_data_batch(
+        self,
+        readings: List[Dict[str, Any]],
+        retries: Optional[int] = None
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Send readings as one request; returns the per-reading results or None if the request failed"""
+        if not self.api_key or not self.api_secret:
+            self.logger.error('API credentials not set. Cannot forward sensor data.')
+            return None
+
+        batch_url: str = self.get_batch_api_url()
+
+        try:
+            response = await self.request('POST', batch_url, json={'readings': readings}, timeout=30, retries=retries)
+
+            if response.status_code in (200, 202):
+                results: List[Dict[str, Any]] = response.json().get('message', {}).get('results', [])
+                self.logger.info(f'Batch of {len(readings)} readings sent to {batch_url}')
+                return results
+
+            else:
+                self.logger.error(
+                    f'Failed to send batch of {len(readings)} readings to {batch_url}: '
+                    f'{response.status_code} - {response.text}'
+                )
+                return None
+
+        except (httpx.HTTPError, FrappeUnavailableError, ValueError) as e:
+            self.logger.error(f'Error forwarding batch to {batch_url}: {e}')
+            return None
+
+    async def get_logged_user(self, auth_header: Optional[str] = None, session_cookie: Optional[str] = None) -> Optional[str]:
+        url: str = f'{self.base_domain}/api/method/frappe.auth.get_logged_user'
+        headers: Dict[str, str] = {}
+        cookies: Dict[str, str] = {}
+
+        if auth_header:
+            headers['Authorization'] = auth_header
+        if session_cookie:
+            cookies['sid'] = session_cookie
+
+        response: httpx.Response = await self.request('GET', url, headers=headers, cookies=cookies)
+        if response.status_code == 200:
+            return response.json().get('message')
+        return None
+
+    async def get_single_doc(self, doctype: str) -> Optional[Union[Dict[str, Any], list]]:
+        response: httpx.Response = await self.request('GET', self.get_resource_url(doctype, doctype))
+        if response.status_code == 200:
+            data = response.json().get('data', [])
+            return data if data else None
+        return None
+
+    async def get_doc(self, doctype: str, name: str) -> Optional[Dict[str, Any]]:
+        response: httpx.Response = await self.request('GET', self.get_resource_url(doctype, name))
+        if response.status_code == 200:
+            return response.json().get('data')
+        return None
+
+    async def update_doc(self, doctype: str, name: str, data: Dict[str, Any]) -> bool:
+        response: httpx.Response = await self.request('PUT', self.get_resource_url(doctype, name), json=data)
+
+        return response.status_code == 200
+
+    async def check_user_exists(self, user_id: str) -> bool:
+        try:
+            user_doc = await self.get_doc('User', user_id)
+            return user_doc is not None
+
+        except Exception:
+            return False
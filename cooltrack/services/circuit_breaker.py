@@ -0,0 +1,84 @@
+import time
+import threading
+from typing import Dict, Any
+
+class CircuitOpenError(Exception):
+    """Raised instead of making a request while the circuit is open"""
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker shared by every caller of one upstream.
+
+    After failure_threshold failures in a row the circuit opens and calls are refused without touching
+    the network. Once reset_timeout has passed a single probe is let through (half-open); its success
+    closes the circuit, its failure opens it for another reset_timeout.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0) -> None:
+        self.failure_threshold: int = max(1, failure_threshold)
+        self.reset_timeout: float = reset_timeout
+        self.lock: threading.Lock = threading.Lock()
+
+        self.state: str = self.CLOSED
+        self.failures: int = 0
+        self.opened_at: float = 0.0
+        self.probe_in_flight: bool = False
+
+        self.times_opened: int = 0
+        self.short_circuited: int = 0
+
+    def allow_request(self) -> bool:
+        with self.lock:
+            if self.state == self.CLOSED:
+                return True
+
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self.probe_in_flight = False
+
+            if self.state == self.HALF_OPEN and not self.probe_in_flight:
+                self.probe_in_flight = True
+                return True
+
+            self.short_circuited += 1
+            return False
+
+    def record_success(self) -> None:
+        with self.lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self.probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self.lock:
+            self.failures += 1
+            self.probe_in_flight = False
+
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.times_opened += 1
+
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def release_probe(self) -> None:
+        """End a call that says nothing about the upstream (bad URL, cancelled) without a verdict"""
+        with self.lock:
+            self.probe_in_flight = False
+
+    def is_open(self) -> bool:
+        """True while calls are being refused; does not consume the half-open probe"""
+        with self.lock:
+            return self.state == self.OPEN and time.monotonic() - self.opened_at < self.reset_timeout
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                'state': self.state,
+                'consecutive_failures': self.failures,
+                'times_opened': self.times_opened,
+                'short_circuited': self.short_circuited
+            }
@@ -1,20 +1,51 @@
 import os
 import time
+import random
 import logging
 import requests
 import urllib.parse
+from requests.adapters import HTTPAdapter
 from cryptography.fernet import Fernet
-from typing import Optional, Dict, Any, Union
+from typing import Optional, Dict, Any, Union, List, Tuple
 
-class FrappeClient:
-    def __init__(self, logger: logging.Logger, base_domain: str = 'https://badmc.cooltrack.co') -> None:
-        self.base_domain: str = base_domain
+from .circuit_breaker import CircuitBreaker, CircuitOpenError
+
+class FrappeUnavailableError(CircuitOpenError, requests.ConnectionError):
+    """Circuit is open; a RequestException so existing error handling treats it as a failed call"""
+
+class BaseFrappeClient:
+    """Configuration, credentials and failure policy shared by the sync and async clients"""
+
+    RETRY_STATUSES = (429, 502, 503, 504) # Worth another attempt; other statuses are final answers
+
+    def __init__(
+        self,
+        logger: logging.Logger,
+        base_domain: Optional[str] = None,
+        circuit: Optional[CircuitBreaker] = None
+    ) -> None:
+        self.base_domain: str = base_domain or os.getenv('FRAPPE_BASE_DOMAIN', 'https://badmc.cooltrack.co')
         self.cached_api_url: Optional[str] = None
         self.cache_timeout: int = 300  # 5 minutes
         self.last_fetch_time: float = 0.0
 
         self.logger = logger
 
+        # Connection pool, timeouts and retry policy
+        self.pool_size: int = int(os.getenv('FRAPPE_CLIENT_POOL_SIZE', 10))
+        self.timeout: float = float(os.getenv('FRAPPE_CLIENT_TIMEOUT', 10))
+        self.connect_timeout: float = float(os.getenv('FRAPPE_CLIENT_CONNECT_TIMEOUT', 3.05))
+        self.keepalive_expiry: float = float(os.getenv('FRAPPE_CLIENT_KEEPALIVE', 4)) # Below gunicorn's keepalive of 5s
+        self.max_retries: int = int(os.getenv('FRAPPE_CLIENT_RETRIES', 2))
+        self.backoff_base: float = float(os.getenv('FRAPPE_CLIENT_BACKOFF', 0.5))
+        self.backoff_max: float = float(os.getenv('FRAPPE_CLIENT_BACKOFF_MAX', 30))
+
+        # One breaker per upstream: pass the same instance to every client talking to this Frappe site
+        self.circuit: CircuitBreaker = circuit or CircuitBreaker(
+            failure_threshold=int(os.getenv('FRAPPE_CLIENT_CIRCUIT_THRESHOLD', 5)),
+            reset_timeout=float(os.getenv('FRAPPE_CLIENT_CIRCUIT_RESET', 30))
+        )
+
         self.encryption_key: Optional[str] = os.getenv('CONFIG_ENCRYPTION_KEY')
 
         try:
@@ -30,16 +61,13 @@ class FrappeClient:
 
         self.get_credentials()
 
-        self.session: requests.Session = requests.Session()
-        self.session.headers.update({
+        self.headers: Dict[str, str] = {
             'Accept': 'application/json',
             'Content-Type': 'application/json'
-        })
+        }
 
         if self.api_key and self.api_secret:
-            self.session.headers.update({
-                'Authorization': f'token {self.api_key}:{self.api_secret}'
-            })
+            self.headers['Authorization'] = f'token {self.api_key}:{self.api_secret}'
 
     def get_credentials(self) -> None:
         encrypted_api_key: Optional[str] = os.getenv('ENCRYPTED_FRAPPE_API_KEY')
@@ -73,49 +101,156 @@ class FrappeClient:
             self.logger.error(f'Failed to decrypt credential: {e}')
             raise Exception('Credential decryption failed')
 
+    def backoff_delay(self, attempt: int) -> float:
+        """Full-jitter exponential backoff: a random delay up to base * 2^attempt, capped"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def check_circuit(self, url: str) -> None:
+        if not self.circuit.allow_request():
+            raise FrappeUnavailableError(f'Circuit open, not calling {url}')
+
+    def get_settings_url(self) -> str:
+        return f'{self.base_domain}/api/method/cooltrack.api.v1.get_api_url'
+
+    def get_resource_url(self, doctype: str, name: str) -> str:
+        return f"{self.base_domain}/api/resource/{doctype}/{urllib.parse.quote(name, safe='')}"
+
+    def get_batch_api_url(self) -> str:
+        """Bulk endpoint that sits next to the configured single-reading endpoint"""
+        if self.cached_api_url and self.cached_api_url.rstrip('/').endswith('receive_sensor_data'):
+            return f"{self.cached_api_url.rstrip('/')}_batch"
+
+        return f'{self.base_domain}/api/method/cooltrack.api.v1.receive_sensor_data_batch'
+
+    def cache_api_url(self, response_json: Dict[str, Any], fetched_at: float) -> Optional[str]:
+        data: Dict[str, Any] = response_json.get('message', {})
+        api_url: Optional[str] = data.get('api_url')
+        if api_url:
+            self.cached_api_url = api_url
+            self.last_fetch_time = fetched_at
+            return api_url
+
+        self.logger.warning('API URL not found in response')
+        return None
+
+    def has_fresh_api_url(self, current_time: float) -> bool:
+        return bool(self.cached_api_url) and (current_time - self.last_fetch_time) < self.cache_timeout
+
+class FrappeClient(BaseFrappeClient):
+    """Blocking client on a pooled requests.Session; safe to share between threads"""
+
+    def __init__(
+        self,
+        logger: logging.Logger,
+        base_domain: Optional[str] = None,
+        circuit: Optional[CircuitBreaker] = None
+    ) -> None:
+        super().__init__(logger, base_domain, circuit)
+
+        # Retries are done in request() so they go through the circuit breaker and back off with jitter
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=0)
+
+        self.session: requests.Session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update(self.headers)
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        timeout: Optional[float] = None,
+        retries: Optional[int] = None,
+        **kwargs: Any
+    ) -> requests.Response:
+        """Send one request with retries; raises FrappeUnavailableError while the circuit is open"""
+        retries = self.max_retries if retries is None else retries
+
+        for attempt in range(retries + 1):
+            self.check_circuit(url)
+
+            try:
+                response: requests.Response = self.session.request(
+                    method, url, timeout=(self.connect_timeout, timeout or self.timeout), **kwargs
+                )
+
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self.circuit.record_failure()
+                if attempt >= retries:
+                    raise
+
+                self.logger.warning(f'{method} {url} failed (attempt {attempt + 1}): {e}')
+
+            except BaseException:
+                # Not an outage (redirect loop, invalid URL, undecodable body, cancellation): no verdict,
+                # but a half-open probe must not stay in flight or the circuit never closes again
+                self.circuit.release_probe()
+                raise
+
+            else:
+                if response.status_code >= 500 and response.status_code not in self.RETRY_STATUSES:
+                    # The site answered with an error for this request (a traceback for one payload): it is
+                    # up, so the breaker gets no verdict and other callers keep going
+                    self.circuit.release_probe()
+                    return response
+
+                if response.status_code not in self.RETRY_STATUSES:
+                    self.circuit.record_success()
+                    return response
+
+                self.circuit.record_failure()
+                if attempt >= retries:
+                    return response
+
+                self.logger.warning(f'{method} {url} returned {response.status_code} (attempt {attempt + 1})')
+
+            time.sleep(self.backoff_delay(attempt))
+
+        raise requests.ConnectionError(f'No attempts made for {url}') # Only reached with negative retries
+
     def get_api_url_from_server(self, force_refresh: bool = False) -> Optional[str]:
         current_time: float = time.time()
 
-        if (
-            not force_refresh
-            and self.cached_api_url
-            and (current_time - self.last_fetch_time) < self.cache_timeout
-        ):
+        if not force_refresh and self.has_fresh_api_url(current_time):
             return self.cached_api_url
 
         try:
-            settings_url: str = f'{self.base_domain}/api/method/cooltrack.api.v1.get_api_url'
-            response: requests.Response = self.session.get(settings_url, timeout=10)
+            settings_url: str = self.get_settings_url()
+            response: requests.Response = self.request('GET', settings_url)
 
             if response.status_code == 200:
-                json_response: Dict[str, Any] = response.json()
-                data: Dict[str, Any] = json_response.get('message', {})
-                api_url: Optional[str] = data.get('api_url')
-                if api_url:
-                    self.cached_api_url = api_url
-                    self.last_fetch_time = current_time
-                    return api_url
-
-                else:
-                    self.logger.warning('API URL not found in response')
+                return self.cache_api_url(response.json(), current_time)
 
             else:
                 self.logger.error(f'Failed to get API URL: {response.status_code} - {response.text}')
 
-        except requests.RequestException as e:
+        except (requests.RequestException, ValueError) as e:
             self.logger.error(f'Failed to get API URL: {e}')
 
         return None
 
-    def forward_sensor_data(self, sensor_data: Dict[str, Any]) -> bool:
+    def get_gateway_settings(self, modified: Optional[str] = None) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        """Conditional fetch of Cool Track Settings: (False, None) when unchanged since modified, else (True, payload)"""
+        url: str = f'{self.base_domain}/api/method/cooltrack.api.v1.get_gateway_settings'
+        response: requests.Response = self.request('GET', url, params={'modified': modified} if modified else None)
+
+        if response.status_code == 304:
+            return False, None
+
+        if response.status_code != 200:
+            raise requests.HTTPError(f'Failed to get gateway settings: {response.status_code} - {response.text}')
+
+        return True, response.json().get('message') or {}
+
+    def forward_sensor_data(self, sensor_data: Dict[str, Any], retries: Optional[int] = None) -> bool:
         if not self.api_key or not self.api_secret:
             self.logger.error('API credentials not set. Cannot forward sensor data.')
             return False
 
         try:
-            response = self.session.post(self.cached_api_url, json=sensor_data, timeout=10)
+            response = self.request('POST', self.cached_api_url, json=sensor_data, retries=retries)
 
-            if response.status_code == 200:
+            if response.status_code in (200, 202): # 202 when the site queues ingest
                 self.logger.info(f'Sensor data successfully sent to {self.cached_api_url}')
                 return True
 
@@ -130,6 +265,37 @@ class FrappeClient:
             self.logger.error(f'Error forwarding sensor data to {self.cached_api_url}: {e}')
             return False
 
+    def forward_sensor_data_batch(
+        self,
+        readings: List[Dict[str, Any]],
+        retries: Optional[int] = None
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Send readings as one request; returns the per-reading results or None if the request failed"""
+        if not self.api_key or not self.api_secret:
+            self.logger.error('API credentials not set. Cannot forward sensor data.')
+            return None
+
+        batch_url: str = self.get_batch_api_url()
+
+        try:
+            response = self.request('POST', batch_url, json={'readings': readings}, timeout=30, retries=retries)
+
+            if response.status_code in (200, 202):
+                results: List[Dict[str, Any]] = response.json().get('message', {}).get('results', [])
+                self.logger.info(f'Batch of {len(readings)} readings sent to {batch_url}')
+                return results
+
+            else:
+                self.logger.error(
+                    f'Failed to send batch of {len(readings)} readings to {batch_url}: '
+                    f'{response.status_code} - {response.text}'
+                )
+                return None
+
+        except (requests.RequestException, ValueError) as e:
+            self.logger.error(f'Error forwarding batch to {batch_url}: {e}')
+            return None
+
     def get_logged_user(self, auth_header: Optional[str] = None, session_cookie: Optional[str] = None) -> Optional[str]:
         url: str = f'{self.base_domain}/api/method/frappe.auth.get_logged_user'
         headers: Dict[str, str] = {}
@@ -140,31 +306,29 @@ class FrappeClient:
         if session_cookie:
             cookies['sid'] = session_cookie
 
-        response: requests.Response = self.session.get(url, headers=headers, cookies=cookies, timeout=10)
+        response: requests.Response = self.request('GET', url, headers=headers, cookies=cookies)
         if response.status_code == 200:
             return response.json().get('message')
         return None
 
     def get_single_doc(self, doctype: str) -> Optional[Union[Dict[str, Any], list]]:
-        url: str = f'{self.base_domain}/api/resource/{doctype}/{doctype}'
-        response: requests.Response = self.session.get(url)
+        url: str = self.get_resource_url(doctype, doctype)
+        response: requests.Response = self.request('GET', url)
         if response.status_code == 200:
             data = response.json().get('data', [])
             return data if data else None
         return None
 
     def get_doc(self, doctype: str, name: str) -> Optional[Dict[str, Any]]:
-        encoded_name: str = urllib.parse.quote(name, safe='')
-        url: str = f'{self.base_domain}/api/resource/{doctype}/{encoded_name}'
-        response: requests.Response = self.session.get(url)
+        url: str = self.get_resource_url(doctype, name)
+        response: requests.Response = self.request('GET', url)
         if response.status_code == 200:
             return response.json().get('data')
         return None
 
     def update_doc(self, doctype: str, name: str, data: Dict[str, Any]) -> bool:
-        encoded_name: str = urllib.parse.quote(name, safe='')
-        url: str = f'{self.base_domain}/api/resource/{doctype}/{encoded_name}'
-        response: requests.Response = self.session.put(url, json=data)
+        url: str = self.get_resource_url(doctype, name)
+        response: requests.Response = self.request('PUT', url, json=data)
         
         return response.status_code == 200
 
@@ -174,4 +338,4 @@ class FrappeClient:
             return user_doc is not None
             
         except Exception:
-            return False
\ No newline at end of file
+            return False
@@ -0,0 +1,263 @@
+import os
+import asyncio
+import resource
+
+from ..async_frappe_client import AsyncFrappeClient, httpx
+from .sensor_server import SensorServer
+
+class AsyncSensorServer(SensorServer):
+    """Event loop engine: every gateway is a coroutine on one thread instead of a dedicated thread"""
+
+    def __init__(self, host, port):
+        super().__init__(host, port)
+
+        # Idle gateways only cost a socket and a coroutine, so the cap is much higher than the threaded engine
+        self.max_clients = int(os.getenv('SENSOR_SERVER_ASYNC_MAX_CLIENTS', 10000))
+        self.listen_backlog = 512
+
+        self.loop = None
+        self.server = None
+        self.stop_event = None
+        self.client_writers = set()
+
+    def count_connections(self):
+        return len(self.client_writers)
+
+    def raise_open_file_limit(self):
+        try:
+            soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+            wanted = self.max_clients + 256
+            target = wanted if hard == resource.RLIM_INFINITY else min(hard, wanted)
+
+            if soft != resource.RLIM_INFINITY and soft < target:
+                resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+                self.logger.info(f'Raised open file limit from {soft} to {target}')
+
+        except (ValueError, OSError) as e:
+            self.logger.warning(f'Could not raise open file limit: {e}')
+
+    def spool_overflow(self, items):
+        """Runs on the loop when the forward queue is full: the spool fsyncs, so it is written from an executor
+        thread instead of stalling every connection"""
+        def log_failure(future):
+            if not future.cancelled() and future.exception():
+                self.logger.error(f'Failed to spool {len(items)} overflowed readings: {future.exception()}')
+
+        self.loop.run_in_executor(None, self.spool.append, items).add_done_callback(log_failure)
+
+    async def handle_gateway_connection_async(self, writer, client_id, data):
+        """Handle initial gateway connection and perform time sync"""
+        try:
+            gateway_name = data.decode('utf-8', errors='ignore').strip()
+            self.logger.info(f'GATEWAY: Connected - {gateway_name} from {client_id}')
+
+            # Only sync time once per gateway per session
+            if self.enable_time_sync and client_id not in self.synced_gateways:
+                self.logger.info(f'TIME SYNC: Starting sync with gateway {client_id}')
+
+                # Small delay to ensure gateway is ready
+                await asyncio.sleep(0.5)
+
+                if await self.time_sync_manager.send_time_sync_async(writer, client_id):
+                    self.synced_gateways.add(client_id)
+                    self.logger.info(f'TIME SYNC: Completed for gateway {client_id}')
+
+                else:
+                    self.logger.warning(f'TIME SYNC: Failed for gateway {client_id}')
+
+            elif client_id in self.synced_gateways:
+                self.logger.info(f'TIME SYNC: Gateway {client_id} already synced this session')
+
+            if self.enable_auto_restart:
+                self.activity_monitor.update_activity()
+
+        except Exception as e:
+            self.logger.error(f'GATEWAY: Error handling connection from {client_id}: {e}')
+
+    async def handle_client(self, reader, writer):
+        address = writer.get_extra_info('peername')
+        client_id = f'{address[0]}:{address[1]}'
+
+        if len(self.client_writers) >= self.max_clients:
+            self.logger.warning(f'Max clients ({self.max_clients}) reached, rejecting {address}')
+            writer.close()
+            return
+
+        self.client_writers.add(writer)
+        self.logger.info(f'Accepted connection from {address}')
+        self.logger.info(f'Handling connection from {client_id}')
+
+        if self.enable_auto_restart:
+            self.activity_monitor.update_activity()
+
+        try:
+            frame_buffer = self.new_frame_buffer(client_id)
+            gateway_handshake_done = False
+
+            while self.running:
+                data = await reader.read(self.read_size)
+                if not data:
+                    self.logger.info(f'Client {client_id} disconnected')
+                    break
+
+                if self.enable_auto_restart:
+                    self.activity_monitor.update_activity()
+
+                self.raw_sampler.log_raw(client_id, data)
+
+                # Check for gateway connection request
+                if self.is_gateway_connection_request(data):
+                    if not gateway_handshake_done:
+                        await self.handle_gateway_connection_async(writer, client_id, data)
+                        gateway_handshake_done = True
+
+                    continue
+
+                for message in frame_buffer.feed(data):
+                    try:
+                        frame = self.frame_parser.trim(message)
+                        self.logger.debug('Frame from %s: %r', client_id, frame)
+
+                        if not frame or frame.isspace():
+                            continue
+
+                        # Check if this might be a late gateway identification
+                        if self.gateway_name_bytes in frame and not gateway_handshake_done:
+                            self.logger.info(f'LATE GATEWAY DETECTION: Found {self.gateway_name} in sensor data')
+                            await self.handle_gateway_connection_async(writer, client_id, message)
+                            gateway_handshake_done = True
+                            continue
+
+                        sensor_dict = self.build_sensor_dict(frame, client_id)
+                        if not sensor_dict:
+                            continue
+
+                        self.forward_queue.submit(sensor_dict, client_id, overflow_callback=self.spool_overflow)
+
+                    except Exception as e:
+                        self.logger.error(f'Error processing message from {client_id}: {e}')
+                        self.logger.error(f'Raw message that caused error: {message}')
+
+        except (ConnectionError, OSError) as e:
+            self.logger.error(f'Socket error for {client_id}: {e}')
+
+        except Exception as e:
+            self.logger.error(f'Error handling client {client_id}: {e}')
+
+        finally:
+            self.client_writers.discard(writer)
+            self.synced_gateways.discard(client_id) # Remove from synced gateways when connection closes
+
+            try:
+                writer.close()
+                self.logger.info(f'Closed connection to {client_id}')
+
+            except Exception:
+                pass
+
+    async def serve(self):
+        self.loop = asyncio.get_running_loop()
+        self.stop_event = asyncio.Event()
+
+        self.raise_open_file_limit()
+
+        try:
+            self.server = await asyncio.start_server(
+                self.handle_client,
+                self.host,
+                self.port,
+                backlog=self.listen_backlog,
+                reuse_address=True,
+                reuse_port=self.reuse_port
+            )
+            self.logger.info(f'Bound to {self.host}:{self.port}')
+
+        except OSError as e:
+            if e.errno == 98:  # Address already in use
+                self.logger.error(f'Port {self.port} is already in use. Another instance may be running.')
+
+            else:
+                self.logger.error(f'Failed to bind to {self.host}:{self.port}: {e}')
+
+            raise
+
+        self.running = True
+        await self.load_settings_async()
+        self.start_forwarding()
+
+        if self.enable_auto_restart:
+            self.activity_monitor.start_monitoring(self.request_restart)
+            self.logger.info('Auto-restart enabled')
+
+        self.logger.info(f'Sensor server (asyncio) listening on {self.host}:{self.port}')
+        self.logger.info(f'Max clients: {self.max_clients}, Forward workers: {self.forward_queue.worker_count}')
+
+        async with self.server:
+            await self.stop_event.wait()
+
+    async def load_settings_async(self):
+        """First settings load on the loop when httpx is available, sharing the forwarders' circuit breaker"""
+        if httpx is None:
+            await self.loop.run_in_executor(None, self.load_settings)
+            return
+
+        client = AsyncFrappeClient(logger=self.logger, circuit=self.frappe_client.circuit)
+
+        try:
+            changed, payload = await client.get_gateway_settings(self.settings.modified)
+            self.settings.apply(changed, payload)
+
+        except Exception as e:
+            self.logger.warning(f'SETTINGS: Initial load failed: {e}')
+
+        finally:
+            await client.aclose()
+
+        self.log_api_url()
+
+    def start_server(self):
+        try:
+            asyncio.run(self.serve())
+
+        except Exception as e:
+            self.logger.error(f'Failed to start server: {e}')
+            raise
+
+        finally:
+            self.shutdown()
+
+    def stop_serving(self):
+        """Runs on the event loop: stop accepting and close every gateway stream"""
+        if self.server:
+            self.server.close()
+
+        for writer in list(self.client_writers):
+            writer.close()
+
+        if self.stop_event:
+            self.stop_event.set()
+
+    def shutdown(self):
+        if self.shutdown_called:
+            return
+
+        self.shutdown_called = True
+        self.logger.info('Shutting down sensor server...')
+        self.running = False
+
+        if self.enable_auto_restart:
+            self.activity_monitor.stop_monitor()
+
+        if self.loop and not self.loop.is_closed():
+            try:
+                self.loop.call_soon_threadsafe(self.stop_serving)
+
+            except RuntimeError:
+                pass
+
+        if self.client_writers:
+            self.logger.info(f'Closing {len(self.client_writers)} client connections...')
+
+        self.stop_forwarding()
+
+        self.logger.info('Server shutdown complete')
@@ -0,0 +1,184 @@
+import time
+import queue
+import logging
+import threading
+from collections import OrderedDict
+from typing import Optional, Callable, Dict, Any, List, Tuple
+
+class DeadbandFilter:
+    """Per-sensor deadband/heartbeat policy that suppresses readings which carry no new information.
+
+    A reading is forwarded when its temperature moves more than delta from the last forwarded one, when it
+    falls on the other side of the sensor's acceptable range, while it stays outside that range, or when
+    heartbeat_interval has passed since the sensor's last forwarded reading. Everything else is counted
+    and dropped. The range comes from the Sensor doctype through threshold_lookup, which runs on a
+    background thread so socket handlers never wait on Frappe; until a sensor's range is known its
+    readings are always forwarded. Per-sensor state is an LRU bounded by max_sensors, so sensors that
+    went quiet (or IDs from corrupt frames) are dropped; a dropped sensor just forwards its next reading.
+    """
+
+    def __init__(
+        self,
+        logger: logging.Logger,
+        threshold_lookup: Callable[[str], Optional[Dict[str, Any]]],
+        delta: float = 0.5,
+        heartbeat_interval: float = 600.0,
+        threshold_ttl: float = 600.0,
+        retry_interval: float = 60.0,
+        max_sensors: int = 10000
+    ) -> None:
+        self.logger: logging.Logger = logger
+        self.threshold_lookup: Callable[[str], Optional[Dict[str, Any]]] = threshold_lookup
+        self.delta: float = delta
+        self.heartbeat_interval: float = heartbeat_interval
+        self.threshold_ttl: float = threshold_ttl
+        self.retry_interval: float = retry_interval
+        self.max_sensors: int = max_sensors
+
+        self.lock: threading.Lock = threading.Lock()
+        self.last_forwarded: OrderedDict = OrderedDict() # sensor ID -> (temperature, monotonic time, band)
+        self.suppressed_by_sensor: Dict[Any, int] = {} # Only sensors present in last_forwarded
+
+        self.thresholds: OrderedDict = OrderedDict() # sensor ID -> (thresholds, expires at)
+        self.lookups_pending: set = set()
+        self.lookup_queue: queue.Queue = queue.Queue()
+        self.lookup_thread: Optional[threading.Thread] = None
+        self.stop_event: threading.Event = threading.Event()
+
+        self.forwarded: int = 0
+        self.suppressed: int = 0
+        self.lookups: int = 0
+        self.lookup_failures: int = 0
+        self.evicted: int = 0
+
+    def start(self) -> None:
+        self.stop_event.clear()
+        self.lookup_thread = threading.Thread(target=self._lookup_worker, daemon=True, name='DeadbandThresholds')
+        self.lookup_thread.start()
+
+        self.logger.info(
+            f'Deadband filter enabled (delta: {self.delta}, heartbeat: {self.heartbeat_interval}s, '
+            f'threshold cache: {self.threshold_ttl}s)'
+        )
+
+    def stop(self) -> None:
+        self.stop_event.set()
+        self.lookup_queue.put(None)
+
+        if self.lookup_thread:
+            self.lookup_thread.join(timeout=5)
+            self.lookup_thread = None
+
+    def get_thresholds(self, sensor_id: Any) -> Optional[Dict[str, Any]]:
+        """Cached range for the sensor, scheduling a refresh when it is missing or stale"""
+        now: float = time.monotonic()
+
+        with self.lock:
+            cached = self.thresholds.get(sensor_id)
+            if cached and cached[1] > now:
+                return cached[0]
+
+            if sensor_id not in self.lookups_pending:
+                self.lookups_pending.add(sensor_id)
+                self.lookup_queue.put(sensor_id)
+
+        return cached[0] if cached else None # A stale range is still better than none while it refreshes
+
+    def _lookup_worker(self) -> None:
+        while not self.stop_event.is_set():
+            sensor_id = self.lookup_queue.get()
+            if sensor_id is None:
+                continue
+
+            try:
+                thresholds = self.threshold_lookup(sensor_id)
+                expires_at: float = time.monotonic() + self.threshold_ttl
+                self.lookups += 1
+
+            except Exception as e:
+                self.logger.warning(f'DEADBAND: Could not fetch thresholds for sensor {sensor_id}: {e}')
+                with self.lock:
+                    thresholds = self.thresholds.get(sensor_id, (None, 0.0))[0]
+                expires_at = time.monotonic() + self.retry_interval
+                self.lookup_failures += 1
+
+            with self.lock:
+                self.thresholds[sensor_id] = (thresholds, expires_at)
+                self.thresholds.move_to_end(sensor_id)
+                self.lookups_pending.discard(sensor_id)
+
+                if len(self.thresholds) > self.max_sensors:
+                    self.thresholds.popitem(last=False)
+
+    def classify(self, temperature: float, thresholds: Dict[str, Any]) -> int:
+        """-1 below the acceptable range, 1 above it, 0 inside (or no range configured)"""
+        temperature += thresholds.get('calibration_offset') or 0 # Frappe compares calibrated values
+        minimum = thresholds.get('min_acceptable_temperature')
+        maximum = thresholds.get('max_acceptable_temperature')
+
+        if maximum is not None and temperature > maximum:
+            return 1
+
+        if minimum is not None and temperature < minimum:
+            return -1
+
+        return 0
+
+    def should_forward(self, sensor_data: Dict[str, Any]) -> bool:
+        sensor_id = sensor_data.get('ID')
+        temperature = sensor_data.get('T')
+        if not isinstance(temperature, (int, float)):
+            return True
+
+        thresholds = self.get_thresholds(sensor_id)
+        if thresholds is None:
+            return True # Range unknown (not fetched yet, or the sensor is new): never hide a possible excursion
+
+        band: int = self.classify(temperature, thresholds)
+        now: float = time.monotonic()
+
+        with self.lock:
+            last = self.last_forwarded.get(sensor_id)
+            forward: bool = (
+                last is None
+                or band != 0
+                or band != last[2]
+                or abs(temperature - last[0]) > self.delta
+                or now - last[1] >= self.heartbeat_interval
+            )
+
+            if forward:
+                self.last_forwarded[sensor_id] = (temperature, now, band)
+                self.forwarded += 1
+
+            else:
+                self.suppressed_by_sensor[sensor_id] = self.suppressed_by_sensor.get(sensor_id, 0) + 1
+                self.suppressed += 1
+
+            self.last_forwarded.move_to_end(sensor_id)
+            if len(self.last_forwarded) > self.max_sensors:
+                evicted_id, _last = self.last_forwarded.popitem(last=False)
+                self.suppressed_by_sensor.pop(evicted_id, None)
+                self.evicted += 1
+
+        return forward
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self.lock:
+            seen: int = self.forwarded + self.suppressed
+            busiest: List[Tuple[Any, int]] = sorted(
+                self.suppressed_by_sensor.items(), key=lambda item: item[1], reverse=True
+            )[:5]
+
+            return {
+                'forwarded': self.forwarded,
+                'suppressed': self.suppressed,
+                'suppression_rate': round(self.suppressed / seen, 4) if seen else 0.0,
+                'sensors': len(self.last_forwarded),
+                'thresholds_cached': len(self.thresholds),
+                'max_sensors': self.max_sensors,
+                'evicted': self.evicted,
+                'lookups': self.lookups,
+                'lookup_failures': self.lookup_failures,
+                'most_suppressed': dict(busiest)
+            }
@@ -0,0 +1,59 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Tuple
+
+class DedupWindow:
+    """Bounded LRU index of recently seen (ID, SN, Time) keys used to drop retransmitted readings.
+
+    A gateway retransmits frames it thinks were lost, and a sensor heard by two gateways arrives twice.
+    Both copies carry the same sensor ID, sequence number and gateway timestamp, so they can be dropped
+    before they cost a POST and a Sensor Read insert. Readings without an SN are never treated as copies.
+    """
+
+    def __init__(self, max_size: int = 50000) -> None:
+        self.max_size: int = max_size
+        self.seen: OrderedDict = OrderedDict()
+        self.lock: threading.Lock = threading.Lock()
+
+        self.hits: int = 0
+        self.misses: int = 0
+        self.skipped: int = 0
+        self.evicted: int = 0
+
+    def is_duplicate(self, sensor_data: Dict[str, Any]) -> bool:
+        """Record the reading and report whether the same reading was already seen in the window"""
+        sequence_number = sensor_data.get('SN')
+        if sequence_number is None or self.max_size <= 0:
+            self.skipped += 1
+            return False
+
+        key: Tuple[Any, Any, Any] = (sensor_data.get('ID'), sequence_number, sensor_data.get('Time'))
+
+        with self.lock:
+            if key in self.seen:
+                self.seen.move_to_end(key)
+                self.hits += 1
+                return True
+
+            self.seen[key] = None
+            self.misses += 1
+
+            if len(self.seen) > self.max_size:
+                self.seen.popitem(last=False)
+                self.evicted += 1
+
+        return False
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self.lock:
+            checked: int = self.hits + self.misses
+
+            return {
+                'size': len(self.seen),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'skipped': self.skipped,
+                'evicted': self.evicted,
+                'hit_rate': round(self.hits / checked, 4) if checked else 0.0
+            }
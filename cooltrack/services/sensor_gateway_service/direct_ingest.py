@@ -0,0 +1,83 @@
+import time
+import logging
+import threading
+from typing import Optional, Dict, Any, List
+
+class DirectIngestClient:
+    """Writes readings through cooltrack.ingest inside this process instead of POSTing them to the site.
+
+    Only usable when the gateway service runs on the same bench as the site, with the bench's Python
+    (frappe importable and the sites directory readable). frappe.local is per thread, so every forwarder
+    thread initializes and connects its own site context on first use, and recycles it every
+    recycle_batches batches to bound per-context caches the way a web worker's max_requests would.
+    """
+
+    def __init__(
+        self,
+        logger: logging.Logger,
+        site: str,
+        sites_path: str,
+        recycle_batches: int = 100,
+        retry_interval: float = 30.0
+    ) -> None:
+        self.logger: logging.Logger = logger
+        self.site: str = site
+        self.sites_path: str = sites_path
+        self.recycle_batches: int = max(1, recycle_batches)
+        self.retry_interval: float = retry_interval
+
+        self.local: threading.local = threading.local()
+        self.unavailable_until: float = 0.0 # After a failure, skip straight to HTTP until then
+
+    def connect(self) -> None:
+        import frappe
+
+        if getattr(self.local, 'batches', None) is not None:
+            if self.local.batches < self.recycle_batches:
+                return
+
+            self.disconnect()
+
+        frappe.init(site=self.site, sites_path=self.sites_path)
+        frappe.connect()
+        frappe.set_user('Administrator') # Same rights ingest_reading gets through ignore_permissions
+        self.local.batches = 0
+
+        self.logger.info(f'DIRECT INGEST: {threading.current_thread().name} connected to {self.site}')
+
+    def disconnect(self) -> None:
+        if getattr(self.local, 'batches', None) is None:
+            return
+
+        self.local.batches = None
+
+        try:
+            import frappe
+            frappe.destroy()
+
+        except Exception as e:
+            self.logger.warning(f'DIRECT INGEST: Error closing site context: {e}')
+
+    def is_available(self) -> bool:
+        return time.monotonic() >= self.unavailable_until
+
+    def forward_sensor_data_batch(self, readings: List[Dict[str, Any]]) -> Optional[List[Dict[str, Any]]]:
+        """Same results shape as FrappeClient.forward_sensor_data_batch; None means use HTTP instead"""
+        if not self.is_available():
+            return None
+
+        try:
+            self.connect()
+
+            from cooltrack.utils import get_settings
+            from cooltrack.ingest import ingest_batch
+
+            response: Dict[str, Any] = ingest_batch(readings, get_settings())
+            self.local.batches += 1
+            return response['results']
+
+        except Exception as e:
+            self.logger.error(f'DIRECT INGEST: Batch of {len(readings)} readings failed, falling back to HTTP: {e}')
+            self.unavailable_until = time.monotonic() + self.retry_interval
+            self.disconnect()
+            return None
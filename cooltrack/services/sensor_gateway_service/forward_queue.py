@@ -0,0 +1,258 @@
+import time
+import queue
+import logging
+import threading
+from typing import Optional, Callable, Dict, Any, List, Set, Tuple
+
+class ForwardQueue:
+    """Bounded hand-off between connection handlers (producers) and forwarder workers (consumers)"""
+
+    def __init__(
+        self,
+        logger: logging.Logger,
+        forward_callback: Callable[[List[Tuple[Dict[str, Any], str]]], List[Optional[bool]]],
+        failure_callback: Optional[Callable[[List[Tuple[Dict[str, Any], str]]], None]] = None,
+        max_size: int = 10000,
+        workers: int = 4,
+        batch_size: int = 200,
+        batch_interval: float = 2.0,
+        stats_interval: float = 60,
+        extra_stats: Optional[Dict[str, Callable[[], Dict[str, Any]]]] = None
+    ) -> None:
+        self.logger: logging.Logger = logger
+        self.forward_callback: Callable[[List[Tuple[Dict[str, Any], str]]], List[Optional[bool]]] = forward_callback
+        self.failure_callback: Optional[Callable[[List[Tuple[Dict[str, Any], str]]], None]] = failure_callback
+        self.max_size: int = max_size
+        self.worker_count: int = workers
+        self.batch_size: int = max(1, batch_size)
+        self.batch_interval: float = batch_interval
+        self.stats_interval: float = stats_interval
+        self.extra_stats: Dict[str, Callable[[], Dict[str, Any]]] = extra_stats or {} # Reported alongside queue stats
+
+        self.queue: queue.Queue = queue.Queue(maxsize=max_size)
+        self.workers: List[threading.Thread] = []
+        self.stats_thread: Optional[threading.Thread] = None
+        self.stop_event: threading.Event = threading.Event()
+
+        self.stats_lock: threading.Lock = threading.Lock()
+        # Batch each worker is forwarding, by thread id, so stop() can hand back the ones still in flight,
+        # and the workers already handing a finished batch to the failure callback
+        self.in_flight_batches: Dict[int, List[Tuple[Dict[str, Any], str]]] = {}
+        self.finishing: Set[int] = set()
+        self.finished: threading.Condition = threading.Condition(self.stats_lock)
+        self.enqueued: int = 0
+        self.dropped: int = 0
+        self.overflowed: int = 0
+        self.forwarded: int = 0
+        self.failed: int = 0
+        self.rejected: int = 0
+        self.batches: int = 0
+        self.in_flight: int = 0
+        self.latency_total: float = 0.0
+        self.latency_max: float = 0.0
+        self.wait_total: float = 0.0
+        self.wait_max: float = 0.0
+
+    def start(self) -> None:
+        self.stop_event.clear()
+
+        for index in range(self.worker_count):
+            worker = threading.Thread(
+                target=self._worker,
+                daemon=True,
+                name=f'ForwardWorker-{index}'
+            )
+            worker.start()
+            self.workers.append(worker)
+
+        if self.stats_interval > 0:
+            self.stats_thread = threading.Thread(
+                target=self._report_stats,
+                daemon=True,
+                name='ForwardQueueStats'
+            )
+            self.stats_thread.start()
+
+        self.logger.info(
+            f'Forward queue started (size: {self.max_size}, workers: {self.worker_count}, '
+            f'batch: {self.batch_size} readings / {self.batch_interval}s)'
+        )
+
+    def submit(
+        self,
+        sensor_data: Dict[str, Any],
+        client_id: str,
+        overflow_callback: Optional[Callable[[List[Tuple[Dict[str, Any], str]]], None]] = None
+    ) -> bool:
+        """Never blocks the caller: a full queue hands the reading to overflow_callback (which must not block
+        either) or the failure callback, or drops it"""
+        try:
+            self.queue.put_nowait((sensor_data, client_id, time.monotonic()))
+
+        except queue.Full:
+            overflow_callback = overflow_callback or self.failure_callback
+            if overflow_callback:
+                with self.stats_lock:
+                    self.overflowed += 1
+
+                overflow_callback([(sensor_data, client_id)])
+                return False
+
+            with self.stats_lock:
+                self.dropped += 1
+
+            self.logger.warning(f'Forward queue full ({self.max_size}), dropped reading from {client_id}')
+            return False
+
+        with self.stats_lock:
+            self.enqueued += 1
+
+        return True
+
+    def _collect_batch(self) -> List[Tuple[Dict[str, Any], str, float]]:
+        """Block for the first reading, then keep filling until the batch is full or its window closes"""
+        batch: List[Tuple[Dict[str, Any], str, float]] = [self.queue.get(timeout=1)]
+        deadline: float = time.monotonic() + self.batch_interval
+
+        while len(batch) < self.batch_size:
+            remaining: float = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _worker(self) -> None:
+        while not self.stop_event.is_set():
+            try:
+                batch = self._collect_batch()
+
+            except queue.Empty:
+                continue
+
+            started_at: float = time.monotonic()
+            worker_id: int = threading.get_ident()
+            items: List[Tuple[Dict[str, Any], str]] = [(data, client_id) for data, client_id, _ in batch]
+
+            with self.stats_lock:
+                self.in_flight += len(batch)
+                self.in_flight_batches[worker_id] = items
+
+            try:
+                results: List[Optional[bool]] = self.forward_callback(items)
+
+            except Exception as e:
+                self.logger.error(f'Forward worker error for batch of {len(batch)}: {e}')
+                results = [False] * len(batch)
+
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+            self._record(results, [started_at - enqueued_at for _, _, enqueued_at in batch], time.monotonic() - started_at)
+
+            with self.stats_lock:
+                if self.in_flight_batches.pop(worker_id, None) is None:
+                    # stop() gave up waiting and returned the batch for spooling; the spool may already be
+                    # closed. Readings stored meanwhile are replayed as duplicates, which Frappe ignores.
+                    continue
+
+                self.finishing.add(worker_id)
+
+            try:
+                # True was delivered, None was permanently rejected; only False is worth keeping
+                failed_items = [item for item, result in zip(items, results) if result is False]
+                if failed_items and self.failure_callback:
+                    try:
+                        self.failure_callback(failed_items)
+
+                    except Exception as e:
+                        self.logger.error(f'Failure callback error for {len(failed_items)} readings: {e}')
+
+            finally:
+                with self.stats_lock:
+                    self.finishing.discard(worker_id)
+                    self.finished.notify_all()
+
+    def _record(self, results: List[Optional[bool]], waits: List[float], latency: float) -> None:
+        with self.stats_lock:
+            self.in_flight -= len(results)
+            self.batches += 1
+
+            self.forwarded += sum(1 for result in results if result)
+            self.rejected += sum(1 for result in results if result is None)
+            self.failed += sum(1 for result in results if result is False)
+
+            self.wait_total += sum(waits)
+            self.wait_max = max(self.wait_max, *waits)
+            self.latency_total += latency
+            self.latency_max = max(self.latency_max, latency)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self.stats_lock:
+            completed: int = self.forwarded + self.failed + self.rejected
+            return {
+                'depth': self.queue.qsize(),
+                'max_size': self.max_size,
+                'workers': self.worker_count,
+                'in_flight': self.in_flight,
+                'enqueued': self.enqueued,
+                'dropped': self.dropped,
+                'overflowed': self.overflowed,
+                'forwarded': self.forwarded,
+                'failed': self.failed,
+                'rejected': self.rejected,
+                'batches': self.batches,
+                'avg_batch_size': round(completed / self.batches, 2) if self.batches else 0.0,
+                'avg_wait_ms': round(self.wait_total / completed * 1000, 2) if completed else 0.0,
+                'max_wait_ms': round(self.wait_max * 1000, 2),
+                'avg_forward_latency_ms': round(self.latency_total / self.batches * 1000, 2) if self.batches else 0.0,
+                'max_forward_latency_ms': round(self.latency_max * 1000, 2)
+            }
+
+    def _report_stats(self) -> None:
+        while not self.stop_event.wait(timeout=self.stats_interval):
+            self.logger.info(f'FORWARD QUEUE: {self.get_stats()}')
+
+            for name, get_stats in self.extra_stats.items():
+                self.logger.info(f'{name}: {get_stats()}')
+
+    def stop(self, timeout: float = 5) -> List[Tuple[Dict[str, Any], str]]:
+        """Stop the workers and return every reading they will not finish with, so the caller can decide its fate.
+
+        Batches still being forwarded when the timeout runs out (a slow HTTP call) are returned along
+        with the queue, and their workers drop them when the call ends. Once this returns, no worker calls
+        the failure callback again, so the caller may close what it writes to.
+        """
+        self.stop_event.set()
+
+        deadline: float = time.monotonic() + timeout
+        for worker in self.workers:
+            worker.join(timeout=max(0.0, deadline - time.monotonic()))
+
+        remaining: List[Tuple[Dict[str, Any], str]] = []
+        with self.stats_lock:
+            for items in self.in_flight_batches.values():
+                remaining.extend(items)
+
+            self.in_flight_batches.clear()
+
+            # Failure callbacks already under way are quick (a spool append); let them finish
+            self.finished.wait_for(lambda: not self.finishing, timeout=max(1.0, deadline - time.monotonic()))
+
+        while True:
+            try:
+                sensor_data, client_id, _ = self.queue.get_nowait()
+                remaining.append((sensor_data, client_id))
+
+            except queue.Empty:
+                break
+
+        self.workers = []
+        self.logger.info(f'Forward queue stopped, {len(remaining)} readings left unsent')
+        return remaining
@@ -0,0 +1,139 @@
+import re
+from typing import Optional, Dict, Any, Tuple, Iterable
+
+DEGREE_SIGN: bytes = '℃'.encode('utf-8')
+GBK_DEGREE_SIGN: bytes = b'\xa1\xe6'
+
+HTML_PATTERN = re.compile(r'html', re.IGNORECASE)
+HTML_BYTES_PATTERN = re.compile(rb'html', re.IGNORECASE)
+
+START_MARKERS: Tuple[bytes, ...] = (b'GW_ID', b'%X', b'GW:')
+HTTP_METHODS: Tuple[bytes, ...] = tuple(
+    method + b' ' for method in (b'GET', b'POST', b'PUT', b'DELETE', b'HEAD', b'OPTIONS', b'PATCH')
+)
+HTTP_HEADERS: Tuple[bytes, ...] = (
+    b'Host:', b'User-Agent:', b'Accept:', b'Accept-Language:', b'Accept-Encoding:',
+    b'Connection:', b'Content-Type:', b'Content-Length:', b'Authorization:',
+    b'Cookie:', b'Cache-Control:', b'Pragma:', b'Referer:'
+)
+
+# Rejection reasons, one per validation branch
+TOO_SHORT = 'too_short'
+HTTP_METHOD = 'http_method'
+HTTP_HEADER = 'http_header'
+HTML_CONTENT = 'html'
+NO_GW_ID = 'no_gw_id'
+NO_TYPE = 'no_type'
+NO_ID = 'no_id'
+NO_PAIRS = 'no_pairs'
+INVALID_TYPE = 'invalid_type'
+
+def decode_frame(frame: bytes) -> str:
+    frame = frame.replace(GBK_DEGREE_SIGN, DEGREE_SIGN)
+
+    try:
+        text: str = frame.decode('utf-8')
+
+    except UnicodeDecodeError:
+        text = frame.decode('latin-1').replace('â\x84\x83', '℃')
+
+    return text.replace('\xa0', ' ')
+
+class FrameParser:
+    """Validates a raw gateway frame and builds the typed reading dict.
+
+    The cheap structural checks run on the raw bytes. The frame is then decoded once, split into
+    fields with str.split, and each value is typed with str checks; TYPE/ID are validated against the
+    resulting dict. The old per-frame validate/parse chain decoded and split the frame several times.
+    """
+
+    def __init__(self, valid_types: Iterable[str] = ('TMP',)) -> None:
+        self.valid_types: frozenset = frozenset(valid_types)
+
+    def trim(self, message: bytes) -> bytes:
+        """Drop anything before the first known start marker (slicing from 0 does not copy)"""
+        for marker in START_MARKERS:
+            index: int = message.find(marker)
+            if index != -1:
+                return message[index:]
+
+        return message
+
+    def peek_gateway(self, frame: bytes) -> Optional[str]:
+        """GW_ID of a frame that starts with one, without parsing the rest"""
+        if not frame.startswith(b'GW_ID:'):
+            return None
+
+        return frame[6:].split(b',', 1)[0].strip().decode('utf-8', errors='replace') or None
+
+    def parse(self, frame: bytes) -> Tuple[Optional[Dict[str, Any]], str]:
+        """Return (fields, '') for a valid sensor frame or (None, reason) when it is rejected"""
+        if not frame.startswith(b'GW_ID:'):
+            return None, self.classify_rejection(frame)
+
+        if len(frame) < 10:
+            return None, TOO_SHORT
+
+        if b',' not in frame:
+            return None, NO_PAIRS
+
+        text: str = decode_frame(frame)
+        if HTML_PATTERN.search(text):
+            return None, HTML_CONTENT
+
+        fields: Dict[str, Any] = {}
+        for part in text.split(','):
+            if ':' not in part:
+                continue
+
+            key, value = part.split(':', 1)
+            key = key.strip()
+            value = value.strip()
+            if not key or not value:
+                continue
+
+            if value.isdecimal():
+                fields[key] = int(value)
+
+            elif '.' in value and value.replace('.', '').replace('-', '').isdecimal():
+                try:
+                    fields[key] = float(value)
+
+                except ValueError:
+                    fields[key] = value
+
+            elif value[0] == '-' and value[1:].isdecimal():
+                fields[key] = int(value)
+
+            else:
+                fields[key] = value
+
+        sensor_type = fields.get('TYPE')
+        if sensor_type is None:
+            return None, NO_TYPE
+
+        if 'ID' not in fields:
+            return None, NO_ID
+
+        if sensor_type not in self.valid_types:
+            return None, INVALID_TYPE
+
+        return fields, ''
+
+    def classify_rejection(self, frame: bytes) -> str:
+        """Slow path, only taken for frames that are already known to be rejected"""
+        frame = frame.strip()
+
+        if len(frame) < 10:
+            return TOO_SHORT
+
+        if frame.startswith(HTTP_METHODS):
+            return HTTP_METHOD
+
+        if frame.startswith(HTTP_HEADERS):
+            return HTTP_HEADER
+
+        if frame.startswith(b'<') or HTML_BYTES_PATTERN.search(frame):
+            return HTML_CONTENT
+
+        return NO_GW_ID
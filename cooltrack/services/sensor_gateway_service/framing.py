@@ -0,0 +1,88 @@
+import logging
+from typing import Callable, List, Optional
+
+class FrameBuffer:
+    """Per-connection receive buffer that splits a byte stream into delimited frames in linear time.
+
+    Incoming chunks are appended to one reusable bytearray and frames are cut out by offset, so a
+    backlog of hundreds of frames is never re-copied per frame. Each feed() compacts the buffer down
+    to the unfinished tail, which the max frame size keeps small.
+    """
+
+    def __init__(
+        self,
+        logger: Optional[logging.Logger] = None,
+        client_id: str = '',
+        delimiter: bytes = b'\r\n',
+        max_frame_size: int = 4096,
+        oversized_callback: Optional[Callable[[int], None]] = None
+    ) -> None:
+        self.logger: Optional[logging.Logger] = logger
+        self.client_id: str = client_id
+        self.delimiter: bytes = delimiter
+        self.max_frame_size: int = max_frame_size
+        self.oversized_callback: Optional[Callable[[int], None]] = oversized_callback
+
+        self.buffer: bytearray = bytearray()
+        self.scan_from: int = 0
+        self.discarding: bool = False
+        self.oversized_frames: int = 0
+
+    def feed(self, data: bytes) -> List[bytes]:
+        """Append a received chunk and return every complete, non-empty frame it finished"""
+        buffer: bytearray = self.buffer
+        buffer += data
+
+        frames: List[bytes] = []
+        start: int = 0
+        delimiter_length: int = len(self.delimiter)
+
+        while True:
+            end: int = buffer.find(self.delimiter, self.scan_from)
+            if end == -1:
+                break
+
+            if self.discarding:
+                # Tail of an oversized frame: drop it and resynchronise on the delimiter
+                self.discarding = False
+
+            elif end - start > self.max_frame_size:
+                self._oversized(end - start)
+
+            elif end > start:
+                frames.append(bytes(buffer[start:end]))
+
+            start = end + delimiter_length
+            self.scan_from = start
+
+        # A frame of exactly max_frame_size may still be waiting for the rest of a split delimiter
+        pending: int = len(buffer) - start
+        if pending > self.max_frame_size + delimiter_length - 1:
+            if not self.discarding:
+                self._oversized(pending)
+                self.discarding = True
+
+            # Keep what could be the start of a delimiter split across this chunk and the next
+            start = len(buffer) - (delimiter_length - 1)
+
+        if start:
+            del buffer[:start]
+
+        # A delimiter split across two chunks must still be found on the next feed
+        self.scan_from = max(0, len(buffer) - delimiter_length + 1)
+        return frames
+
+    def _oversized(self, size: int) -> None:
+        self.oversized_frames += 1
+        if self.oversized_callback:
+            self.oversized_callback(size)
+
+        if self.logger:
+            self.logger.warning(
+                f'Discarding oversized frame from {self.client_id} ({size} bytes, max {self.max_frame_size})'
+            )
+
+    def clear(self) -> None:
+        self.buffer.clear()
+        self.scan_from = 0
+        self.discarding = False
@@ -0,0 +1,38 @@
+import logging
+import threading
+from collections import OrderedDict
+
+class RawFrameSampler:
+    """Decides which received chunks get a raw byte dump in the debug log.
+
+    Dumping every chunk (repr plus hex) costs more than parsing it, so only every Nth chunk per
+    gateway is logged. Gateways are keyed by IP so a reconnect does not reset the sampling; the counters
+    are an LRU bounded by max_gateways, so scanners and NAT churn cannot grow them without limit.
+    """
+
+    def __init__(self, logger: logging.Logger, sample_rate: float = 0.01, max_gateways: int = 10000) -> None:
+        self.logger: logging.Logger = logger
+        self.sample_rate: float = max(0.0, min(1.0, sample_rate))
+        self.interval: int = round(1 / self.sample_rate) if self.sample_rate > 0 else 0
+        self.max_gateways: int = max_gateways
+        self.counters: OrderedDict = OrderedDict()
+        self.lock: threading.Lock = threading.Lock()
+
+    def should_log(self, client_id: str) -> bool:
+        if not self.interval or not self.logger.isEnabledFor(logging.DEBUG):
+            return False
+
+        gateway: str = client_id.rsplit(':', 1)[0]
+        with self.lock:
+            count: int = self.counters.get(gateway, 0)
+            self.counters[gateway] = count + 1
+            self.counters.move_to_end(gateway)
+
+            if len(self.counters) > self.max_gateways:
+                self.counters.popitem(last=False)
+
+        return count % self.interval == 0
+
+    def log_raw(self, client_id: str, data: bytes) -> None:
+        if self.should_log(client_id):
+            self.logger.debug('Received raw data from %s: %r (hex %s)', client_id, data, data.hex())
@@ -0,0 +1,240 @@
+import time
+import bisect
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Callable, Dict, Any, List, Tuple, Union
+
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+
+Labels = Tuple[str, ...]
+GaugeValue = Union[float, Dict[Labels, float]]
+
+class MetricsShard:
+    """Counters and histograms written by exactly one thread"""
+
+    def __init__(self, thread: Optional[threading.Thread]) -> None:
+        self.thread: Optional[threading.Thread] = thread
+        self.counters: Dict[Tuple[str, Labels], float] = {}
+        self.histograms: Dict[Tuple[str, Labels], List[Any]] = {}
+
+class MetricsRegistry:
+    """Prometheus text-format metrics that cost the hot path no lock.
+
+    Every thread increments its own shard; a scrape sums all shards. Shards of threads that have
+    exited (closed gateway connections) are folded into a retired shard so they do not pile up.
+    """
+
+    def __init__(self, prefix: str = 'sensor_gateway') -> None:
+        self.prefix: str = prefix
+        self.local: threading.local = threading.local()
+        self.shards: List[MetricsShard] = []
+        self.retired: MetricsShard = MetricsShard(None)
+        self.shards_lock: threading.Lock = threading.Lock()
+
+        self.counters: Dict[str, Tuple[str, Labels]] = {}
+        self.histograms: Dict[str, Tuple[str, Labels, Tuple[float, ...]]] = {}
+        self.gauges: Dict[str, Tuple[str, Labels, Callable[[], GaugeValue]]] = {}
+
+    def counter(self, name: str, description: str, label_names: Labels = ()) -> None:
+        self.counters[name] = (description, label_names)
+
+    def histogram(self, name: str, description: str, label_names: Labels = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.histograms[name] = (description, label_names, buckets)
+
+    def gauge(self, name: str, description: str, callback: Callable[[], GaugeValue], label_names: Labels = ()) -> None:
+        """Gauges are read from the callback at scrape time instead of being tracked on the hot path"""
+        self.gauges[name] = (description, label_names, callback)
+
+    def shard(self) -> MetricsShard:
+        shard: Optional[MetricsShard] = getattr(self.local, 'shard', None)
+        if shard is None:
+            shard = MetricsShard(threading.current_thread())
+            with self.shards_lock:
+                self.shards.append(shard)
+
+            self.local.shard = shard
+
+        return shard
+
+    def inc(self, name: str, labels: Labels = (), amount: float = 1) -> None:
+        counters = self.shard().counters
+        key = (name, labels)
+        counters[key] = counters.get(key, 0) + amount
+
+    def observe(self, name: str, value: float, labels: Labels = ()) -> None:
+        histograms = self.shard().histograms
+        key = (name, labels)
+
+        entry = histograms.get(key)
+        if entry is None:
+            buckets = self.histograms[name][2]
+            entry = histograms[key] = [[0] * (len(buckets) + 1), 0.0, 0]
+
+        entry[0][bisect.bisect_left(self.histograms[name][2], value)] += 1
+        entry[1] += value
+        entry[2] += 1
+
+    def retire_dead_shards(self) -> None:
+        with self.shards_lock:
+            alive: List[MetricsShard] = []
+            for shard in self.shards:
+                if shard.thread is not None and not shard.thread.is_alive():
+                    self.merge(self.retired, shard.counters.copy(), shard.histograms.copy())
+
+                else:
+                    alive.append(shard)
+
+            self.shards = alive
+
+    def merge(
+        self,
+        target: MetricsShard,
+        counters: Dict[Tuple[str, Labels], float],
+        histograms: Dict[Tuple[str, Labels], List[Any]]
+    ) -> None:
+        for key, value in counters.items():
+            target.counters[key] = target.counters.get(key, 0) + value
+
+        for key, (buckets, total, count) in histograms.items():
+            entry = target.histograms.get(key)
+            if entry is None:
+                entry = target.histograms[key] = [[0] * len(buckets), 0.0, 0]
+
+            entry[0] = [existing + added for existing, added in zip(entry[0], buckets)]
+            entry[1] += total
+            entry[2] += count
+
+    def collect(self) -> MetricsShard:
+        """Sum every shard into a snapshot; dict.copy() is atomic under the GIL so writers are never blocked"""
+        self.retire_dead_shards()
+
+        snapshot = MetricsShard(None)
+        with self.shards_lock:
+            shards = [self.retired] + list(self.shards)
+
+        for shard in shards:
+            histograms = {key: [list(entry[0]), entry[1], entry[2]] for key, entry in shard.histograms.copy().items()}
+            self.merge(snapshot, shard.counters.copy(), histograms)
+
+        return snapshot
+
+    def render(self) -> str:
+        snapshot = self.collect()
+        lines: List[str] = []
+
+        for name, (description, label_names) in self.counters.items():
+            full_name = f'{self.prefix}_{name}'
+            lines.append(f'# HELP {full_name} {description}')
+            lines.append(f'# TYPE {full_name} counter')
+            for (metric, labels), value in sorted(snapshot.counters.items()):
+                if metric == name:
+                    lines.append(f'{full_name}{format_labels(label_names, labels)} {format_value(value)}')
+
+        for name, (description, label_names, buckets) in self.histograms.items():
+            full_name = f'{self.prefix}_{name}'
+            lines.append(f'# HELP {full_name} {description}')
+            lines.append(f'# TYPE {full_name} histogram')
+            for (metric, labels), (counts, total, count) in sorted(snapshot.histograms.items()):
+                if metric != name:
+                    continue
+
+                cumulative = 0
+                for bound, bucket_count in zip(buckets + (float('inf'),), counts):
+                    cumulative += bucket_count
+                    le = '+Inf' if bound == float('inf') else format_value(bound)
+                    lines.append(f'{full_name}_bucket{format_labels(label_names + ("le",), labels + (le,))} {cumulative}')
+
+                lines.append(f'{full_name}_sum{format_labels(label_names, labels)} {format_value(total)}')
+                lines.append(f'{full_name}_count{format_labels(label_names, labels)} {count}')
+
+        for name, (description, label_names, callback) in self.gauges.items():
+            full_name = f'{self.prefix}_{name}'
+            try:
+                value = callback()
+
+            except Exception:
+                continue
+
+            lines.append(f'# HELP {full_name} {description}')
+            lines.append(f'# TYPE {full_name} gauge')
+            values = value if isinstance(value, dict) else {(): value}
+            for labels, gauge_value in sorted(values.items()):
+                lines.append(f'{full_name}{format_labels(label_names, labels)} {format_value(gauge_value)}')
+
+        return '\n'.join(lines) + '\n'
+
+def format_labels(label_names: Labels, labels: Labels) -> str:
+    if not label_names:
+        return ''
+
+    pairs = []
+    for label_name, value in zip(label_names, labels):
+        escaped = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{label_name}="{escaped}"')
+
+    return '{' + ','.join(pairs) + '}'
+
+def format_value(value: float) -> str:
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+
+    return repr(value) if isinstance(value, float) else str(value)
+
+class MetricsServer:
+    """Serves GET /metrics from a background thread"""
+
+    def __init__(self, logger: logging.Logger, registry: MetricsRegistry, host: str = '127.0.0.1', port: int = 9108) -> None:
+        self.logger: logging.Logger = logger
+        self.registry: MetricsRegistry = registry
+        self.host: str = host
+        self.port: int = port
+        self.httpd: Optional[ThreadingHTTPServer] = None
+
+    def start(self) -> None:
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.split('?', 1)[0] not in ('/metrics', '/'):
+                    self.send_error(404)
+                    return
+
+                started_at = time.perf_counter()
+                body = registry.render()
+                full_name = f'{registry.prefix}_scrape_duration_seconds'
+                body += (
+                    f'# HELP {full_name} Time taken to render this scrape\n'
+                    f'# TYPE {full_name} gauge\n'
+                    f'{full_name} {time.perf_counter() - started_at:.6f}\n'
+                )
+                payload = body.encode('utf-8')
+
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        try:
+            self.httpd = ThreadingHTTPServer((self.host, self.port), Handler)
+            self.httpd.daemon_threads = True
+
+        except OSError as e:
+            self.logger.error(f'METRICS: Could not bind {self.host}:{self.port}: {e}')
+            self.httpd = None
+            return
+
+        threading.Thread(target=self.httpd.serve_forever, daemon=True, name='MetricsServer').start()
+        self.logger.info(f'METRICS: Serving on http://{self.host}:{self.port}/metrics')
+
+    def stop(self) -> None:
+        if self.httpd:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self.httpd = None
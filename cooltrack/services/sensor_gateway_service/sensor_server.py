@@ -1,42 +1,70 @@
 import os
 import sys
+import queue
+import atexit
 import time
 import signal
 import socket
 import logging
 import threading
 from datetime import datetime
-from logging.handlers import RotatingFileHandler
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 
 from ...utils import load_env_file
 from ..frappe_client import FrappeClient
 from .activity_monitor import ActivityMonitor
+from .deadband import DeadbandFilter
+from .dedup import DedupWindow
+from .direct_ingest import DirectIngestClient
+from .forward_queue import ForwardQueue
+from .frame_parser import FrameParser
+from .framing import FrameBuffer
+from .log_sampler import RawFrameSampler
+from .metrics import MetricsRegistry, MetricsServer
+from .settings_cache import SettingsCache
+from .spool import ReadingSpool
+from .supervisor import WorkerSupervisor
 from .time_sync_manager import TimeSyncManager
 
+log_listener = None
+
+UNKNOWN_GATEWAY = 'unknown' # Gateway label for frames from a GW_ID that never sent a valid frame
+
+def get_log_level():
+    level_name = os.getenv('SENSOR_SERVER_LOG_LEVEL', 'INFO').upper()
+    return getattr(logging, level_name, logging.INFO)
+
 def setup_logging():
-    log_level = 'DEBUG'
-    log_dir = './logs'
-    log_file = 'sensor_server.log'
+    global log_listener
+
+    log_level = get_log_level()
+    log_dir = os.getenv('SENSOR_SERVER_LOG_DIR', './logs')
+    worker_id = os.getenv('SENSOR_SERVER_WORKER_ID')
+    log_file = f'sensor_server-worker-{worker_id}.log' if worker_id else 'sensor_server.log' # One rotating file per process
     max_log_size = 50 * 1024 * 1024
-    backup_count = 100
+    backup_count = int(os.getenv('SENSOR_SERVER_LOG_BACKUPS', 100))
     
     log_file_path = os.path.join(log_dir, log_file)
     
     logger = logging.getLogger(__name__)
-    logger.setLevel(getattr(logging, log_level))
+    logger.setLevel(log_level)
     
     logger.propagate = False
     
     for handler in logger.handlers[:]:
         logger.removeHandler(handler)
+
+    if log_listener:
+        log_listener.stop()
+        log_listener = None
     
     console_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(funcName)s:%(lineno)d - %(message)s')
     file_formatter = logging.Formatter('%(asctime)s - %(message)s')
     
     console_handler = logging.StreamHandler()
-    console_handler.setLevel(getattr(logging, log_level))
     console_handler.setFormatter(console_formatter)
-    logger.addHandler(console_handler)
+    handlers = [console_handler]
+    file_error = None
     
     try:
         os.makedirs(log_dir, exist_ok=True)
@@ -46,16 +74,24 @@ def setup_logging():
             backupCount=backup_count,
             encoding='utf-8'
         )
-        file_handler.setLevel(getattr(logging, log_level))
         file_handler.setFormatter(file_formatter)
-        logger.addHandler(file_handler)
-        
-        logger.info(f'File logging initialized: {log_file_path}')
-        file_handler.flush()
+        handlers.append(file_handler)
         
     except Exception as e:
-        error_msg = f'⚠️ Could not setup file logging: {e}'
-        logger.error(error_msg)
+        file_error = e
+
+    # Socket threads only enqueue records; formatting and file I/O happen on the listener thread
+    log_listener = QueueListener(queue.SimpleQueue(), *handlers, respect_handler_level=True)
+    logger.addHandler(QueueHandler(log_listener.queue))
+    log_listener.start()
+    atexit.unregister(stop_logging)
+    atexit.register(stop_logging)
+
+    if file_error:
+        logger.error(f'⚠️ Could not setup file logging: {file_error}')
+
+    else:
+        logger.info(f'File logging initialized: {log_file_path}')
     
     urllib3_logger = logging.getLogger('urllib3')
     urllib3_logger.setLevel(logging.WARNING)
@@ -67,6 +103,13 @@ def setup_logging():
     
     return logger
 
+def stop_logging():
+    """Flush everything still queued; called on exit"""
+    global log_listener
+    if log_listener:
+        log_listener.stop()
+        log_listener = None
+
 class SensorServer:
     def __init__(self, host, port):
         self.host = host
@@ -80,16 +123,81 @@ class SensorServer:
         # Logging
         self.logger = logging.getLogger(__name__)
 
+        # Set by the supervisor when several worker processes share the port
+        self.worker_id = os.getenv('SENSOR_SERVER_WORKER_ID')
+        self.reuse_port = False
+
         # Configuration
-        self.max_clients = 3
-        self.retry_delay = 5
+        self.max_clients = int(os.getenv('SENSOR_SERVER_MAX_CLIENTS', 3))
         self.retry_attempts = 3
         self.gateway_name = 'BADMC' # Name set on the gateway
+        self.gateway_name_bytes = self.gateway_name.encode()
+        self.frame_parser = FrameParser(valid_types=('TMP',)) # Add other sensor types here as needed
+        self.raw_sampler = RawFrameSampler(self.logger, sample_rate=float(os.getenv('SENSOR_SERVER_RAW_LOG_SAMPLE_RATE', 0.01)))
         self.connection_timeout = 3600
+        self.read_size = 4096
+        self.max_frame_size = int(os.getenv('SENSOR_SERVER_MAX_FRAME_SIZE', 4096))
 
         # API Configuration
         self.frappe_client = FrappeClient(logger=self.logger)
 
+        # Settings: loaded once, refreshed in the background with conditional requests, read lock-free
+        self.settings = SettingsCache(
+            logger=self.logger,
+            fetch=self.frappe_client.get_gateway_settings,
+            refresh_interval=float(os.getenv('SENSOR_SERVER_SETTINGS_REFRESH', 30))
+        )
+        self.settings.on_change(self.apply_settings)
+
+        # Direct Ingest: on the site's own bench, write through cooltrack.ingest in-process; HTTP stays the fallback
+        self.direct_ingest = None
+        if os.getenv('SENSOR_SERVER_INGEST_MODE', 'http').lower() == 'direct':
+            self.direct_ingest = DirectIngestClient(
+                logger=self.logger,
+                site=os.getenv('SENSOR_SERVER_FRAPPE_SITE', 'badmc.cooltrack.co'),
+                sites_path=os.getenv('SENSOR_SERVER_SITES_PATH', '/home/frappe/frappe-bench/sites'),
+                recycle_batches=int(os.getenv('SENSOR_SERVER_DIRECT_RECYCLE_BATCHES', 100))
+            )
+
+        # Forwarding Pipeline: handlers only frame and parse, workers do the HTTP
+        self.batch_size = min(int(os.getenv('SENSOR_SERVER_BATCH_SIZE', 200)), 1000) # receive_sensor_data_batch accepts up to 1000
+        self.batch_interval = float(os.getenv('SENSOR_SERVER_BATCH_INTERVAL', 2.0))
+
+        # Deduplication: retransmitted frames and sensors heard by two gateways are dropped before forwarding
+        self.dedup = DedupWindow(max_size=int(os.getenv('SENSOR_SERVER_DEDUP_SIZE', 50000)))
+
+        # Deadband: optionally hold back readings that barely moved since the sensor's last forwarded one
+        self.deadband = None
+        if os.getenv('SENSOR_SERVER_DEADBAND', '0').lower() in ('1', 'true', 'yes'):
+            self.deadband = DeadbandFilter(
+                logger=self.logger,
+                threshold_lookup=self.fetch_sensor_thresholds,
+                delta=float(os.getenv('SENSOR_SERVER_DEADBAND_DELTA', 0.5)), # °C
+                heartbeat_interval=float(os.getenv('SENSOR_SERVER_DEADBAND_HEARTBEAT', 10)) * 60, # Minutes; keep well under the 1h offline check
+                threshold_ttl=float(os.getenv('SENSOR_SERVER_THRESHOLD_CACHE_TTL', 600)),
+                max_sensors=int(os.getenv('SENSOR_SERVER_DEADBAND_MAX_SENSORS', 10000))
+            )
+
+        # Durable Spool: readings that could not be forwarded are kept on disk and replayed in order
+        self.spool = ReadingSpool(
+            logger=self.logger,
+            spool_dir=self.get_spool_dir(),
+            replay_batch_size=self.batch_size,
+            replay_rate=float(os.getenv('SENSOR_SERVER_SPOOL_REPLAY_RATE', 100))
+        )
+
+        self.forward_queue = ForwardQueue(
+            logger=self.logger,
+            forward_callback=self.forward_batch_to_erpnext,
+            failure_callback=self.spool.append,
+            max_size=int(os.getenv('SENSOR_SERVER_FORWARD_QUEUE_SIZE', 10000)),
+            workers=int(os.getenv('SENSOR_SERVER_FORWARD_WORKERS', 4)),
+            batch_size=self.batch_size,
+            batch_interval=self.batch_interval,
+            stats_interval=float(os.getenv('SENSOR_SERVER_QUEUE_STATS_INTERVAL', 60)),
+            extra_stats=self.get_extra_stats()
+        )
+
         # Activity Monitoring
         self.restart_requested = False
         self.enable_auto_restart = True
@@ -99,14 +207,110 @@ class SensorServer:
         self.synced_gateways = set() # Track which gateways have been synced to avoid repeated syncing
         self.enable_time_sync = True  # Enable automatic time sync
         self.time_sync_manager = TimeSyncManager(logger=self.logger)
+
+        # Metrics: Prometheus text format on SENSOR_SERVER_METRICS_PORT (0 disables), one port per worker
+        self.metrics = MetricsRegistry(prefix='sensor_gateway')
+        self.known_gateways = set() # GW_IDs seen in valid frames, the only gateway label values besides 'unknown'
+        self.metrics_port = int(os.getenv('SENSOR_SERVER_METRICS_PORT', 9108))
+        self.metrics_server = None
+        self.register_metrics()
         
+    def get_extra_stats(self):
+        extra_stats = {
+            'DEDUP': self.dedup.get_stats,
+            'FRAPPE CIRCUIT': self.frappe_client.circuit.get_stats,
+            'SETTINGS': self.settings.get_stats
+        }
+        if self.deadband:
+            extra_stats['DEADBAND'] = self.deadband.get_stats
+
+        return extra_stats
+
+    def register_metrics(self):
+        # Series are labelled with the GW_ID of a gateway that has sent a valid frame, never the peer address:
+        # scanners and NAT churn would otherwise add a series per source IP that is never removed. Frames
+        # from anything else share the 'unknown' gateway label.
+        self.metrics.counter('frames_received_total', 'Frames that reached the parser', ('gateway',))
+        self.metrics.counter('frames_rejected_total', 'Frames that were not sensor readings, by reason', ('gateway', 'reason'))
+        self.metrics.counter('readings_duplicate_total', 'Readings dropped by the dedup window', ('gateway',))
+        self.metrics.counter('readings_suppressed_total', 'Readings held back by the deadband filter', ('gateway',))
+        self.metrics.counter('readings_forwarded_total', 'Readings stored by Frappe', ('gateway',))
+        self.metrics.counter('readings_rejected_total', 'Readings refused by Frappe with a 4xx status', ('gateway',))
+        self.metrics.counter('readings_failed_total', 'Readings that could not be forwarded and were spooled', ('gateway',))
+        self.metrics.counter('forward_retries_total', 'Forward attempts repeated after a failure')
+        self.metrics.histogram('parse_seconds', 'Time to decode, validate and parse one frame')
+        self.metrics.histogram('frappe_request_seconds', 'Frappe round-trip time per request (single, batch or direct)', ('endpoint',))
+
+        self.metrics.gauge('connections', 'Open gateway connections', self.count_connections)
+        self.metrics.gauge('forward_queue_depth', 'Readings waiting for a forward worker', self.forward_queue.queue.qsize)
+        self.metrics.gauge('forward_in_flight', 'Readings being forwarded right now', lambda: self.forward_queue.in_flight)
+        self.metrics.gauge('spool_pending_segments', 'Spool segments not yet replayed', lambda: self.spool.get_stats()['pending_segments'])
+        self.metrics.gauge('dedup_window_size', 'Keys held by the dedup window', lambda: len(self.dedup.seen))
+        self.metrics.gauge('frappe_circuit_open', 'Whether calls to Frappe are being short-circuited', lambda: int(self.frappe_client.circuit.is_open()))
+        self.metrics.gauge('seconds_since_activity', 'Seconds since the last gateway activity', self.activity_monitor.get_seconds_since_last_activity)
+
+    def count_connections(self):
+        return len([thread for thread in self.client_threads if thread.is_alive()])
+
+    def new_frame_buffer(self, client_id):
+        return FrameBuffer(
+            self.logger,
+            client_id,
+            max_frame_size=self.max_frame_size,
+            oversized_callback=lambda size: self.metrics.inc('frames_rejected_total', (UNKNOWN_GATEWAY, 'oversized'))
+        )
+
+    def apply_settings(self, snapshot):
+        # FrappeClient posts to cached_api_url; keep it in step with the snapshot
+        self.frappe_client.cached_api_url = snapshot.get('api_url')
+        self.frappe_client.last_fetch_time = time.time()
+
+    def get_api_url(self):
+        """Ingest endpoint from the settings snapshot; never makes a request on the caller's thread"""
+        api_url = self.settings.get('api_url')
+        if not api_url:
+            self.settings.request_refresh()
+
+        return api_url
+
+    def load_settings(self):
+        """Blocking first load at startup, logged the way the old endpoint probe was"""
+        self.settings.refresh()
+        self.log_api_url()
+
+    def log_api_url(self):
+        api_url = self.settings.get('api_url')
+        if api_url:
+            self.logger.info(f'API endpoint ready: {api_url}')
+
+        else:
+            self.logger.warning('Could not fetch API endpoint - will retry in the background')
+
+    def fetch_sensor_thresholds(self, sensor_id):
+        """Acceptable range for the deadband filter; an unknown sensor has none until Frappe creates it"""
+        sensor_doc = self.frappe_client.get_doc('Sensor', str(sensor_id))
+        if not sensor_doc:
+            return {}
+
+        return {
+            'min_acceptable_temperature': sensor_doc.get('min_acceptable_temperature'),
+            'max_acceptable_temperature': sensor_doc.get('max_acceptable_temperature'),
+            'calibration_offset': sensor_doc.get('calibration_offset')
+        }
+
+    def get_spool_dir(self):
+        spool_dir = os.getenv('SENSOR_SERVER_SPOOL_DIR', './spool')
+        if self.worker_id is not None:
+            spool_dir = os.path.join(spool_dir, f'worker-{self.worker_id}')
+
+        return spool_dir
+
     def is_gateway_connection_request(self, data):
         if not data:
             return False
 
         try:
-            expected = self.gateway_name.encode()
-            if expected in data:
+            if self.gateway_name_bytes in data:
                 self.logger.info(f'DETECTED: Gateway connection request (contains {self.gateway_name})')
                 return True
 
@@ -144,127 +348,20 @@ class SensorServer:
         except Exception as e:
             self.logger.error(f'GATEWAY: Error handling connection from {client_id}: {e}')
 
-    def clean_corrupted_sensor_data(self, data_str):
-        if f'{self.gateway_name}' in data_str and 'GW_ID:' in data_str: # Has to start with the name set on the gateway
-            gw_id_index = data_str.find('GW_ID:') # Extract the sensor data part after gateway name
-            if gw_id_index != -1:
-                cleaned_data = data_str[gw_id_index:]
-                self.logger.info(f'Cleaned corrupted data: {data_str[:20]}... -> {cleaned_data[:20]}...')
-                return cleaned_data
-
-        return data_str
-
-    def is_valid_sensor_data(self, data_str):
-        data_str = data_str.strip()
-        self.logger.debug(f'Validating sensor data: {repr(data_str)}')
-        
-        # Clean data first if corrupted
-        data_str = self.clean_corrupted_sensor_data(data_str)
-        
-        # Reject empty or very short data
-        if len(data_str) < 10:
-            self.logger.debug('Rejected: Too short')
-            return False
-        
-        # Reject HTTP requests
-        http_methods = ['GET', 'POST', 'PUT', 'DELETE', 'HEAD', 'OPTIONS', 'PATCH']
-        if any(data_str.startswith(method + ' ') for method in http_methods):
-            self.logger.debug('Rejected: HTTP method detected')
-            return False
-            
-        # Reject for HTTP headers
-        http_headers = [
-            'Host:', 'User-Agent:', 'Accept:', 'Accept-Language:', 'Accept-Encoding:',
-            'Connection:', 'Content-Type:', 'Content-Length:', 'Authorization:',
-            'Cookie:', 'Cache-Control:', 'Pragma:', 'Referer:'
-        ]
-        if any(data_str.startswith(header) for header in http_headers):
-            self.logger.debug('Rejected: HTTP header detected')
-            return False
-            
-        # Reject for HTML content
-        if data_str.startswith('<') or 'html' in data_str.lower():
-            self.logger.debug('Rejected: HTML content detected')
-            return False
-        
-        # Must contain gateway id
-        if 'GW_ID:' not in data_str:
-            self.logger.debug('Rejected: No GW_ID found')
-            return False
-            
-        # Must contain type field
-        if 'TYPE:' not in data_str:
-            self.logger.debug('Rejected: No TYPE field found')
-            return False
-            
-        # Must contain id field
-        if 'ID:' not in data_str:
-            self.logger.debug('Rejected: No ID field found')
-            return False
-            
-        # Must be comma-separated key:value pairs
-        if ',' not in data_str or ':' not in data_str:
-            self.logger.debug('Rejected: No comma-separated key:value pairs found')
-            return False
-            
-        # Check for valid sensor types
-        valid_types = ['TMP']  # Add other types here as needed
-        type_found = False
-        for part in data_str.split(','):
-            if part.strip().startswith('TYPE:'):
-                sensor_type = part.split(':', 1)[1].strip()
-                self.logger.debug(f'Found sensor type: {sensor_type}')
-                if sensor_type in valid_types:
-                    type_found = True
-                    break
-                    
-        if not type_found:
-            self.logger.debug('Rejected: No valid sensor type found')
-            return False
-        
-        self.logger.debug('Validation passed: Valid sensor data')
-        return True
-
-    def parse_sensor_data(self, sensor_data_str):
-        # Clean data first if corrupted
-        sensor_data_str = self.clean_corrupted_sensor_data(sensor_data_str)
-        
-        parsed = {}
-        parts = sensor_data_str.split(',')
-        
-        for part in parts:
-            if ':' in part:
-                key, value = part.split(":", 1)
-                key = key.strip()
-                value = value.strip()
-                
-                if key and value:
-                    try:
-                        if '.' in value and value.replace('.', '').replace('-', '').isdigit():
-                            parsed[key] = float(value)
-
-                        elif value.replace('-', '').isdigit():
-                            parsed[key] = int(value)
-                            
-                        else:
-                            parsed[key] = value
-                            
-                    except (ValueError, AttributeError):
-                        parsed[key] = value
-        
+    def apply_time_correction(self, parsed):
         # Add server timestamp
-        server_time = time.strftime('%Y-%m-%d %H:%M:%S')
+        server_dt = datetime.now().replace(microsecond=0)
+        server_time = server_dt.strftime('%Y-%m-%d %H:%M:%S')
         parsed['_received_at'] = server_time
-        
+
         # Fallback if gateway time is suspicious
         gateway_time = parsed.get('Time', '')
         if gateway_time:
             try:
                 gateway_dt = datetime.strptime(gateway_time, '%Y-%m-%d %H:%M:%S')
-                server_dt = datetime.strptime(server_time, '%Y-%m-%d %H:%M:%S')
-                
+
                 time_diff = abs((gateway_dt - server_dt).days)
-                
+
                 # If difference is over a year, use server time. Gateway time resets to 2021 when it loses power.
                 if time_diff > 365:
                     self.logger.warning(f'Gateway time {gateway_time} is {time_diff} days off from server time, using server time')
@@ -274,15 +371,55 @@ class SensorServer:
 
                 else:
                     parsed['_time_corrected'] = False
-                    
+
             except (ValueError, TypeError) as e:
                 self.logger.error(f"Error parsing gateway time '{gateway_time}': {e}, using server time")
                 parsed['_original_gateway_time'] = gateway_time
                 parsed['Time'] = server_time
                 parsed['_time_corrected'] = True
-        
+
         return parsed
 
+    def build_sensor_dict(self, frame, client_id):
+        """Validate and parse a trimmed frame, returning None for non-sensor data"""
+        started_at = time.perf_counter()
+        sensor_dict, reason = self.frame_parser.parse(frame)
+        self.metrics.observe('parse_seconds', time.perf_counter() - started_at)
+
+        if sensor_dict is None:
+            gateway = self.frame_parser.peek_gateway(frame)
+            gateway = gateway if gateway in self.known_gateways else UNKNOWN_GATEWAY
+
+            self.metrics.inc('frames_received_total', (gateway,))
+            self.metrics.inc('frames_rejected_total', (gateway, reason))
+            self.logger.info('Ignoring non-sensor data from %s (%s): %r...', client_id, reason, frame[:100])
+            return None
+
+        gateway = str(sensor_dict.get('GW_ID'))
+        self.known_gateways.add(gateway)
+        self.metrics.inc('frames_received_total', (gateway,))
+
+        # Keyed on the gateway's own Time, so this runs before time correction replaces it
+        if self.dedup.is_duplicate(sensor_dict):
+            self.metrics.inc('readings_duplicate_total', (gateway,))
+            self.logger.debug('Dropping duplicate reading from %s: ID %s, SN %s', client_id, sensor_dict.get('ID'), sensor_dict.get('SN'))
+            return None
+
+        if self.deadband and not self.deadband.should_forward(sensor_dict):
+            self.metrics.inc('readings_suppressed_total', (gateway,))
+            return None
+
+        # Parse with time correction
+        self.apply_time_correction(sensor_dict)
+        sensor_dict['_client_id'] = client_id
+
+        self.logger.debug('Parsed sensor data from %s: %s', client_id, sensor_dict)
+
+        if self.enable_auto_restart:
+            self.activity_monitor.update_activity()
+
+        return sensor_dict
+
     def handle_client_connection(self, client_socket, address):
         client_id = f'{address[0]}:{address[1]}'
         self.logger.info(f'Handling connection from {client_id}')
@@ -292,12 +429,12 @@ class SensorServer:
 
         try:
             client_socket.settimeout(self.connection_timeout)
-            buffer = b''
+            frame_buffer = self.new_frame_buffer(client_id)
             gateway_handshake_done = False
             
             while self.running:
                 try:
-                    data = client_socket.recv(1024)
+                    data = client_socket.recv(self.read_size)
                     if not data:
                         self.logger.info(f'Client {client_id} disconnected')
                         self.synced_gateways.discard(client_id) # Remove from synced gateways when disconnected
@@ -306,8 +443,7 @@ class SensorServer:
                     if self.enable_auto_restart:
                         self.activity_monitor.update_activity()
                         
-                    self.logger.debug(f'Received raw data from {client_id}: {data}')
-                    self.logger.debug(f'Raw data hex from {client_id}: {data.hex()}')
+                    self.raw_sampler.log_raw(client_id, data)
                     
                     # Check for gateway connection request
                     if self.is_gateway_connection_request(data):
@@ -317,49 +453,31 @@ class SensorServer:
 
                         continue
                     
-                    buffer += data
-
-                    while b'\r\n' in buffer:
-                        message, buffer = buffer.split(b'\r\n', 1)
-                        
-                        if message:
-                            try:
-                                # Decode sensor data
-                                decoded_str = self.decode_sensor_data(message).strip()
-                                self.logger.debug(f'Decoded string from {client_id}: {repr(decoded_str)}')
-                                
-                                if not decoded_str:
-                                    continue
-
-                                # Check if this might be a late gateway identification
-                                if self.gateway_name in decoded_str and not gateway_handshake_done:
-                                    self.logger.info(f'LATE GATEWAY DETECTION: Found {self.gateway_name} in sensor data')
-                                    self.handle_gateway_connection(client_socket, client_id, message)
-                                    gateway_handshake_done = True
-                                    continue
-
-                                # Validate sensor data
-                                if not self.is_valid_sensor_data(decoded_str):
-                                    self.logger.info(f'Ignoring non-sensor data from {client_id}: {decoded_str[:100]}...')
-                                    continue
-
-                                self.logger.info(f'Valid sensor data from {client_id}: {decoded_str}')
-                                
-                                # Parse with time correction
-                                sensor_dict = self.parse_sensor_data(decoded_str)
-                                sensor_dict['_client_id'] = client_id
-                                
-                                self.logger.info(f'Parsed sensor data from {client_id}: {sensor_dict}')
-                                
-                                if self.enable_auto_restart:
-                                    self.activity_monitor.update_activity()
-                                    
-                                self.forward_to_erpnext(sensor_dict, client_id)
-                                
-                            except Exception as e:
-                                self.logger.error(f'Error processing message from {client_id}: {e}')
-                                self.logger.error(f'Raw message that caused error: {message}')
-                                
+                    for message in frame_buffer.feed(data):
+                        try:
+                            frame = self.frame_parser.trim(message)
+                            self.logger.debug('Frame from %s: %r', client_id, frame)
+
+                            if not frame or frame.isspace():
+                                continue
+
+                            # Check if this might be a late gateway identification
+                            if self.gateway_name_bytes in frame and not gateway_handshake_done:
+                                self.logger.info(f'LATE GATEWAY DETECTION: Found {self.gateway_name} in sensor data')
+                                self.handle_gateway_connection(client_socket, client_id, message)
+                                gateway_handshake_done = True
+                                continue
+
+                            sensor_dict = self.build_sensor_dict(frame, client_id)
+                            if not sensor_dict:
+                                continue
+
+                            self.forward_queue.submit(sensor_dict, client_id)
+                            
+                        except Exception as e:
+                            self.logger.error(f'Error processing message from {client_id}: {e}')
+                            self.logger.error(f'Raw message that caused error: {message}')
+                            
                 except socket.timeout:
                     continue
                 
@@ -379,67 +497,143 @@ class SensorServer:
             except:
                 pass
 
-    def decode_sensor_data(self, data_bytes: bytes) -> str:
-        try:
-            self.logger.debug(f'Decoding bytes: {data_bytes}')
-            self.logger.debug(f'Bytes as hex: {data_bytes.hex()}')
-
-            start_idx = 0
-            for marker in (b'GW_ID', b'%X', b'GW:'):
-                idx = data_bytes.find(marker)
-                if idx != -1:
-                    start_idx = idx
-                    break
-
-            processed = data_bytes[start_idx:]
-            processed = processed.replace(b'\xa1\xe6', '℃'.encode('utf-8'))
-
-            try:
-                text = processed.decode('utf-8')
-                text = text.replace('â\x84\x83', '℃').replace('\xa0', ' ')
-                self.logger.debug(f'Successfully decoded as UTF-8: {repr(text)}')
-                return text
-
-            except UnicodeDecodeError:
-                text = processed.decode('latin-1')
-                text = text.replace('â\x84\x83', '℃').replace('\xa0', ' ')
-                self.logger.debug(f'Successfully decoded as latin-1: {repr(text)}')
-                return text
-
-        except Exception as e:
-            self.logger.error(f'Failed to decode sensor data: {e}')
-            self.logger.error(f'Original bytes: {data_bytes}')
-            return repr(data_bytes)
-
     def forward_to_erpnext(self, sensor_data, client_id):
         for attempt in range(self.retry_attempts):
             try:
-                endpoint = self.frappe_client.get_api_url_from_server()
+                endpoint = self.get_api_url()
                 if not endpoint:
                     self.logger.error(f'No API endpoint available for {client_id}')
                     return False
                 
-                success = self.frappe_client.forward_sensor_data(sensor_data)
+                if attempt:
+                    self.metrics.inc('forward_retries_total')
+
+                started_at = time.perf_counter()
+                success = self.frappe_client.forward_sensor_data(sensor_data, retries=0)
+                self.metrics.observe('frappe_request_seconds', time.perf_counter() - started_at, ('single',))
+
                 if success:
                     if self.enable_auto_restart:
                         self.activity_monitor.update_activity()
 
                     return True
 
-                if attempt < self.retry_attempts - 1:
-                    time.sleep(self.retry_delay)
-                    
             except Exception as e:
                 self.logger.error(f'Error forwarding data from {client_id} (attempt {attempt + 1}): {e}')
-                if attempt < self.retry_attempts - 1:
-                    time.sleep(self.retry_delay)
+
+            if not self.wait_before_retry(attempt):
+                break
                 
         return False
 
+    def wait_before_retry(self, attempt):
+        """Back off before the next attempt; False when there is none or Frappe is known to be down"""
+        if attempt >= self.retry_attempts - 1:
+            return False
+
+        if self.frappe_client.circuit.is_open() and not (self.direct_ingest and self.direct_ingest.is_available()):
+            return False
+
+        # Shutdown cuts the backoff short, so the batch reaches ForwardQueue.stop() and the spool in time
+        return not self.forward_queue.stop_event.wait(self.frappe_client.backoff_delay(attempt))
+
+    def forward_batch_to_erpnext(self, batch):
+        """Forward (sensor_data, client_id) pairs: True when stored, None when rejected, False to retry later"""
+        if self.batch_size <= 1 and not self.direct_ingest:
+            outcome = [self.forward_to_erpnext(sensor_data, client_id) for sensor_data, client_id in batch]
+
+        else:
+            outcome = self.send_batch(batch)
+
+        for (sensor_data, _client_id), result in zip(batch, outcome):
+            if result:
+                series = 'readings_forwarded_total'
+
+            elif result is None:
+                series = 'readings_rejected_total'
+
+            else:
+                series = 'readings_failed_total'
+
+            self.metrics.inc(series, (str(sensor_data.get('GW_ID')),))
+
+        return outcome
+
+    def send_batch(self, batch):
+        outcome = [False] * len(batch)
+        pending = list(range(len(batch)))
+
+        for attempt in range(self.retry_attempts):
+            try:
+                if attempt:
+                    self.metrics.inc('forward_retries_total')
+
+                readings = [batch[index][0] for index in pending]
+                results = self.ingest_directly(readings)
+
+                if results is None:
+                    endpoint = self.get_api_url()
+                    if not endpoint:
+                        self.logger.error(f'No API endpoint available for batch of {len(pending)} readings')
+                        return outcome
+
+                    started_at = time.perf_counter()
+                    results = self.frappe_client.forward_sensor_data_batch(readings, retries=0)
+                    self.metrics.observe('frappe_request_seconds', time.perf_counter() - started_at, ('batch',))
+
+                if results is not None:
+                    retry = []
+                    results_by_position = {result.get('index'): result for result in results}
+
+                    for position, index in enumerate(pending):
+                        result = results_by_position.get(position, {})
+                        status = result.get('status')
+
+                        if status in (200, 202):
+                            outcome[index] = True
+
+                        elif not status or status >= 500:
+                            retry.append(index)
+
+                        else:
+                            outcome[index] = None # Rejected by Frappe, retrying or spooling will not help
+                            self.logger.warning(
+                                f'Reading from {batch[index][1]} rejected ({status}): {result.get("error")}'
+                            )
+
+                    pending = retry
+                    if not pending:
+                        if self.enable_auto_restart:
+                            self.activity_monitor.update_activity()
+
+                        break
+
+            except Exception as e:
+                self.logger.error(f'Error forwarding batch of {len(pending)} readings (attempt {attempt + 1}): {e}')
+
+            if not self.wait_before_retry(attempt):
+                break
+
+        return outcome
+
+    def ingest_directly(self, readings):
+        """Per-reading results from the in-process path, or None when the HTTP path should be used"""
+        if not self.direct_ingest:
+            return None
+
+        started_at = time.perf_counter()
+        results = self.direct_ingest.forward_sensor_data_batch(readings)
+        if results is not None:
+            self.metrics.observe('frappe_request_seconds', time.perf_counter() - started_at, ('direct',))
+
+        return results
+
     def start_server(self):
         try:
             self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            if self.reuse_port:
+                self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
             
             try:
                 self.server_socket.bind((self.host, self.port))
@@ -456,6 +650,8 @@ class SensorServer:
             
             self.server_socket.listen(self.max_clients)
             self.running = True
+            self.load_settings()
+            self.start_forwarding()
 
             if self.enable_auto_restart:
                 self.activity_monitor.start_monitoring(self.request_restart)
@@ -464,13 +660,6 @@ class SensorServer:
             self.logger.info(f'Sensor server listening on {self.host}:{self.port}')
             self.logger.info(f'Max clients: {self.max_clients}, Connection timeout: {self.connection_timeout}s')
             
-            test_url = self.frappe_client.get_api_url_from_server()
-            if test_url:
-                self.logger.info(f'API endpoint ready: {test_url}')
-
-            else:
-                self.logger.warning('Could not fetch API endpoint - will retry when data arrives')
-            
             while self.running:
                 try:
                     client_sock, address = self.server_socket.accept()
@@ -505,6 +694,50 @@ class SensorServer:
         finally:
             self.shutdown()
 
+    def start_forwarding(self):
+        if self.metrics_port:
+            self.metrics_server = MetricsServer(
+                self.logger,
+                self.metrics,
+                host=os.getenv('SENSOR_SERVER_METRICS_HOST', '127.0.0.1'),
+                port=self.metrics_port + int(self.worker_id or 0)
+            )
+            self.metrics_server.start()
+
+        if self.deadband:
+            self.deadband.start()
+
+        self.settings.start()
+        self.spool.open()
+        self.forward_queue.start()
+        self.spool.start_replay(self.forward_batch_to_erpnext, self.is_frappe_available)
+
+    def is_healthy(self):
+        return self.running and not self.shutdown_called
+
+    def is_frappe_available(self):
+        if self.direct_ingest and self.direct_ingest.is_available():
+            return True
+
+        return self.settings.refresh() and bool(self.settings.get('api_url'))
+
+    def stop_forwarding(self):
+        unsent = self.forward_queue.stop()
+        if unsent:
+            self.logger.warning(f'Spooling {len(unsent)} queued readings that were not forwarded before shutdown')
+            self.spool.append(unsent)
+
+        self.spool.close()
+        self.settings.stop()
+        self.logger.info(f'DEDUP: {self.dedup.get_stats()}')
+
+        if self.deadband:
+            self.deadband.stop()
+            self.logger.info(f'DEADBAND: {self.deadband.get_stats()}')
+
+        if self.metrics_server:
+            self.metrics_server.stop()
+
     def request_restart(self):
         self.logger.info('Restart requested due to inactivity')
         self.restart_requested = True
@@ -534,6 +767,8 @@ class SensorServer:
             
             for thread in active_threads:
                 thread.join(timeout=5)
+
+        self.stop_forwarding()
                 
         self.logger.info('Server shutdown complete')
 
@@ -543,6 +778,7 @@ def main():
     logger.info('Starting Sensor Server...')
 
     load_env_file(logger)
+    logger.setLevel(get_log_level()) # The level may come from the env file
     
     def is_port_in_use(port):
         with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
@@ -562,28 +798,76 @@ def main():
         logger.error('Kill the existing process or use a different port.')
         sys.exit(1)
     
-    server = SensorServer(host='0.0.0.0', port=port)
-
-    def signal_handler(signum, frame):
-        signal_name = signal.Signals(signum).name
-        logger.info(f'Received {signal_name} signal, shutting down gracefully...')
-        server.shutdown()
-        sys.exit(0)
-    
-    signal.signal(signal.SIGINT, signal_handler)   # Ctrl+C
-    signal.signal(signal.SIGTERM, signal_handler)  # Termination signal
-    
-    try:
-        server.start_server()
-        
-    except KeyboardInterrupt:
-        logger.info('Received keyboard interrupt')
+    def create_server(reuse_port=False):
+        engine = os.getenv('SENSOR_SERVER_ENGINE', 'threaded').lower()
+        if engine == 'asyncio':
+            from .async_server import AsyncSensorServer
+            server = AsyncSensorServer(host='0.0.0.0', port=port)
+
+        else:
+            engine = 'threaded'
+            server = SensorServer(host='0.0.0.0', port=port)
+
+        server.reuse_port = reuse_port
+        server.logger.info(f'Using {engine} engine')
+        return server
+
+    def install_signal_handlers(target, logger):
+        def signal_handler(signum, frame):
+            signal_name = signal.Signals(signum).name
+
+            # Workers get both the group's SIGINT and the supervisor's SIGTERM; let the first one finish
+            if target.shutdown_called:
+                logger.info(f'Received {signal_name} signal, shutdown already in progress')
+                return
+
+            logger.info(f'Received {signal_name} signal, shutting down gracefully...')
+            target.shutdown()
+            sys.exit(0)
         
-    except Exception as e:
-        logger.error(f'Server error: {e}')
+        signal.signal(signal.SIGINT, signal_handler)   # Ctrl+C
+        signal.signal(signal.SIGTERM, signal_handler)  # Termination signal
+
+    def serve(server, logger):
+        install_signal_handlers(server, logger)
         
-    finally:
-        server.shutdown()
+        try:
+            server.start_server()
+            
+        except KeyboardInterrupt:
+            logger.info('Received keyboard interrupt')
+            
+        except Exception as e:
+            logger.error(f'Server error: {e}')
+            
+        finally:
+            server.shutdown()
+
+    def run_worker(worker_id, start_heartbeat):
+        os.environ['SENSOR_SERVER_WORKER_ID'] = str(worker_id)
+        worker_logger = setup_logging() # The log listener thread does not survive fork
+
+        try:
+            server = create_server(reuse_port=True)
+            start_heartbeat(server.is_healthy)
+            serve(server, worker_logger)
+
+        finally:
+            stop_logging()
+
+    workers = int(os.getenv('SENSOR_SERVER_WORKERS', 1))
+    if workers > 1:
+        supervisor = WorkerSupervisor(
+            logger,
+            workers,
+            run_worker,
+            heartbeat_timeout=float(os.getenv('SENSOR_SERVER_WORKER_HEARTBEAT_TIMEOUT', 30))
+        )
+        install_signal_handlers(supervisor, logger)
+        supervisor.run()
+
+    else:
+        serve(create_server(), logger)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
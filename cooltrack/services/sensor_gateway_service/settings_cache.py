@@ -0,0 +1,116 @@
+import time
+import logging
+import threading
+from types import MappingProxyType
+from typing import Optional, Callable, Dict, Any, List, Mapping, Tuple
+
+class SettingsCache:
+    """Local copy of Cool Track Settings kept fresh by a background thread.
+
+    The refresh thread sends the modified timestamp of the copy it holds, so an unchanged document
+    costs Frappe a 304 and no payload. Each change is published by swapping in a new read-only mapping,
+    so readers on the hot path take the current snapshot without a lock and never wait on Frappe; a
+    failed refresh keeps serving the last good snapshot and is retried sooner.
+    """
+
+    def __init__(
+        self,
+        logger: logging.Logger,
+        fetch: Callable[[Optional[str]], Tuple[bool, Optional[Dict[str, Any]]]],
+        refresh_interval: float = 30.0,
+        retry_interval: float = 5.0
+    ) -> None:
+        self.logger: logging.Logger = logger
+        self.fetch: Callable[[Optional[str]], Tuple[bool, Optional[Dict[str, Any]]]] = fetch
+        self.refresh_interval: float = refresh_interval
+        self.retry_interval: float = retry_interval
+
+        self.snapshot: Mapping[str, Any] = MappingProxyType({})
+        self.modified: Optional[str] = None
+        self.listeners: List[Callable[[Mapping[str, Any]], None]] = []
+
+        self.refresh_thread: Optional[threading.Thread] = None
+        self.stop_event: threading.Event = threading.Event()
+        self.wake_event: threading.Event = threading.Event()
+
+        self.loaded_at: float = 0.0
+        self.changes: int = 0
+        self.not_modified: int = 0
+        self.failures: int = 0
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.snapshot.get(key, default)
+
+    def on_change(self, listener: Callable[[Mapping[str, Any]], None]) -> None:
+        self.listeners.append(listener)
+
+    def start(self) -> None:
+        self.stop_event.clear()
+        self.refresh_thread = threading.Thread(target=self._refresh_loop, daemon=True, name='SettingsRefresh')
+        self.refresh_thread.start()
+
+    def stop(self) -> None:
+        self.stop_event.set()
+        self.wake_event.set()
+
+        if self.refresh_thread:
+            self.refresh_thread.join(timeout=5)
+            self.refresh_thread = None
+
+    def request_refresh(self) -> None:
+        """Ask the refresh thread to check now; never blocks the caller"""
+        self.wake_event.set()
+
+    def refresh(self) -> bool:
+        try:
+            changed, payload = self.fetch(self.modified)
+
+        except Exception as e:
+            self.failures += 1
+            self.logger.warning(f'SETTINGS: Refresh failed, keeping {"last snapshot" if self.modified else "no settings"}: {e}')
+            return False
+
+        self.apply(changed, payload)
+        return True
+
+    def apply(self, changed: bool, payload: Optional[Dict[str, Any]]) -> None:
+        """Publish the result of a fetch made elsewhere (e.g. an async first load)"""
+        self.loaded_at = time.monotonic()
+
+        if not changed:
+            self.not_modified += 1
+            return
+
+        self.snapshot = MappingProxyType(dict(payload.get('settings') or {}))
+        self.modified = payload.get('modified')
+        self.changes += 1
+        self.logger.info(f'SETTINGS: Loaded Cool Track Settings modified {self.modified}')
+
+        for listener in self.listeners:
+            try:
+                listener(self.snapshot)
+
+            except Exception as e:
+                self.logger.error(f'SETTINGS: Listener error: {e}')
+
+    def _refresh_loop(self) -> None:
+        # The server makes the first load at startup; retry sooner if that one failed
+        interval: float = self.refresh_interval if self.modified else self.retry_interval
+
+        while not self.stop_event.is_set():
+            self.wake_event.wait(timeout=interval)
+            self.wake_event.clear()
+
+            if self.stop_event.is_set():
+                break
+
+            interval = self.refresh_interval if self.refresh() else self.retry_interval
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'modified': self.modified,
+            'age_s': round(time.monotonic() - self.loaded_at, 1) if self.loaded_at else None,
+            'changes': self.changes,
+            'not_modified': self.not_modified,
+            'failures': self.failures
+        }
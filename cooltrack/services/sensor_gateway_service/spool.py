@@ -0,0 +1,296 @@
+import os
+import json
+import time
+import logging
+import threading
+from typing import Optional, Callable, Dict, Any, List, Tuple
+
+class ReadingSpool:
+    """Append-only on-disk spool of unsent readings, replayed in order once Frappe is reachable again.
+
+    Readings are written as JSON lines into numbered segment files. A checkpoint records how far
+    replay has been acknowledged; segments behind the checkpoint are deleted.
+    """
+
+    def __init__(
+        self,
+        logger: logging.Logger,
+        spool_dir: str = './spool',
+        segment_max_bytes: int = 4 * 1024 * 1024,
+        fsync_interval: float = 1.0,
+        replay_batch_size: int = 200,
+        replay_rate: float = 100.0,
+        probe_interval: float = 10.0
+    ) -> None:
+        self.logger: logging.Logger = logger
+        self.spool_dir: str = spool_dir
+        self.segment_max_bytes: int = segment_max_bytes
+        self.fsync_interval: float = fsync_interval
+        self.replay_batch_size: int = max(1, replay_batch_size)
+        self.replay_rate: float = replay_rate
+        self.probe_interval: float = probe_interval
+
+        self.checkpoint_path: str = os.path.join(spool_dir, 'checkpoint.json')
+        self.write_lock: threading.Lock = threading.Lock()
+        self.write_file = None
+        self.write_segment: int = 0
+        self.last_fsync: float = 0.0
+        self.dirty: bool = False
+
+        self.ack_segment: int = 0
+        self.ack_offset: int = 0
+
+        self.replay_thread: Optional[threading.Thread] = None
+        self.stop_event: threading.Event = threading.Event()
+        self.wake_event: threading.Event = threading.Event()
+
+        self.spooled: int = 0
+        self.replayed: int = 0
+        self.discarded: int = 0
+
+    def segment_path(self, segment: int) -> str:
+        return os.path.join(self.spool_dir, f'segment-{segment:012d}.jsonl')
+
+    def list_segments(self) -> List[int]:
+        segments: List[int] = []
+        for filename in os.listdir(self.spool_dir):
+            if filename.startswith('segment-') and filename.endswith('.jsonl'):
+                segments.append(int(filename[len('segment-'):-len('.jsonl')]))
+
+        return sorted(segments)
+
+    def open(self) -> None:
+        os.makedirs(self.spool_dir, exist_ok=True)
+        self.load_checkpoint()
+
+        segments: List[int] = self.list_segments()
+        for segment in [segment for segment in segments if segment < self.ack_segment]:
+            self.compact_segment(segment)
+            segments.remove(segment)
+
+        if segments and segments[0] > self.ack_segment:
+            self.ack_segment, self.ack_offset = segments[0], 0
+
+        # Never append to a segment written by a previous process: it may end in a torn line
+        self.write_segment = (segments[-1] + 1) if segments else self.ack_segment + 1
+        if not segments:
+            self.ack_segment, self.ack_offset = self.write_segment, 0
+
+        self.write_file = open(self.segment_path(self.write_segment), 'ab')
+
+        pending: int = len(segments)
+        if pending:
+            self.logger.warning(f'SPOOL: Found {pending} segments with unsent readings in {self.spool_dir}')
+
+        self.logger.info(f'SPOOL: Opened {self.spool_dir} (writing segment {self.write_segment})')
+
+    def load_checkpoint(self) -> None:
+        try:
+            with open(self.checkpoint_path, 'r') as f:
+                checkpoint: Dict[str, int] = json.load(f)
+                self.ack_segment = int(checkpoint.get('segment', 0))
+                self.ack_offset = int(checkpoint.get('offset', 0))
+
+        except FileNotFoundError:
+            self.ack_segment, self.ack_offset = 0, 0
+
+        except (ValueError, OSError) as e:
+            self.logger.error(f'SPOOL: Unreadable checkpoint, replaying from the oldest segment: {e}')
+            self.ack_segment, self.ack_offset = 0, 0
+
+    def save_checkpoint(self) -> None:
+        tmp_path: str = f'{self.checkpoint_path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'segment': self.ack_segment, 'offset': self.ack_offset}, f)
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def append(self, items: List[Tuple[Dict[str, Any], str]]) -> None:
+        if not items:
+            return
+
+        lines: bytes = b''.join(
+            json.dumps({'data': sensor_data, 'client_id': client_id}, default=str).encode('utf-8') + b'\n'
+            for sensor_data, client_id in items
+        )
+
+        with self.write_lock:
+            if not self.write_file:
+                self.logger.error(f'SPOOL: Not open, lost {len(items)} readings')
+                return
+
+            self.write_file.write(lines)
+            self.write_file.flush()
+            self.dirty = True
+            self.spooled += len(items)
+
+            # fsync is batched: at most once per interval rather than once per reading
+            if time.monotonic() - self.last_fsync >= self.fsync_interval:
+                self._fsync()
+
+            if self.write_file.tell() >= self.segment_max_bytes:
+                self._rotate()
+
+        self.wake_event.set()
+
+    def _fsync(self) -> None:
+        if self.write_file and self.dirty:
+            os.fsync(self.write_file.fileno())
+            self.dirty = False
+
+        self.last_fsync = time.monotonic()
+
+    def _rotate(self) -> None:
+        self._fsync()
+        self.write_file.close()
+        self.write_segment += 1
+        self.write_file = open(self.segment_path(self.write_segment), 'ab')
+
+    def has_pending(self) -> bool:
+        with self.write_lock:
+            if self.ack_segment < self.write_segment:
+                return True
+
+            return self.write_file is not None and self.ack_offset < self.write_file.tell()
+
+    def read_pending(self) -> Tuple[List[Tuple[Dict[str, Any], str]], List[int]]:
+        """Read the next chunk after the checkpoint; returns the items and the file offset after each one"""
+        with self.write_lock:
+            self._fsync()
+
+            # Seal the active segment once replay has caught up with it so it can be compacted
+            if self.ack_segment == self.write_segment and self.write_file.tell() > 0:
+                self._rotate()
+
+        items: List[Tuple[Dict[str, Any], str]] = []
+        offsets: List[int] = []
+
+        while not items and self.ack_segment < self.write_segment:
+            path: str = self.segment_path(self.ack_segment)
+            if not os.path.exists(path):
+                self.ack_segment, self.ack_offset = self.ack_segment + 1, 0
+                continue
+
+            with open(path, 'rb') as f:
+                f.seek(self.ack_offset)
+                offset: int = self.ack_offset
+
+                while len(items) < self.replay_batch_size:
+                    line: bytes = f.readline()
+                    if not line or not line.endswith(b'\n'):
+                        break
+
+                    offset += len(line)
+
+                    try:
+                        record: Dict[str, Any] = json.loads(line)
+                        items.append((record['data'], record.get('client_id', 'spool')))
+                        offsets.append(offset)
+
+                    except (ValueError, KeyError):
+                        self.discarded += 1
+                        self.logger.error(f'SPOOL: Skipping corrupt record in segment {self.ack_segment}')
+
+            if not items:
+                self.compact_segment(self.ack_segment)
+                self.ack_segment, self.ack_offset = self.ack_segment + 1, 0
+                self.save_checkpoint()
+
+        return items, offsets
+
+    def acknowledge(self, offset: int) -> None:
+        self.ack_offset = offset
+        self.save_checkpoint()
+
+    def compact_segment(self, segment: int) -> None:
+        try:
+            os.remove(self.segment_path(segment))
+            self.logger.info(f'SPOOL: Compacted acknowledged segment {segment}')
+
+        except FileNotFoundError:
+            pass
+
+    def start_replay(
+        self,
+        replay_callback: Callable[[List[Tuple[Dict[str, Any], str]]], List[Optional[bool]]],
+        is_available: Callable[[], bool]
+    ) -> None:
+        self.stop_event.clear()
+        self.replay_thread = threading.Thread(
+            target=self._replay,
+            args=(replay_callback, is_available),
+            daemon=True,
+            name='SpoolReplay'
+        )
+        self.replay_thread.start()
+
+    def _replay(
+        self,
+        replay_callback: Callable[[List[Tuple[Dict[str, Any], str]]], List[Optional[bool]]],
+        is_available: Callable[[], bool]
+    ) -> None:
+        while not self.stop_event.is_set():
+            try:
+                if not self.has_pending():
+                    self.wake_event.wait(timeout=self.probe_interval)
+                    self.wake_event.clear()
+                    continue
+
+                if not is_available():
+                    self.stop_event.wait(timeout=self.probe_interval)
+                    continue
+
+                items, offsets = self.read_pending()
+                if not items:
+                    continue
+
+                results: List[Optional[bool]] = replay_callback(items)
+
+                # Only acknowledge the unbroken prefix that was accepted (or permanently rejected)
+                acknowledged: int = 0
+                for result in results:
+                    if result is False:
+                        break
+
+                    acknowledged += 1
+
+                if acknowledged:
+                    self.acknowledge(offsets[acknowledged - 1])
+                    self.replayed += acknowledged
+                    self.logger.info(f'SPOOL: Replayed {acknowledged} readings')
+
+                if acknowledged < len(items):
+                    self.stop_event.wait(timeout=self.probe_interval)
+                    continue
+
+                if self.replay_rate > 0:
+                    self.stop_event.wait(timeout=len(items) / self.replay_rate)
+
+            except Exception as e:
+                self.logger.error(f'SPOOL: Replay error: {e}')
+                self.stop_event.wait(timeout=self.probe_interval)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'spooled': self.spooled,
+            'replayed': self.replayed,
+            'discarded': self.discarded,
+            'pending_segments': max(0, self.write_segment - self.ack_segment + 1) if self.has_pending() else 0
+        }
+
+    def close(self) -> None:
+        self.stop_event.set()
+        self.wake_event.set()
+
+        if self.replay_thread and self.replay_thread.is_alive():
+            self.replay_thread.join(timeout=5)
+
+        with self.write_lock:
+            if self.write_file:
+                self._fsync()
+                self.write_file.close()
+                self.write_file = None
+
+        self.logger.info(f'SPOOL: Closed ({self.get_stats()})')
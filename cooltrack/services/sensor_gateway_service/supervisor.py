@@ -0,0 +1,221 @@
+import os
+import time
+import fcntl
+import select
+import signal
+import logging
+import threading
+from typing import Callable, Dict, List, Optional
+
+class WorkerSupervisor:
+    """Forks N sensor server workers that share the listening port through SO_REUSEPORT.
+
+    Each worker writes a heartbeat byte to its own pipe while it reports itself healthy. Workers that
+    exit, or stop sending heartbeats for heartbeat_timeout seconds, are killed and started again.
+    A gateway connection lives entirely inside the worker the kernel handed it to, so per-connection
+    state such as the time-synced gateway set needs no sharing between workers.
+    """
+
+    def __init__(
+        self,
+        logger: logging.Logger,
+        worker_count: int,
+        run_worker: Callable[[int, Callable[[Callable[[], bool]], None]], None],
+        heartbeat_interval: float = 5.0,
+        heartbeat_timeout: float = 30.0,
+        restart_delay: float = 1.0,
+        max_restart_delay: float = 60.0
+    ) -> None:
+        self.logger: logging.Logger = logger
+        self.worker_count: int = worker_count
+        self.run_worker: Callable[[int, Callable[[Callable[[], bool]], None]], None] = run_worker
+        self.heartbeat_interval: float = heartbeat_interval
+        self.heartbeat_timeout: float = heartbeat_timeout
+        self.restart_delay: float = restart_delay
+        self.max_restart_delay: float = max_restart_delay
+
+        self.workers: Dict[int, int] = {}            # worker_id -> pid
+        self.pipes: Dict[int, int] = {}              # worker_id -> heartbeat read fd
+        self.last_heartbeat: Dict[int, float] = {}
+        self.started_at: Dict[int, float] = {}
+        self.restarts: Dict[int, int] = {}
+        self.next_start: Dict[int, float] = {}
+        self.running: bool = False
+        self.shutdown_called: bool = False
+
+    def spawn(self, worker_id: int) -> None:
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+
+        if pid == 0:
+            os.close(read_fd)
+            for fd in self.pipes.values():
+                os.close(fd)
+
+            # Let the worker's own signal handlers take over from the supervisor's
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+            exit_code = 0
+            try:
+                self.run_worker(worker_id, lambda is_healthy: self.start_heartbeat(write_fd, is_healthy))
+
+            except SystemExit as e:
+                exit_code = e.code if isinstance(e.code, int) else 0
+
+            except BaseException:
+                exit_code = 1
+
+            finally:
+                os._exit(exit_code)
+
+        os.close(write_fd)
+        fcntl.fcntl(read_fd, fcntl.F_SETFL, fcntl.fcntl(read_fd, fcntl.F_GETFL) | os.O_NONBLOCK)
+
+        self.workers[worker_id] = pid
+        self.pipes[worker_id] = read_fd
+        self.last_heartbeat[worker_id] = time.monotonic()
+        self.started_at[worker_id] = time.monotonic()
+        self.logger.info(f'SUPERVISOR: Started worker {worker_id} (pid {pid})')
+
+    def start_heartbeat(self, write_fd: int, is_healthy: Callable[[], bool]) -> None:
+        """Runs inside a worker: heartbeat for as long as the server reports itself healthy"""
+        def beat():
+            while True:
+                if is_healthy():
+                    try:
+                        os.write(write_fd, b'.')
+
+                    except OSError:
+                        return
+
+                time.sleep(self.heartbeat_interval)
+
+        threading.Thread(target=beat, daemon=True, name='SupervisorHeartbeat').start()
+
+    def run(self) -> None:
+        self.running = True
+        for worker_id in range(self.worker_count):
+            self.spawn(worker_id)
+
+        self.logger.info(f'SUPERVISOR: Running {self.worker_count} workers')
+
+        try:
+            while self.running:
+                self.read_heartbeats()
+                self.reap_workers()
+                self.check_heartbeats()
+                self.restart_workers()
+
+        finally:
+            self.shutdown()
+
+    def read_heartbeats(self) -> None:
+        fds: List[int] = list(self.pipes.values())
+        if not fds:
+            time.sleep(self.heartbeat_interval / 5)
+            return
+
+        try:
+            readable, _, _ = select.select(fds, [], [], self.heartbeat_interval / 5)
+
+        except InterruptedError:
+            return
+
+        now = time.monotonic()
+        for worker_id, fd in list(self.pipes.items()):
+            if fd not in readable:
+                continue
+
+            try:
+                if os.read(fd, 4096):
+                    self.last_heartbeat[worker_id] = now
+
+            except BlockingIOError:
+                pass
+
+    def reap_workers(self) -> None:
+        while self.workers:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+
+            except ChildProcessError:
+                return
+
+            if pid == 0:
+                return
+
+            worker_id = next((wid for wid, wpid in self.workers.items() if wpid == pid), None)
+            if worker_id is None:
+                continue
+
+            self.forget(worker_id)
+            if not self.running:
+                continue
+
+            # Back off on crash loops; a worker that stayed up for a while starts from scratch
+            if time.monotonic() - self.started_at.get(worker_id, 0) > self.max_restart_delay:
+                self.restarts[worker_id] = 0
+
+            self.restarts[worker_id] = self.restarts.get(worker_id, 0) + 1
+            delay = min(self.max_restart_delay, self.restart_delay * 2 ** (self.restarts[worker_id] - 1))
+            self.next_start[worker_id] = time.monotonic() + delay
+            self.logger.warning(
+                f'SUPERVISOR: Worker {worker_id} (pid {pid}) exited with status {os.waitstatus_to_exitcode(status)}, '
+                f'restarting in {delay:.0f}s'
+            )
+
+    def check_heartbeats(self) -> None:
+        now = time.monotonic()
+        for worker_id, pid in list(self.workers.items()):
+            if now - self.last_heartbeat.get(worker_id, now) > self.heartbeat_timeout:
+                self.logger.error(f'SUPERVISOR: Worker {worker_id} (pid {pid}) missed heartbeats, killing it')
+                self.signal_worker(pid, signal.SIGKILL)
+                self.last_heartbeat[worker_id] = now # Reaped and restarted on a later pass
+
+    def restart_workers(self) -> None:
+        now = time.monotonic()
+        for worker_id, start_at in list(self.next_start.items()):
+            if now >= start_at:
+                del self.next_start[worker_id]
+                self.spawn(worker_id)
+
+    def forget(self, worker_id: int) -> None:
+        self.workers.pop(worker_id, None)
+        fd: Optional[int] = self.pipes.pop(worker_id, None)
+        if fd is not None:
+            os.close(fd)
+
+    def signal_worker(self, pid: int, signum: int) -> None:
+        try:
+            os.kill(pid, signum)
+
+        except ProcessLookupError:
+            pass
+
+    def stop_workers(self, grace_period: float = 30.0) -> None:
+        for pid in self.workers.values():
+            self.signal_worker(pid, signal.SIGTERM)
+
+        deadline = time.monotonic() + grace_period
+        while self.workers and time.monotonic() < deadline:
+            self.reap_workers()
+            time.sleep(0.1)
+
+        for worker_id, pid in list(self.workers.items()):
+            self.logger.error(f'SUPERVISOR: Worker {worker_id} (pid {pid}) did not stop in time, killing it')
+            self.signal_worker(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+            self.forget(worker_id)
+
+        self.logger.info('SUPERVISOR: All workers stopped')
+
+    def shutdown(self) -> None:
+        """Forward SIGTERM to every worker and wait for them to flush their queues and spools"""
+        if self.shutdown_called:
+            return
+
+        self.shutdown_called = True
+        self.logger.info('SUPERVISOR: Shutting down workers...')
+        self.running = False
+        self.stop_workers()
@@ -1,4 +1,5 @@
 import socket
+import asyncio
 import logging
 from typing import Optional
 from datetime import datetime
@@ -60,6 +61,20 @@ class TimeSyncManager:
             self.logger.info(f'TIME SYNC: Successfully sent to gateway {client_id}')
             return True
             
+        except Exception as e:
+            self.logger.error(f'TIME SYNC: Failed to send to {client_id}: {e}')
+            return False
+
+    async def send_time_sync_async(self, writer: asyncio.StreamWriter, client_id: str) -> bool:
+        """Send time sync command to gateway over an asyncio stream"""
+        try:
+            command: bytes = self.generate_time_sync_command()
+            writer.write(command)
+            await writer.drain()
+
+            self.logger.info(f'TIME SYNC: Successfully sent to gateway {client_id}')
+            return True
+
         except Exception as e:
             self.logger.error(f'TIME SYNC: Failed to send to {client_id}: {e}')
             return False
\ No newline at end of file
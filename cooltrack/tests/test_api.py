@@ -0,0 +1,60 @@
+# Copyright (c) 2025, dev@cogentmedia.co and Contributors
+# See license.txt
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from cooltrack.api import v1
+
+SETTINGS = frappe._dict(queue_ingest=0)
+
+
+@patch('cooltrack.api.v1.get_settings', return_value=SETTINGS)
+class TestReceiveSensorDataBatch(FrappeTestCase):
+    def setUp(self):
+        frappe.local.response = frappe._dict()
+
+    def test_empty_batch_is_rejected(self, _settings):
+        response = v1.receive_sensor_data_batch(readings='[]')
+
+        self.assertEqual(frappe.local.response['http_status_code'], 400)
+        self.assertIn('error', response)
+
+    def test_oversized_batch_is_rejected(self, _settings):
+        readings = [{'ID': 'S1', 'SN': str(index)} for index in range(v1.MAX_BATCH_SIZE + 1)]
+
+        with patch('cooltrack.api.v1.ingest_batch') as ingest_batch:
+            v1.receive_sensor_data_batch(readings=frappe.as_json(readings))
+
+        self.assertEqual(frappe.local.response['http_status_code'], 413)
+        ingest_batch.assert_not_called()
+
+    def test_batch_is_ingested_with_results_per_reading(self, _settings):
+        readings = [{'ID': 'S1', 'SN': '1'}, {'ID': 'S1', 'SN': '2'}]
+        results = {'received': 2, 'accepted': 2, 'results': [{'index': 0, 'status': 200}, {'index': 1, 'status': 200}]}
+
+        with patch('cooltrack.api.v1.ingest_batch', return_value=results) as ingest_batch:
+            response = v1.receive_sensor_data_batch(readings=frappe.as_json(readings))
+
+        self.assertEqual(response, results)
+        self.assertEqual(ingest_batch.call_args.args, (readings, SETTINGS))
+
+
+class TestGetGatewaySettings(FrappeTestCase):
+    def setUp(self):
+        frappe.local.response = frappe._dict()
+
+    def test_current_copy_gets_not_modified(self):
+        response = v1.get_gateway_settings()
+        self.assertIn('api_url', response['settings'])
+
+        self.assertIsNone(v1.get_gateway_settings(modified=response['modified']))
+        self.assertEqual(frappe.local.response['http_status_code'], 304)
+
+    def test_stale_copy_gets_settings(self):
+        response = v1.get_gateway_settings(modified='2000-01-01 00:00:00')
+
+        self.assertNotIn('http_status_code', frappe.local.response)
+        self.assertEqual(set(response['settings']), set(v1.GATEWAY_SETTINGS_FIELDS))
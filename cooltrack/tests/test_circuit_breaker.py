@@ -0,0 +1,36 @@
+import unittest
+
+from cooltrack.services.circuit_breaker import CircuitBreaker
+
+
+def make_half_open() -> CircuitBreaker:
+    circuit = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    circuit.record_failure()
+    return circuit
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_opens_after_threshold(self):
+        circuit = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+        circuit.record_failure()
+        self.assertTrue(circuit.allow_request())
+
+        circuit.record_failure()
+        self.assertFalse(circuit.allow_request())
+
+    def test_half_open_lets_one_probe_through(self):
+        circuit = make_half_open()
+        self.assertTrue(circuit.allow_request())
+        self.assertFalse(circuit.allow_request())
+
+        circuit.record_success()
+        self.assertEqual(circuit.state, CircuitBreaker.CLOSED)
+        self.assertTrue(circuit.allow_request())
+
+    def test_released_probe_can_be_retried(self):
+        circuit = make_half_open()
+        self.assertTrue(circuit.allow_request())
+
+        circuit.release_probe()
+        self.assertEqual(circuit.state, CircuitBreaker.HALF_OPEN)
+        self.assertTrue(circuit.allow_request())
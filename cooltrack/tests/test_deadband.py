@@ -0,0 +1,88 @@
+import logging
+import unittest
+
+from cooltrack.services.sensor_gateway_service.deadband import DeadbandFilter
+
+THRESHOLDS = {'min_acceptable_temperature': 2.0, 'max_acceptable_temperature': 8.0, 'calibration_offset': 0}
+
+
+def make_filter(**kwargs):
+    deadband = DeadbandFilter(logging.getLogger(__name__), threshold_lookup=lambda sensor_id: THRESHOLDS, **kwargs)
+    # Thresholds as the lookup thread would have cached them, without starting it
+    deadband.get_thresholds = lambda sensor_id: THRESHOLDS
+    return deadband
+
+
+class TestDeadbandBounds(unittest.TestCase):
+    def test_sensor_state_is_bounded(self):
+        deadband = make_filter(max_sensors=2)
+
+        for sensor_id in ('S1', 'S2', 'S3'):
+            self.assertTrue(deadband.should_forward({'ID': sensor_id, 'T': 5.0}))
+
+        self.assertEqual(list(deadband.last_forwarded), ['S2', 'S3'])
+        self.assertEqual(deadband.get_stats()['evicted'], 1)
+
+        # The evicted sensor has no last reading left to compare with, so it is forwarded again
+        self.assertTrue(deadband.should_forward({'ID': 'S1', 'T': 5.0}))
+
+    def test_suppressed_sensor_stays_recent(self):
+        deadband = make_filter(max_sensors=2)
+
+        deadband.should_forward({'ID': 'S1', 'T': 5.0})
+        deadband.should_forward({'ID': 'S2', 'T': 5.0})
+        self.assertFalse(deadband.should_forward({'ID': 'S1', 'T': 5.1}))
+        deadband.should_forward({'ID': 'S3', 'T': 5.0})
+
+        self.assertEqual(list(deadband.last_forwarded), ['S1', 'S3'])
+        self.assertEqual(deadband.suppressed_by_sensor, {'S1': 1})
+
+    def test_suppression_counts_leave_with_their_sensor(self):
+        deadband = make_filter(max_sensors=1)
+
+        deadband.should_forward({'ID': 'S1', 'T': 5.0})
+        deadband.should_forward({'ID': 'S1', 'T': 5.0})
+        deadband.should_forward({'ID': 'S2', 'T': 5.0})
+
+        self.assertEqual(deadband.suppressed_by_sensor, {})
+
+
+class TestDeadbandPolicy(unittest.TestCase):
+    def test_small_moves_are_suppressed(self):
+        deadband = make_filter(delta=0.5)
+
+        self.assertTrue(deadband.should_forward({'ID': 'S1', 'T': 5.0}))
+        self.assertFalse(deadband.should_forward({'ID': 'S1', 'T': 5.4}))
+        self.assertTrue(deadband.should_forward({'ID': 'S1', 'T': 5.6}))
+
+        stats = deadband.get_stats()
+        self.assertEqual((stats['forwarded'], stats['suppressed']), (2, 1))
+
+    def test_out_of_range_readings_are_always_forwarded(self):
+        deadband = make_filter(delta=5)
+
+        self.assertTrue(deadband.should_forward({'ID': 'S1', 'T': 7.9}))
+        self.assertTrue(deadband.should_forward({'ID': 'S1', 'T': 8.1})) # Crossed the maximum
+        self.assertTrue(deadband.should_forward({'ID': 'S1', 'T': 8.2})) # Stays above it
+        self.assertTrue(deadband.should_forward({'ID': 'S1', 'T': 7.9})) # Back inside
+
+    def test_heartbeat_forwards_unchanged_reading(self):
+        deadband = make_filter(heartbeat_interval=0)
+
+        self.assertTrue(deadband.should_forward({'ID': 'S1', 'T': 5.0}))
+        self.assertTrue(deadband.should_forward({'ID': 'S1', 'T': 5.0}))
+
+    def test_unknown_range_is_never_suppressed(self):
+        deadband = make_filter()
+        deadband.get_thresholds = lambda sensor_id: None
+
+        self.assertTrue(deadband.should_forward({'ID': 'S1', 'T': 5.0}))
+        self.assertTrue(deadband.should_forward({'ID': 'S1', 'T': 5.0}))
+        self.assertTrue(deadband.should_forward({'ID': 'S1', 'T': 'bad'}))
+
+    def test_calibration_offset_applies_before_range_check(self):
+        deadband = make_filter(delta=5)
+        deadband.get_thresholds = lambda sensor_id: {**THRESHOLDS, 'calibration_offset': 1.0}
+
+        deadband.should_forward({'ID': 'S1', 'T': 6.0})
+        self.assertTrue(deadband.should_forward({'ID': 'S1', 'T': 7.5})) # 8.5 calibrated, above the maximum
@@ -0,0 +1,44 @@
+import unittest
+
+from cooltrack.services.sensor_gateway_service.dedup import DedupWindow
+
+
+def make_reading(sequence_number, sensor_id='S1', time='2026-10-16 12:00:00'):
+    return {'ID': sensor_id, 'SN': sequence_number, 'Time': time}
+
+
+class TestDedupWindow(unittest.TestCase):
+    def test_drops_repeated_reading(self):
+        window = DedupWindow(max_size=10)
+
+        self.assertFalse(window.is_duplicate(make_reading(1)))
+        self.assertTrue(window.is_duplicate(make_reading(1)))
+
+        # Same SN from another sensor, or at another time, is a different reading
+        self.assertFalse(window.is_duplicate(make_reading(1, sensor_id='S2')))
+        self.assertFalse(window.is_duplicate(make_reading(1, time='2026-10-16 12:01:00')))
+
+    def test_readings_without_sequence_number_are_never_copies(self):
+        window = DedupWindow(max_size=10)
+
+        self.assertFalse(window.is_duplicate({'ID': 'S1', 'Time': '2026-10-16 12:00:00'}))
+        self.assertFalse(window.is_duplicate({'ID': 'S1', 'Time': '2026-10-16 12:00:00'}))
+        self.assertEqual(window.get_stats()['skipped'], 2)
+
+    def test_evicts_least_recently_seen(self):
+        window = DedupWindow(max_size=2)
+
+        window.is_duplicate(make_reading(1))
+        window.is_duplicate(make_reading(2))
+        window.is_duplicate(make_reading(1)) # Seen again: now the most recent
+        window.is_duplicate(make_reading(3)) # Evicts 2
+
+        self.assertEqual(window.get_stats()['evicted'], 1)
+        self.assertTrue(window.is_duplicate(make_reading(1)))
+        self.assertFalse(window.is_duplicate(make_reading(2)))
+
+    def test_zero_size_disables_window(self):
+        window = DedupWindow(max_size=0)
+
+        window.is_duplicate(make_reading(1))
+        self.assertFalse(window.is_duplicate(make_reading(1)))
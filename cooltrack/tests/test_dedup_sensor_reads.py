@@ -0,0 +1,39 @@
+# Copyright (c) 2025, dev@cogentmedia.co and Contributors
+# See license.txt
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from cooltrack.patches.v1_0 import dedup_sensor_reads
+
+
+class DuplicateEntry(Exception):
+    pass
+
+
+class TestDedupSensorReads(FrappeTestCase):
+    def test_cleans_up_again_when_a_duplicate_lands_before_the_index(self):
+        add_unique_calls = []
+
+        def add_unique(*args, **kwargs):
+            add_unique_calls.append(args)
+            if len(add_unique_calls) == 1:
+                raise DuplicateEntry()
+
+        with patch.object(dedup_sensor_reads, 'delete_all_duplicates') as delete_all_duplicates, \
+                patch.object(frappe.db, 'add_unique', side_effect=add_unique), \
+                patch.object(frappe.db, 'is_duplicate_entry', side_effect=lambda e: isinstance(e, DuplicateEntry)), \
+                patch.object(frappe.db, 'rollback'):
+            dedup_sensor_reads.add_unique_index()
+
+        self.assertEqual(len(add_unique_calls), 2)
+        self.assertEqual(delete_all_duplicates.call_count, 2)
+
+    def test_gives_up_after_the_last_attempt(self):
+        with patch.object(dedup_sensor_reads, 'delete_all_duplicates'), \
+                patch.object(frappe.db, 'add_unique', side_effect=DuplicateEntry()), \
+                patch.object(frappe.db, 'is_duplicate_entry', return_value=True), \
+                patch.object(frappe.db, 'rollback'):
+            self.assertRaises(DuplicateEntry, dedup_sensor_reads.add_unique_index)
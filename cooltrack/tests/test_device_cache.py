@@ -0,0 +1,63 @@
+# Copyright (c) 2025, dev@cogentmedia.co and Contributors
+# See license.txt
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from cooltrack.device_cache import get_gateway_meta, get_cache_key, clear_device_meta
+
+GATEWAY_ID = 'TEST-GW-CACHE'
+
+
+class TestDeviceCache(FrappeTestCase):
+    def setUp(self):
+        if frappe.db.exists('Sensor Gateway', GATEWAY_ID):
+            frappe.delete_doc('Sensor Gateway', GATEWAY_ID, ignore_permissions=True, force=True)
+
+        frappe.cache().delete_value(get_cache_key('Sensor Gateway', GATEWAY_ID))
+
+    def make_gateway(self):
+        return frappe.get_doc({
+            'doctype': 'Sensor Gateway',
+            'gateway_id': GATEWAY_ID,
+            'approval_status': 'Approved',
+            'location': 'Cold Room'
+        }).insert(ignore_permissions=True)
+
+    def test_second_lookup_is_served_from_cache(self):
+        self.make_gateway()
+        self.assertEqual(get_gateway_meta(GATEWAY_ID).location, 'Cold Room')
+
+        with patch.object(frappe.db, 'get_value') as get_value:
+            self.assertEqual(get_gateway_meta(GATEWAY_ID).location, 'Cold Room')
+
+        get_value.assert_not_called()
+
+    def test_unknown_device_is_cached_until_inserted(self):
+        self.assertIsNone(get_gateway_meta(GATEWAY_ID))
+
+        with patch.object(frappe.db, 'get_value') as get_value:
+            self.assertIsNone(get_gateway_meta(GATEWAY_ID))
+
+        get_value.assert_not_called()
+
+        # Inserting clears the cached miss through on_update
+        self.make_gateway()
+        self.assertEqual(get_gateway_meta(GATEWAY_ID).approval_status, 'Approved')
+
+    def test_saving_the_document_clears_its_entry(self):
+        gateway = self.make_gateway()
+        get_gateway_meta(GATEWAY_ID)
+
+        gateway.location = 'Freezer'
+        gateway.save(ignore_permissions=True)
+
+        self.assertEqual(get_gateway_meta(GATEWAY_ID).location, 'Freezer')
+
+    def test_clear_runs_again_after_commit(self):
+        with patch.object(frappe.db.after_commit, 'add') as after_commit:
+            clear_device_meta('Sensor Gateway', GATEWAY_ID)
+
+        after_commit.assert_called_once()
@@ -0,0 +1,69 @@
+# Copyright (c) 2025, dev@cogentmedia.co and Contributors
+# See license.txt
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import get_datetime
+
+from cooltrack.device_telemetry import (
+    record_transmission,
+    get_live_telemetry,
+    apply_live_telemetry,
+    flush_telemetry,
+    get_telemetry_key
+)
+
+GATEWAY_ID = 'TEST-GW-TELEMETRY-FLUSH'
+
+
+class TestDeviceTelemetry(FrappeTestCase):
+    def setUp(self):
+        if frappe.db.exists('Sensor Gateway', GATEWAY_ID):
+            frappe.delete_doc('Sensor Gateway', GATEWAY_ID, ignore_permissions=True, force=True)
+
+        for kind in ('pending', 'flushing', 'heartbeat', 'fields'):
+            frappe.cache().delete(get_telemetry_key('Sensor Gateway', kind))
+
+        frappe.get_doc({
+            'doctype': 'Sensor Gateway',
+            'gateway_id': GATEWAY_ID,
+            'approval_status': 'Approved'
+        }).insert(ignore_permissions=True)
+        frappe.db.set_value('Sensor Gateway', GATEWAY_ID, 'number_of_transmissions', 10, update_modified=False)
+
+    def test_late_reading_does_not_move_heartbeat_back(self):
+        record_transmission('Sensor Gateway', GATEWAY_ID, '2026-10-16 12:05:00', ip_address='10.0.0.2')
+        record_transmission('Sensor Gateway', GATEWAY_ID, '2026-10-16 12:00:00', ip_address='10.0.0.1') # Spooled
+
+        live = get_live_telemetry('Sensor Gateway', [GATEWAY_ID])[GATEWAY_ID]
+        self.assertEqual(live.last_heartbeat, get_datetime('2026-10-16 12:05:00'))
+        self.assertEqual(live.ip_address, '10.0.0.2')
+        self.assertEqual(live.pending_transmissions, 2)
+
+    def test_live_values_overlay_database_rows(self):
+        record_transmission('Sensor Gateway', GATEWAY_ID, '2026-10-16 12:05:00', ip_address='10.0.0.2')
+
+        rows = apply_live_telemetry('Sensor Gateway', frappe.get_all(
+            'Sensor Gateway',
+            filters={'name': GATEWAY_ID},
+            fields=['name', 'last_heartbeat', 'number_of_transmissions', 'ip_address']
+        ))
+
+        self.assertEqual(rows[0]['number_of_transmissions'], 11)
+        self.assertEqual(rows[0]['ip_address'], '10.0.0.2')
+
+    def test_flush_writes_buffered_telemetry(self):
+        record_transmission('Sensor Gateway', GATEWAY_ID, '2026-10-16 12:05:00', ip_address='10.0.0.2')
+        record_transmission('Sensor Gateway', GATEWAY_ID, '2026-10-16 12:06:00', ip_address='10.0.0.3')
+
+        flush_telemetry()
+
+        stored = frappe.db.get_value(
+            'Sensor Gateway', GATEWAY_ID, ['last_heartbeat', 'number_of_transmissions', 'ip_address'], as_dict=True
+        )
+        self.assertEqual(stored.number_of_transmissions, 12)
+        self.assertEqual(get_datetime(stored.last_heartbeat), get_datetime('2026-10-16 12:06:00'))
+        self.assertEqual(stored.ip_address, '10.0.0.3')
+
+        # Counted once: nothing is left pending for the next flush
+        self.assertEqual(get_live_telemetry('Sensor Gateway', [GATEWAY_ID])[GATEWAY_ID].pending_transmissions, 0)
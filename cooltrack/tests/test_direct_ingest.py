@@ -0,0 +1,33 @@
+import logging
+import unittest
+from unittest.mock import patch
+
+from cooltrack.services.sensor_gateway_service.direct_ingest import DirectIngestClient
+
+logger = logging.getLogger(__name__)
+
+
+class TestDirectIngestFallback(unittest.TestCase):
+    def make_client(self, **kwargs):
+        return DirectIngestClient(logger, site='test.site', sites_path='/nonexistent', **kwargs)
+
+    def test_failure_falls_back_to_http_for_retry_interval(self):
+        client = self.make_client(retry_interval=60)
+
+        with patch.object(client, 'connect', side_effect=RuntimeError('site not reachable')) as connect:
+            self.assertIsNone(client.forward_sensor_data_batch([{'ID': 'S1'}]))
+            self.assertFalse(client.is_available())
+
+            # Later batches go straight to HTTP without trying the site again
+            self.assertIsNone(client.forward_sensor_data_batch([{'ID': 'S1'}]))
+            self.assertEqual(connect.call_count, 1)
+
+    def test_retried_once_interval_has_passed(self):
+        client = self.make_client(retry_interval=0)
+
+        with patch.object(client, 'connect', side_effect=RuntimeError('site not reachable')) as connect:
+            client.forward_sensor_data_batch([{'ID': 'S1'}])
+            client.forward_sensor_data_batch([{'ID': 'S1'}])
+
+        self.assertTrue(client.is_available())
+        self.assertEqual(connect.call_count, 2)
@@ -0,0 +1,123 @@
+import logging
+import threading
+import unittest
+
+from cooltrack.services.sensor_gateway_service.forward_queue import ForwardQueue
+
+logger = logging.getLogger(__name__)
+
+
+def make_readings(count):
+    return [({'ID': 'S1', 'SN': str(index)}, '10.0.0.1:5000') for index in range(count)]
+
+
+class TestForwardQueueShutdown(unittest.TestCase):
+    def test_stop_hands_back_batch_stuck_in_forwarding(self):
+        forwarding = threading.Event()
+        release = threading.Event()
+        spooled = []
+
+        def forward(items):
+            forwarding.set()
+            release.wait(5) # A slow HTTP call outliving the stop timeout
+            return [False] * len(items)
+
+        forward_queue = ForwardQueue(logger, forward, spooled.extend, workers=1, batch_size=2, batch_interval=0.01, stats_interval=0)
+        forward_queue.start()
+
+        readings = make_readings(3)
+        for sensor_data, client_id in readings:
+            forward_queue.submit(sensor_data, client_id)
+
+        self.assertTrue(forwarding.wait(5))
+        workers = list(forward_queue.workers)
+        remaining = forward_queue.stop(timeout=0.2)
+
+        # The stuck batch first, then what was still queued
+        self.assertEqual(remaining, readings)
+
+        # When the call finally fails, the worker must not spool the batch a second time
+        release.set()
+        for worker in workers:
+            worker.join(5)
+
+        self.assertEqual(spooled, [])
+
+    def test_stop_waits_for_finished_workers(self):
+        spooled = []
+        forward_queue = ForwardQueue(
+            logger,
+            lambda items: [False] * len(items),
+            spooled.extend,
+            workers=1,
+            batch_size=10,
+            batch_interval=0.01,
+            stats_interval=0
+        )
+        forward_queue.start()
+
+        readings = make_readings(2)
+        for sensor_data, client_id in readings:
+            forward_queue.submit(sensor_data, client_id)
+
+        forward_queue.queue.join()
+        remaining = forward_queue.stop(timeout=2)
+
+        self.assertEqual(remaining + spooled, readings)
+
+
+class TestForwardQueueBackPressure(unittest.TestCase):
+    def test_full_queue_overflows_without_blocking(self):
+        overflowed = []
+        forward_queue = ForwardQueue(logger, lambda items: [True] * len(items), max_size=2, stats_interval=0)
+
+        readings = make_readings(3)
+        results = [forward_queue.submit(sensor_data, client_id, overflowed.extend) for sensor_data, client_id in readings]
+
+        self.assertEqual(results, [True, True, False])
+        self.assertEqual(overflowed, readings[2:])
+        self.assertEqual(forward_queue.get_stats()['depth'], 2)
+        self.assertEqual(forward_queue.get_stats()['overflowed'], 1)
+
+    def test_overflow_falls_back_to_failure_callback(self):
+        spooled = []
+        forward_queue = ForwardQueue(logger, lambda items: [True] * len(items), spooled.extend, max_size=1, stats_interval=0)
+
+        readings = make_readings(2)
+        for sensor_data, client_id in readings:
+            forward_queue.submit(sensor_data, client_id)
+
+        self.assertEqual(spooled, readings[1:])
+
+    def test_full_queue_without_callbacks_drops(self):
+        forward_queue = ForwardQueue(logger, lambda items: [True] * len(items), max_size=1, stats_interval=0)
+
+        for sensor_data, client_id in make_readings(3):
+            forward_queue.submit(sensor_data, client_id)
+
+        stats = forward_queue.get_stats()
+        self.assertEqual((stats['enqueued'], stats['dropped'], stats['overflowed']), (1, 2, 0))
+
+    def test_only_failed_readings_reach_failure_callback(self):
+        spooled = []
+        forward_queue = ForwardQueue(
+            logger,
+            lambda items: [True, None, False][:len(items)], # Delivered, permanently rejected, failed
+            spooled.extend,
+            workers=1,
+            batch_size=3,
+            batch_interval=1,
+            stats_interval=0
+        )
+
+        readings = make_readings(3)
+        for sensor_data, client_id in readings:
+            forward_queue.submit(sensor_data, client_id)
+
+        forward_queue.start()
+        forward_queue.queue.join()
+        forward_queue.stop(timeout=2)
+
+        stats = forward_queue.get_stats()
+        self.assertEqual(spooled, readings[2:])
+        self.assertEqual((stats['forwarded'], stats['rejected'], stats['failed'], stats['batches']), (1, 1, 1, 1))
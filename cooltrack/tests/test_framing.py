@@ -0,0 +1,59 @@
+import random
+import unittest
+
+from cooltrack.services.sensor_gateway_service.framing import FrameBuffer
+
+
+class TestFrameBuffer(unittest.TestCase):
+    def test_splits_frames(self):
+        frames = FrameBuffer().feed(b'ONE\r\nTWO\r\n\r\nTHR')
+        self.assertEqual(frames, [b'ONE', b'TWO'])
+
+    def test_delimiter_split_across_reads(self):
+        buffer = FrameBuffer()
+        self.assertEqual(buffer.feed(b'ONE\r'), [])
+        self.assertEqual(buffer.feed(b'\nTWO\r\n'), [b'ONE', b'TWO'])
+
+    def test_oversized_frame_delimiter_split_across_reads(self):
+        oversized = []
+        buffer = FrameBuffer(max_frame_size=4, oversized_callback=oversized.append)
+
+        self.assertEqual(buffer.feed(b'aaaaaaaa\r'), [])
+        self.assertEqual(buffer.feed(b'\nGOOD\r\n'), [b'GOOD'])
+        self.assertEqual(buffer.feed(b'NEXT\r\n'), [b'NEXT'])
+        self.assertEqual(buffer.oversized_frames, 1)
+        self.assertEqual(len(oversized), 1)
+
+    def test_oversized_frame_spanning_reads(self):
+        buffer = FrameBuffer(max_frame_size=4)
+
+        self.assertEqual(buffer.feed(b'aaaaaa'), [])
+        self.assertEqual(buffer.feed(b'aaaaaa'), [])
+        self.assertEqual(buffer.feed(b'aa\r\nGOOD\r\n'), [b'GOOD'])
+        self.assertEqual(buffer.oversized_frames, 1)
+
+    def test_max_size_frame_delimiter_split_across_reads(self):
+        buffer = FrameBuffer(max_frame_size=4)
+
+        self.assertEqual(buffer.feed(b'GOOD\r'), [])
+        self.assertEqual(buffer.feed(b'\nNEXT\r\n'), [b'GOOD', b'NEXT'])
+        self.assertEqual(buffer.oversized_frames, 0)
+
+    def test_matches_line_splitting_for_any_chunking(self):
+        rng = random.Random(0)
+        max_frame_size = 8
+
+        for _ in range(2000):
+            frames = [bytes(rng.choice(b'ab') for _ in range(rng.randint(0, 12))) for _ in range(rng.randint(1, 6))]
+            stream = b''.join(frame + b'\r\n' for frame in frames)
+            expected = [frame for frame in frames if frame and len(frame) <= max_frame_size]
+
+            buffer = FrameBuffer(max_frame_size=max_frame_size)
+            received = []
+            position = 0
+            while position < len(stream):
+                size = rng.randint(1, 10)
+                received += buffer.feed(stream[position:position + size])
+                position += size
+
+            self.assertEqual(received, expected, stream)
@@ -0,0 +1,105 @@
+import logging
+import unittest
+from unittest.mock import AsyncMock, patch
+
+import requests
+
+from cooltrack.services.circuit_breaker import CircuitBreaker
+from cooltrack.services.frappe_client import FrappeClient
+from cooltrack.services.async_frappe_client import AsyncFrappeClient, httpx
+
+logger = logging.getLogger(__name__)
+
+
+def make_half_open() -> CircuitBreaker:
+    circuit = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    circuit.record_failure()
+    return circuit
+
+
+class TestFrappeClient(unittest.TestCase):
+    def test_probe_released_on_non_transport_error(self):
+        circuit = make_half_open()
+        client = FrappeClient(logger, base_domain='http://frappe.test', circuit=circuit)
+
+        with patch.object(client.session, 'request', side_effect=requests.TooManyRedirects('loop')):
+            with self.assertRaises(requests.TooManyRedirects):
+                client.request('GET', 'http://frappe.test/api/method/ping', retries=0)
+
+        self.assertFalse(circuit.probe_in_flight)
+        self.assertTrue(circuit.allow_request())
+
+    def test_application_error_does_not_open_circuit(self):
+        circuit = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+        client = FrappeClient(logger, base_domain='http://frappe.test', circuit=circuit)
+
+        response = requests.Response()
+        response.status_code = 500
+        with patch.object(client.session, 'request', return_value=response):
+            self.assertEqual(client.request('GET', 'http://frappe.test/api/method/ping', retries=0).status_code, 500)
+
+        self.assertEqual(circuit.state, CircuitBreaker.CLOSED)
+
+        response.status_code = 503
+        with patch.object(client.session, 'request', return_value=response):
+            client.request('GET', 'http://frappe.test/api/method/ping', retries=0)
+
+        self.assertEqual(circuit.state, CircuitBreaker.OPEN)
+
+    def test_batch_posts_readings_and_returns_results(self):
+        client = FrappeClient(logger, base_domain='http://frappe.test')
+        client.api_key, client.api_secret = 'key', 'secret'
+        client.cached_api_url = 'http://frappe.test/api/method/cooltrack.api.v1.receive_sensor_data'
+
+        response = requests.Response()
+        response.status_code = 200
+        response._content = b'{"message": {"results": [{"index": 0, "status": 200}, {"index": 1, "status": 403}]}}'
+        readings = [{'ID': 'S1', 'SN': '1'}, {'ID': 'S2', 'SN': '1'}]
+
+        with patch.object(client.session, 'request', return_value=response) as request:
+            results = client.forward_sensor_data_batch(readings, retries=0)
+
+        self.assertEqual([result['status'] for result in results], [200, 403])
+        self.assertEqual(request.call_args.args[1], 'http://frappe.test/api/method/cooltrack.api.v1.receive_sensor_data_batch')
+        self.assertEqual(request.call_args.kwargs['json'], {'readings': readings})
+
+    def test_failed_batch_request_returns_none(self):
+        client = FrappeClient(logger, base_domain='http://frappe.test')
+        client.api_key, client.api_secret = 'key', 'secret'
+
+        response = requests.Response()
+        response.status_code = 500
+        with patch.object(client.session, 'request', return_value=response):
+            self.assertIsNone(client.forward_sensor_data_batch([{'ID': 'S1'}], retries=0))
+
+
+@unittest.skipIf(httpx is None, 'httpx is not installed')
+class TestAsyncFrappeClient(unittest.IsolatedAsyncioTestCase):
+    async def test_probe_released_on_non_transport_error(self):
+        circuit = make_half_open()
+        client = AsyncFrappeClient(logger, base_domain='http://frappe.test', circuit=circuit)
+
+        try:
+            with patch.object(client.client, 'request', AsyncMock(side_effect=httpx.DecodingError('bad body'))):
+                with self.assertRaises(httpx.DecodingError):
+                    await client.request('GET', 'http://frappe.test/api/method/ping', retries=0)
+
+        finally:
+            await client.aclose()
+
+        self.assertFalse(circuit.probe_in_flight)
+        self.assertTrue(circuit.allow_request())
+
+    async def test_application_error_does_not_open_circuit(self):
+        circuit = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+        client = AsyncFrappeClient(logger, base_domain='http://frappe.test', circuit=circuit)
+
+        try:
+            with patch.object(client.client, 'request', AsyncMock(return_value=httpx.Response(500))):
+                response = await client.request('GET', 'http://frappe.test/api/method/ping', retries=0)
+
+        finally:
+            await client.aclose()
+
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(circuit.state, CircuitBreaker.CLOSED)
@@ -0,0 +1,132 @@
+# Copyright (c) 2025, dev@cogentmedia.co and Contributors
+# See license.txt
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import get_datetime
+
+from cooltrack.ingest import (
+    ingest_batch,
+    is_routine_gateway,
+    is_routine_sensor,
+    touch_gateway,
+    touch_sensor,
+    DUPLICATE_RESPONSE
+)
+
+SETTINGS = frappe._dict(
+    gateway_time_offset=0,
+    require_gateway_approval=0,
+    require_sensor_approval=0,
+    default_approval_status='Pending'
+)
+
+GATEWAY = frappe._dict(name='TEST-GW', approval_status='Approved', status='Active', location='Test Room')
+
+SENSOR = frappe._dict(
+    name='TEST-S1',
+    sensor_id='TEST-S1',
+    approval_status='Approved',
+    status='Active',
+    gateway_id='TEST-GW',
+    gateway_location='Test Room',
+    calibration_offset=0,
+    alerts_enabled=1,
+    alerts_disabled_start=None,
+    alerts_disabled_end=None,
+    max_acceptable_temperature=None
+)
+
+
+def make_reading(sequence_number, temperature='4.1'):
+    return {'GW_ID': 'TEST-GW', 'ID': 'TEST-S1', 'T': temperature, 'SN': str(sequence_number), 'Time': '2026-10-16 12:00:00'}
+
+
+@patch('cooltrack.ingest.get_gateway_meta', return_value=GATEWAY)
+@patch('cooltrack.ingest.get_sensor_meta', return_value=SENSOR)
+@patch('cooltrack.ingest.update_excursion_state', return_value=False)
+@patch('cooltrack.ingest.insert_sensor_reads')
+@patch('cooltrack.ingest.record_transmission')
+@patch('cooltrack.ingest.frappe.log_error')
+class TestIngestBatch(FrappeTestCase):
+    def test_failed_and_repeated_readings(self, _log_error, record_transmission, insert_sensor_reads, update_excursion_state, *_meta):
+        readings = [
+            make_reading(1),
+            make_reading(2, temperature='not a number'), # Fails after its devices were touched
+            make_reading(1), # Copy of the first, not stored yet
+            make_reading(3)
+        ]
+
+        response = ingest_batch(readings, SETTINGS)
+
+        self.assertEqual([result['status'] for result in response['results']], [200, 500, 200, 200])
+        self.assertEqual(response['results'][2]['message'], DUPLICATE_RESPONSE['message'])
+        self.assertEqual(response['accepted'], 3)
+
+        # Stored once each, and only the two stored readings are counted as transmissions
+        rows = insert_sensor_reads.call_args.args[0]
+        self.assertEqual([row['sequence_number'] for row in rows], [1, 3])
+        self.assertEqual(update_excursion_state.call_count, 2)
+        self.assertEqual(
+            sorted(call.args[0] for call in record_transmission.call_args_list),
+            ['Sensor', 'Sensor', 'Sensor Gateway', 'Sensor Gateway']
+        )
+
+    def test_copy_of_failed_reading_is_retried(self, _log_error, record_transmission, insert_sensor_reads, *_mocks):
+        response = ingest_batch([make_reading(1, temperature='not a number'), make_reading(1)], SETTINGS)
+
+        self.assertEqual([result['status'] for result in response['results']], [500, 500])
+        self.assertEqual(insert_sensor_reads.call_args.args[0], [])
+        record_transmission.assert_not_called()
+
+
+class TestRoutineTelemetry(FrappeTestCase):
+    def test_routine_devices(self):
+        now = get_datetime('2026-10-16 12:00:00')
+
+        self.assertTrue(is_routine_gateway(GATEWAY))
+        self.assertTrue(is_routine_sensor(SENSOR, now))
+
+        # Lifecycle work pending: the full save path has to run
+        self.assertFalse(is_routine_gateway(None))
+        self.assertFalse(is_routine_gateway(frappe._dict(GATEWAY, status='Inactive')))
+        self.assertFalse(is_routine_sensor(frappe._dict(SENSOR, approval_status='Pending'), now))
+
+    def test_alert_window_changes_are_not_routine(self):
+        now = get_datetime('2026-10-16 12:00:00')
+        window = {'alerts_disabled_start': '2026-10-16 11:00:00', 'alerts_disabled_end': '2026-10-16 13:00:00'}
+
+        # Inside the window with alerts already off: nothing to do
+        self.assertTrue(is_routine_sensor(frappe._dict(SENSOR, alerts_enabled=0, **window), now))
+        # Window started but alerts still on, or window over
+        self.assertFalse(is_routine_sensor(frappe._dict(SENSOR, alerts_enabled=1, **window), now))
+        self.assertFalse(is_routine_sensor(frappe._dict(SENSOR, **window), get_datetime('2026-10-16 14:00:00')))
+
+    def test_touch_only_records_transmissions(self):
+        transmissions = []
+        timestamp = get_datetime('2026-10-16 12:00:00')
+
+        with patch('cooltrack.ingest.frappe.db.set_value') as set_value:
+            touch_gateway(GATEWAY, '10.0.0.1', timestamp, transmissions)
+            touch_sensor(SENSOR, SENSOR.gateway_id, SENSOR.gateway_location, 4.2, timestamp, transmissions)
+
+        set_value.assert_not_called()
+        self.assertEqual(transmissions, [
+            ('Sensor Gateway', GATEWAY.name, timestamp, {'ip_address': '10.0.0.1'}),
+            ('Sensor', SENSOR.name, timestamp, {'last_temperature': 4.2})
+        ])
+
+    @patch('cooltrack.ingest.clear_device_meta')
+    def test_sensor_moved_to_another_gateway_is_written(self, clear_device_meta):
+        transmissions = []
+
+        with patch('cooltrack.ingest.frappe.db.set_value') as set_value:
+            touch_sensor(SENSOR, 'TEST-GW-2', 'Freezer', 4.2, get_datetime('2026-10-16 12:00:00'), transmissions)
+
+        set_value.assert_called_once_with(
+            'Sensor', SENSOR.name, {'gateway_id': 'TEST-GW-2', 'gateway_location': 'Freezer'}, update_modified=False
+        )
+        clear_device_meta.assert_called_once_with('Sensor', SENSOR.name)
+        self.assertEqual(len(transmissions), 1)
@@ -0,0 +1,74 @@
+# Copyright (c) 2025, dev@cogentmedia.co and Contributors
+# See license.txt
+
+import json
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from cooltrack import ingest_queue
+
+READINGS = [
+    {'GW_ID': 'TEST-GW', 'ID': 'TEST-S1', 'T': '4.1', 'SN': str(index), 'Time': '2026-10-16 12:00:00'}
+    for index in range(3)
+]
+
+LIST_SCRIPT = """
+return redis.call('LRANGE', KEYS[1], 0, -1)
+"""
+
+
+def get_list(key):
+    return [json.loads(entry)['reading'] for entry in frappe.cache().register_script(LIST_SCRIPT)(keys=[key])]
+
+
+class TestIngestQueue(FrappeTestCase):
+    def setUp(self):
+        self.clear()
+        ingest_queue.run_script(ingest_queue.PUSH_SCRIPT, [json.dumps({'reading': reading, 'queued_at': 0}) for reading in READINGS])
+
+    def tearDown(self):
+        self.clear()
+
+    def clear(self):
+        frappe.cache().delete(ingest_queue.get_queue_key(), *ingest_queue.get_slot_keys(0))
+
+    def take(self, count):
+        """What a drain job does before it is killed mid-batch"""
+        ingest_queue.run_script(ingest_queue.TAKE_SCRIPT, [count, ingest_queue.LEASE_SECONDS], slot=0)
+
+    @patch('cooltrack.ingest_queue.frappe.enqueue')
+    def test_enqueuer_reclaims_batch_of_dead_job(self, enqueue):
+        self.take(2)
+        processing_key, lease_key = ingest_queue.get_slot_keys(0)
+
+        # Lease still live: the job may be working on it
+        ingest_queue.enqueue_drain_jobs()
+        self.assertEqual(get_list(ingest_queue.get_queue_key()), READINGS[2:])
+        self.assertEqual(get_list(processing_key), READINGS[:2])
+
+        frappe.cache().delete(lease_key)
+        ingest_queue.enqueue_drain_jobs()
+        self.assertEqual(get_list(ingest_queue.get_queue_key()), READINGS)
+        self.assertEqual(get_list(processing_key), [])
+        self.assertTrue(enqueue.called)
+
+    @patch('cooltrack.ingest_queue.ingest_batch')
+    def test_next_job_of_slot_reclaims_batch(self, ingest_batch):
+        self.take(2)
+
+        ingest_queue.drain_queued_readings(slot=0)
+
+        ingest_batch.assert_called_once()
+        self.assertEqual(ingest_batch.call_args.args[0], READINGS)
+        self.assertEqual(get_list(ingest_queue.get_queue_key()), [])
+        self.assertEqual(get_list(ingest_queue.get_slot_keys(0)[0]), [])
+
+    @patch('cooltrack.ingest_queue.ingest_batch', side_effect=Exception('database gone'))
+    def test_failed_batch_is_put_back(self, _ingest_batch):
+        with self.assertRaises(Exception):
+            ingest_queue.drain_queued_readings(slot=0)
+
+        self.assertEqual(get_list(ingest_queue.get_queue_key()), READINGS)
+        self.assertEqual(get_list(ingest_queue.get_slot_keys(0)[0]), [])
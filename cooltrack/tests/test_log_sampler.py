@@ -0,0 +1,40 @@
+import logging
+import unittest
+
+from cooltrack.services.sensor_gateway_service.log_sampler import RawFrameSampler
+
+
+class TestRawFrameSampler(unittest.TestCase):
+    def setUp(self):
+        self.logger = logging.getLogger(__name__)
+        self.logger.setLevel(logging.DEBUG)
+        self.addCleanup(self.logger.setLevel, logging.NOTSET)
+
+    def test_counters_are_bounded(self):
+        sampler = RawFrameSampler(self.logger, sample_rate=0.5, max_gateways=2)
+
+        for client_id in ('10.0.0.1:5000', '10.0.0.2:5000', '10.0.0.1:5001', '10.0.0.3:5000'):
+            sampler.should_log(client_id)
+
+        self.assertEqual(list(sampler.counters), ['10.0.0.1', '10.0.0.3'])
+
+    def test_logs_every_nth_chunk_per_gateway(self):
+        sampler = RawFrameSampler(self.logger, sample_rate=0.25)
+
+        logged = [sampler.should_log('10.0.0.1:5000') for _ in range(6)]
+        self.assertEqual(logged, [True, False, False, False, True, False])
+
+        # A reconnect from another port continues the same gateway's count
+        self.assertFalse(sampler.should_log('10.0.0.1:5001'))
+        self.assertTrue(sampler.should_log('10.0.0.2:5000'))
+
+    def test_nothing_sampled_without_debug_logging(self):
+        self.logger.setLevel(logging.INFO)
+        sampler = RawFrameSampler(self.logger, sample_rate=1.0)
+
+        self.assertFalse(sampler.should_log('10.0.0.1:5000'))
+        self.assertEqual(sampler.counters, {})
+
+    def test_zero_rate_disables_sampling(self):
+        sampler = RawFrameSampler(self.logger, sample_rate=0)
+        self.assertFalse(sampler.should_log('10.0.0.1:5000'))
@@ -0,0 +1,34 @@
+import logging
+import unittest
+import urllib.request
+
+from cooltrack.services.sensor_gateway_service.frame_parser import FrameParser
+from cooltrack.services.sensor_gateway_service.metrics import MetricsRegistry, MetricsServer
+
+
+class TestGatewayLabel(unittest.TestCase):
+    def test_peek_gateway(self):
+        parser = FrameParser(valid_types=('TMP',))
+
+        self.assertEqual(parser.peek_gateway(b'GW_ID:GW-01,TYPE:BAD'), 'GW-01')
+        self.assertEqual(parser.peek_gateway(b'GW_ID:GW-01'), 'GW-01')
+        self.assertIsNone(parser.peek_gateway(b'GW_ID:,TYPE:TMP'))
+        self.assertIsNone(parser.peek_gateway(b'GET / HTTP/1.1'))
+
+
+class TestMetricsServer(unittest.TestCase):
+    def test_scrape_duration_has_help_and_type(self):
+        registry = MetricsRegistry(prefix='test')
+        registry.counter('frames_received_total', 'Frames', ('gateway',))
+        registry.inc('frames_received_total', ('unknown',))
+
+        server = MetricsServer(logging.getLogger(__name__), registry, port=0)
+        server.start()
+        self.addCleanup(server.stop)
+
+        port = server.httpd.server_address[1]
+        body = urllib.request.urlopen(f'http://127.0.0.1:{port}/metrics').read().decode('utf-8')
+
+        self.assertIn('test_frames_received_total{gateway="unknown"} 1\n', body)
+        self.assertIn('# HELP test_scrape_duration_seconds ', body)
+        self.assertIn('# TYPE test_scrape_duration_seconds gauge\n', body)
@@ -0,0 +1,73 @@
+import logging
+import unittest
+
+from cooltrack.services.sensor_gateway_service.settings_cache import SettingsCache
+
+logger = logging.getLogger(__name__)
+
+PAYLOAD = {'modified': '2026-10-16 12:00:00.000000', 'settings': {'api_url': 'http://frappe.test/api/method/ingest'}}
+
+
+class FakeSettingsEndpoint:
+    """Answers like get_gateway_settings: 304 (False, None) when the caller's copy is current"""
+
+    def __init__(self, payload):
+        self.payload = payload
+        self.requests = []
+
+    def __call__(self, modified):
+        self.requests.append(modified)
+        if modified == self.payload['modified']:
+            return False, None
+
+        return True, self.payload
+
+
+class TestSettingsCache(unittest.TestCase):
+    def test_unchanged_settings_keep_snapshot(self):
+        fetch = FakeSettingsEndpoint(PAYLOAD)
+        changes = []
+        cache = SettingsCache(logger, fetch)
+        cache.on_change(changes.append)
+
+        self.assertTrue(cache.refresh())
+        snapshot = cache.snapshot
+        self.assertTrue(cache.refresh())
+
+        # The second request carries the modified timestamp and gets a 304
+        self.assertEqual(fetch.requests, [None, PAYLOAD['modified']])
+        self.assertIs(cache.snapshot, snapshot)
+        self.assertEqual(cache.get('api_url'), PAYLOAD['settings']['api_url'])
+        self.assertEqual(len(changes), 1)
+        self.assertEqual((cache.get_stats()['changes'], cache.get_stats()['not_modified']), (1, 1))
+
+    def test_changed_settings_are_published(self):
+        fetch = FakeSettingsEndpoint(PAYLOAD)
+        cache = SettingsCache(logger, fetch)
+        cache.refresh()
+
+        fetch.payload = {'modified': '2026-10-16 12:05:00.000000', 'settings': {'api_url': 'http://frappe.test/new'}}
+        cache.refresh()
+
+        self.assertEqual(cache.get('api_url'), 'http://frappe.test/new')
+        self.assertEqual(cache.modified, '2026-10-16 12:05:00.000000')
+
+    def test_failed_refresh_keeps_last_snapshot(self):
+        fetch = FakeSettingsEndpoint(PAYLOAD)
+        cache = SettingsCache(logger, fetch)
+        cache.refresh()
+
+        def unreachable(modified):
+            raise ConnectionError('Frappe is down')
+
+        cache.fetch = unreachable
+        self.assertFalse(cache.refresh())
+        self.assertEqual(cache.get('api_url'), PAYLOAD['settings']['api_url'])
+        self.assertEqual(cache.get_stats()['failures'], 1)
+
+    def test_snapshot_is_read_only(self):
+        cache = SettingsCache(logger, FakeSettingsEndpoint(PAYLOAD))
+        cache.refresh()
+
+        with self.assertRaises(TypeError):
+            cache.snapshot['api_url'] = 'http://elsewhere'
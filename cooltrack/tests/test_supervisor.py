@@ -0,0 +1,82 @@
+import os
+import sys
+import time
+import logging
+import unittest
+
+from cooltrack.services.sensor_gateway_service.supervisor import WorkerSupervisor
+
+logger = logging.getLogger(__name__)
+
+
+def exit_with_error(worker_id, start_heartbeat):
+    sys.exit(3)
+
+
+def hang_silently(worker_id, start_heartbeat):
+    time.sleep(60)
+
+
+def hang_healthy(worker_id, start_heartbeat):
+    start_heartbeat(lambda: True)
+    time.sleep(60)
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+
+        time.sleep(0.01)
+
+    return False
+
+
+@unittest.skipUnless(hasattr(os, 'fork'), 'needs fork')
+class TestWorkerSupervisor(unittest.TestCase):
+    def make_supervisor(self, run_worker, **kwargs):
+        supervisor = WorkerSupervisor(logger, 1, run_worker, restart_delay=0, **kwargs)
+        supervisor.running = True
+        self.addCleanup(supervisor.shutdown)
+        return supervisor
+
+    def test_crashed_worker_is_restarted(self):
+        supervisor = self.make_supervisor(exit_with_error)
+        supervisor.spawn(0)
+        first_pid = supervisor.workers[0]
+
+        def reaped():
+            supervisor.reap_workers()
+            return 0 not in supervisor.workers
+
+        self.assertTrue(wait_for(reaped))
+        self.assertEqual(supervisor.restarts[0], 1)
+
+        supervisor.restart_workers()
+        self.assertNotEqual(supervisor.workers[0], first_pid)
+
+    def test_silent_worker_is_killed(self):
+        supervisor = self.make_supervisor(hang_silently, heartbeat_interval=0.05, heartbeat_timeout=0.2)
+        supervisor.spawn(0)
+
+        def killed():
+            supervisor.check_heartbeats()
+            supervisor.reap_workers()
+            return 0 not in supervisor.workers
+
+        self.assertTrue(wait_for(killed))
+        self.assertIn(0, supervisor.next_start)
+
+    def test_heartbeats_keep_worker_alive(self):
+        supervisor = self.make_supervisor(hang_healthy, heartbeat_interval=0.05, heartbeat_timeout=0.5)
+        supervisor.spawn(0)
+        pid = supervisor.workers[0]
+
+        deadline = time.monotonic() + 1.0
+        while time.monotonic() < deadline:
+            supervisor.read_heartbeats()
+            supervisor.check_heartbeats()
+            supervisor.reap_workers()
+
+        self.assertEqual(supervisor.workers.get(0), pid)
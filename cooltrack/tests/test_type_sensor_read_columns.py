@@ -0,0 +1,163 @@
+# Copyright (c) 2025, dev@cogentmedia.co and Contributors
+# See license.txt
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from cooltrack.patches.v1_0 import type_sensor_read_columns
+
+
+class TestTypeSensorReadColumns(FrappeTestCase):
+    def test_converts_varchar_columns(self):
+        # information_schema reports the length along with the type
+        with patch.object(frappe.db, 'get_column_type', return_value='varchar(140)'):
+            self.assertTrue(type_sensor_read_columns.needs_conversion())
+
+    def test_skips_typed_columns(self):
+        self.assertFalse(type_sensor_read_columns.needs_conversion())
+
+        with patch.object(frappe.db, 'get_column_type', return_value='decimal(21,9)'):
+            self.assertFalse(type_sensor_read_columns.needs_conversion())
+
+    def test_super_grant_detection(self):
+        self.assertTrue(type_sensor_read_columns.is_global_super_grant(
+            "GRANT ALL PRIVILEGES ON *.* TO `root`@`localhost` WITH GRANT OPTION"
+        ))
+        self.assertTrue(type_sensor_read_columns.is_global_super_grant(
+            "GRANT SELECT, SUPER ON *.* TO `admin`@`%`"
+        ))
+        self.assertFalse(type_sensor_read_columns.is_global_super_grant(
+            "GRANT ALL PRIVILEGES ON `_site_db`.* TO `_site_db`@`%`"
+        ))
+        self.assertFalse(type_sensor_read_columns.is_global_super_grant("GRANT USAGE ON *.* TO `_site_db`@`%`"))
+
+    def test_missing_privilege_fails_up_front(self):
+        def sql(query, *args, **kwargs):
+            return [(1, 0)]
+
+        with patch.object(frappe.db, 'sql', side_effect=sql), \
+                patch.object(frappe.db, 'sql_list', return_value=['GRANT USAGE ON *.* TO `_site_db`@`%`']):
+            self.assertRaises(frappe.ValidationError, type_sensor_read_columns.check_trigger_privilege)
+
+
+SCRATCH_TABLE = '_tabSensor Read_typing_test'
+
+class TestTypeSensorReadCopy(FrappeTestCase):
+    """Runs the copy and swap on a scratch table shaped like the untyped Sensor Read table"""
+
+    def setUp(self):
+        try:
+            type_sensor_read_columns.check_trigger_privilege()
+
+        except frappe.ValidationError:
+            self.skipTest('database user may not create triggers')
+
+        module = type_sensor_read_columns
+        for name, value in (
+            ('TABLE', SCRATCH_TABLE),
+            ('NEW_TABLE', f'{SCRATCH_TABLE}_typed'),
+            ('OLD_TABLE', f'{SCRATCH_TABLE}_untyped'),
+            ('CURSOR_KEY', 'cooltrack_sensor_read_typing_test_cursor'),
+            ('TRIGGERS', {f'{trigger}_test': event for trigger, event in module.TRIGGERS.items()})
+        ):
+            patcher = patch.object(module, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.addCleanup(self.drop_tables)
+        self.drop_tables()
+
+        columns = ', '.join(f'`{column}` varchar(140)' for column, _fieldtype, _expression in module.CONVERSIONS)
+        frappe.db.sql_ddl(f"""
+            CREATE TABLE `{SCRATCH_TABLE}` (
+                name varchar(140) PRIMARY KEY,
+                sensor_id varchar(140),
+                {columns},
+                UNIQUE KEY natural_key (sensor_id, sequence_number, timestamp)
+            )
+        """)
+
+        self.insert('SR-1', temperature='4.5', sequence_number='7', timestamp='2025-01-01 00:00:00', time_corrected='true')
+        self.insert('SR-2', temperature='not a number', sequence_number='8', timestamp='2025-01-01T00:01:00')
+        frappe.db.commit()
+
+    def drop_tables(self):
+        for trigger in type_sensor_read_columns.TRIGGERS:
+            frappe.db.sql_ddl(f'DROP TRIGGER IF EXISTS `{trigger}`')
+
+        for suffix in ('', '_typed', '_untyped'):
+            frappe.db.sql_ddl(f'DROP TABLE IF EXISTS `{SCRATCH_TABLE}{suffix}`')
+
+    def insert(self, name, **values):
+        values = {'sensor_id': 'SENSOR-1', **values}
+        columns = ', '.join(f'`{column}`' for column in values)
+        placeholders = ', '.join(['%s'] * len(values))
+        frappe.db.sql(
+            f'INSERT INTO `{SCRATCH_TABLE}` (name, {columns}) VALUES (%s, {placeholders})',
+            (name, *values.values())
+        )
+
+    def get_copy(self, table):
+        return {
+            row.name: row
+            for row in frappe.db.sql(f'SELECT * FROM `{table}`', as_dict=True)
+        }
+
+    def test_copy_and_swap(self):
+        type_sensor_read_columns.create_typed_table()
+        type_sensor_read_columns.create_triggers()
+        type_sensor_read_columns.backfill()
+        type_sensor_read_columns.swap_tables()
+
+        self.assertFalse(type_sensor_read_columns.table_exists(f'{SCRATCH_TABLE}_untyped'))
+        self.assertFalse(frappe.db.sql('SHOW TRIGGERS WHERE `Trigger` LIKE %s', '%_test'))
+
+        rows = self.get_copy(SCRATCH_TABLE)
+        self.assertEqual(rows['SR-1'].temperature, 4.5)
+        self.assertEqual(rows['SR-1'].sequence_number, 7)
+        self.assertEqual(str(rows['SR-1'].timestamp), '2025-01-01 00:00:00')
+        self.assertEqual(rows['SR-1'].time_corrected, 1)
+        # Values that are not numbers become 0 instead of failing the copy
+        self.assertEqual(rows['SR-2'].temperature, 0)
+        self.assertEqual(str(rows['SR-2'].timestamp), '2025-01-01 00:01:00')
+
+    def test_triggers_follow_live_writes(self):
+        new_table = f'{SCRATCH_TABLE}_typed'
+        type_sensor_read_columns.create_typed_table()
+        type_sensor_read_columns.create_triggers()
+        type_sensor_read_columns.backfill()
+
+        self.insert('SR-3', temperature='3', sequence_number='9', timestamp='2025-01-01 00:02:00')
+        frappe.db.sql(f"UPDATE `{SCRATCH_TABLE}` SET temperature = '9.5' WHERE name = 'SR-2'")
+        frappe.db.sql(f"DELETE FROM `{SCRATCH_TABLE}` WHERE name = 'SR-3'")
+        frappe.db.commit()
+
+        rows = self.get_copy(new_table)
+        self.assertEqual(set(rows), {'SR-1', 'SR-2'})
+        self.assertEqual(rows['SR-2'].temperature, 9.5)
+
+    def test_trigger_collision_keeps_existing_row(self):
+        new_table = f'{SCRATCH_TABLE}_typed'
+        type_sensor_read_columns.create_typed_table()
+        type_sensor_read_columns.create_triggers()
+        type_sensor_read_columns.backfill()
+
+        # Distinct as text, the same natural key once typed: SR-1 must not be replaced
+        self.insert('SR-4', temperature='6', sequence_number='07', timestamp='2025-01-01 00:00:00')
+        frappe.db.commit()
+
+        rows = self.get_copy(new_table)
+        self.assertEqual(set(rows), {'SR-1', 'SR-2'})
+        self.assertEqual(rows['SR-1'].temperature, 4.5)
+
+        # An update colliding with another row leaves that row alone too
+        frappe.db.sql(f"""
+            UPDATE `{SCRATCH_TABLE}` SET sequence_number = ' 7', timestamp = '2025-01-01 00:00:00' WHERE name = 'SR-2'
+        """)
+        frappe.db.commit()
+
+        rows = self.get_copy(new_table)
+        self.assertEqual(set(rows), {'SR-1'})
+        self.assertEqual(rows['SR-1'].temperature, 4.5)
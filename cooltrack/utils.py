@@ -9,6 +9,9 @@ import logging
 import requests
 from frappe.utils import now_datetime, add_to_date, get_datetime
 
+from cooltrack.device_cache import clear_device_meta
+from cooltrack.device_telemetry import flush_telemetry
+
 def load_env_file(logger: logging, filename: str = '.env.encrypted') -> bool:
     script_dir = os.path.dirname(os.path.abspath(__file__))
     filepath = os.path.join(script_dir, filename)
@@ -177,8 +180,8 @@ def send_approval_notification(doctype, device_id, status):
         </div>
     """
 
-    frappe.db.savepoint('sp')
     for manager in system_managers:
+        frappe.db.savepoint('sp')
         try:
             frappe.get_doc({
                 'doctype': 'Notification Log',
@@ -189,10 +192,9 @@ def send_approval_notification(doctype, device_id, status):
                 'document_type': doctype,
                 'document_name': device_id,
             }).insert(ignore_permissions=True)
-            frappe.db.commit()
 
         except Exception as e:
-            frappe.db.rollback()
+            frappe.db.rollback(save_point='sp')
             frappe.log_error(frappe.get_traceback(), 'send_approval_notification()')
             continue
         
@@ -210,9 +212,8 @@ def send_system_error_notification(error_message):
         Please check the error log for details.
     """
 
-    frappe.db.savepoint('sp')
-    
     for manager in system_managers:
+        frappe.db.savepoint('sp')
         try:
             frappe.get_doc({
                 'doctype': 'Notification Log',
@@ -221,10 +222,9 @@ def send_system_error_notification(error_message):
                 'type': 'Alert',
                 'email_content': message
             }).insert(ignore_permissions=True)
-            frappe.db.commit()
 
         except Exception as e:
-            frappe.db.rollback()
+            frappe.db.rollback(save_point='sp')
             frappe.log_error(frappe.get_traceback(), 'send_system_error_notification()')
             continue
     
@@ -270,9 +270,10 @@ def create_approval_log(doctype, docname, status, automated=False):
         'doctype': 'Approval Log',
         'data': html
     }).insert(ignore_permissions=True)
-    frappe.db.commit()
 
 def check_sensor_gateway_heartbeat():
+    flush_telemetry() # Judge on the buffered heartbeats too
+
     current_time = now_datetime()
     threshold_time = add_to_date(current_time, hours=-1)
     
@@ -289,6 +290,7 @@ def check_sensor_gateway_heartbeat():
 
     for gateway in sensor_gateways:
         frappe.db.set_value('Sensor Gateway', gateway.name, 'status', 'Inactive')
+        clear_device_meta('Sensor Gateway', gateway.name)
         send_disconnection_alert('Sensor Gateway', gateway.name)
 
         sensors = frappe.get_all('Sensor', {'gateway_id': gateway.name, 'status': ['!=', 'Inactive']})
@@ -297,11 +299,14 @@ def check_sensor_gateway_heartbeat():
         
         for sensor in sensors:
             frappe.db.set_value('Sensor', sensor.name, 'status', 'Inactive')
+            clear_device_meta('Sensor', sensor.name)
             send_disconnection_alert('Sensor', sensor.name)
 
         frappe.db.commit()
 
 def check_sensor_heartbeat():
+    flush_telemetry()
+
     current_time = now_datetime()
     threshold_time = add_to_date(current_time, hours=-1)
     
@@ -318,6 +323,7 @@ def check_sensor_heartbeat():
         
     for sensor in sensors:
         frappe.db.set_value('Sensor', sensor.name, 'status', 'Inactive')
+        clear_device_meta('Sensor', sensor.name)
         send_disconnection_alert('Sensor', sensor.name)
         frappe.db.commit()
 
@@ -371,9 +377,8 @@ def send_disconnection_alert(doctype, device_id):
         'priority': 'high'
     }
 
-    frappe.db.savepoint('send_disconnection_alert')
-
     for manager in system_managers:
+        frappe.db.savepoint('send_disconnection_alert')
         try:
             # Create system notification
             frappe.get_doc({
@@ -403,10 +408,8 @@ def send_disconnection_alert(doctype, device_id):
                 click_action=click_action
             )
             
-            frappe.db.commit()
-
         except Exception as e:
-            frappe.db.rollback()
+            frappe.db.rollback(save_point='send_disconnection_alert')
             frappe.log_error(frappe.get_traceback(), 'send_disconnection_alert()')
             continue
 
@@ -460,9 +463,8 @@ def send_reconnection_alert(doctype, device_id):
         'priority': 'high'
     }
 
-    frappe.db.savepoint('send_reconnection_alert')
-
     for manager in system_managers:
+        frappe.db.savepoint('send_reconnection_alert')
         try:
             notification_exists = frappe.db.exists('Notification Log', {
                 'document_type': doctype,
@@ -504,10 +506,8 @@ def send_reconnection_alert(doctype, device_id):
                 click_action=click_action
             )
 
-            frappe.db.commit()
-
         except Exception as e:
-            frappe.db.rollback()
+            frappe.db.rollback(save_point='send_reconnection_alert')
             frappe.log_error(frappe.get_traceback(), 'send_reconnection_alert()')
             continue
 
@@ -575,9 +575,8 @@ def send_temperature_threshold_alert(sensor_id, sensor_name, max_temp, threshold
         # If there's an error checking the sensor doc, default to not sending email
         should_send_email = False
 
-    frappe.db.savepoint('send_temperature_threshold_alert')
-
     for recipient in recipients:
+        frappe.db.savepoint('send_temperature_threshold_alert')
         try:
             notification_exists = False
             if recipient != 'ste@badmc.org':
@@ -619,13 +618,49 @@ def send_temperature_threshold_alert(sensor_id, sensor_name, max_temp, threshold
                     as_markdown=False
                 )
 
-            frappe.db.commit()
-
         except Exception:
-            frappe.db.rollback()
+            frappe.db.rollback(save_point='send_temperature_threshold_alert')
             frappe.log_error(frappe.get_traceback(), 'send_temperature_threshold_alert')
             continue
 
+def update_excursion_state(sensor, temperature, timestamp):
+    """Advance the sensor's excursion (its current run of readings above max_acceptable_temperature) by one
+    calibrated reading in O(1), whatever the history. Writes only while an excursion is open or closing and
+    updates sensor (Sensor doc or cached meta) in place; returns whether anything changed."""
+    if sensor.max_acceptable_temperature == None:
+        return False
+
+    started_at = get_datetime(sensor.excursion_started_at) if sensor.excursion_started_at else None
+    last_reading_at = get_datetime(sensor.excursion_last_reading_at) if sensor.excursion_last_reading_at else None
+
+    if last_reading_at and timestamp < last_reading_at:
+        return False # A late spooled reading; the state has already moved past it
+
+    if temperature > sensor.max_acceptable_temperature:
+        state = {
+            'excursion_started_at': started_at or timestamp,
+            'excursion_last_reading_at': timestamp,
+            'excursion_peak_temperature': max(temperature, sensor.excursion_peak_temperature or temperature) if started_at else temperature,
+            'excursion_last_temperature': temperature
+        }
+
+    elif started_at:
+        # Back within range: close the excursion, keeping the time so older replays are still ignored
+        state = {
+            'excursion_started_at': None,
+            'excursion_last_reading_at': timestamp,
+            'excursion_peak_temperature': 0,
+            'excursion_last_temperature': 0
+        }
+
+    else:
+        return False
+
+    frappe.db.set_value('Sensor', sensor.name, state, update_modified=False)
+    sensor.update(state)
+    clear_device_meta('Sensor', sensor.name)
+    return True
+
 def check_temperature_threshold_violation(doc, method=None):
     if doc.max_acceptable_temperature == None:
         return
@@ -643,45 +678,12 @@ def check_temperature_threshold_violation(doc, method=None):
             # skip checking during disabled period
             return
 
-    one_month_ago = add_to_date(now_datetime(), days=-30)
-
-    recent_readings = frappe.get_all(
-        'Sensor Read',
-        fields=['temperature', 'timestamp'],
-        filters={
-            'sensor_id': doc.sensor_id,
-            'creation': ['>=', one_month_ago]
-        },
-        order_by='timestamp desc'
-    )
-    
-    if not recent_readings:
+    # Kept current by update_excursion_state, so no reading history is loaded
+    if not doc.excursion_started_at or not doc.excursion_last_reading_at:
         return
-    
-    valid_readings = []
-    for reading in recent_readings:
-        try:
-            temp_value = float(reading.temperature)
 
-            reading_time = reading.timestamp
-            if isinstance(reading_time, str):
-                reading_time = frappe.utils.get_datetime(reading_time)
-
-            valid_readings.append({
-                'temperature': temp_value,
-                'timestamp': reading_time
-            })
-            
-        except (ValueError, TypeError):
-            continue
-    
-    if not valid_readings:
-        return
-    
-    threshold_exceeded_duration = check_threshold_duration(
-        valid_readings, 
-        doc.max_acceptable_temperature
-    )
+    excursion_duration = get_datetime(doc.excursion_last_reading_at) - get_datetime(doc.excursion_started_at)
+    threshold_exceeded_duration = excursion_duration.total_seconds() / 60
     
     if is_outside_working_hours(current_time):
         required_duration = doc.threshold_exceeded_duration
@@ -693,7 +695,7 @@ def check_temperature_threshold_violation(doc, method=None):
         send_temperature_threshold_alert(
             doc.sensor_id,
             doc.sensor_name,
-            doc.last_temperature,
+            doc.excursion_peak_temperature,
             doc.max_acceptable_temperature,
             threshold_exceeded_duration
         )
@@ -712,34 +714,6 @@ def is_outside_working_hours(timestamp):
     
     return False
 
-def check_threshold_duration(readings, max_temp):
-    if not readings:
-        return 0
-    
-    readings.sort(key=lambda x: x['timestamp'], reverse=True)
-    
-    last_violation_time = None
-    first_violation_time = None
-    
-    for reading in readings:
-        if reading['temperature'] > max_temp:
-            if last_violation_time is None:
-                last_violation_time = reading['timestamp']
-                first_violation_time = reading['timestamp']
-                
-            else:
-                first_violation_time = reading['timestamp']
-                
-        elif reading['temperature'] <= max_temp:
-            # Temperature is within acceptable range, stop counting
-            break
-    
-    if last_violation_time and first_violation_time:
-        duration_seconds = (last_violation_time - first_violation_time).total_seconds()
-        return duration_seconds / 60  # Convert to minutes
-
-    return 0
-
 def creat_alert_status_log(sensor_id, alerts_enabled):
     frappe.db.savepoint('creat_alert_status_log')
     try:
@@ -781,8 +755,7 @@ def creat_alert_status_log(sensor_id, alerts_enabled):
             'doctype': 'Approval Log',
             'data': html
         }).insert(ignore_permissions=True)
-        frappe.db.commit()
         
     except Exception as e:
-        frappe.log_error(f'Failed to create alert status log for sensor {sensor_id}: {str(e)}', 'Alert Status Log Error')
-        frappe.db.rollback()
\ No newline at end of file
+        frappe.db.rollback(save_point='creat_alert_status_log')
+        frappe.log_error(f'Failed to create alert status log for sensor {sensor_id}: {str(e)}', 'Alert Status Log Error')
\ No newline at end of file